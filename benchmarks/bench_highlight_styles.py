@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Benchmark do destaque de código: estilos inline vs. classes CSS
+
+Compara tamanho do HTML, tempo de carregamento/layout no Chromium, tempo de
+impressão e tamanho do PDF para MarkdownParser(highlight_classes=False/True).
+
+Uso:
+    python benchmarks/bench_highlight_styles.py [--blocks 300] [--runs 3] [--html-only]
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Adicionar o diretório src ao PYTHONPATH
+project_root = Path(__file__).parent.parent
+src_path = project_root / "src"
+sys.path.insert(0, str(src_path))
+
+from parser import MarkdownParser
+from generator import HTMLGenerator
+
+
+SNIPPETS = {
+    'python': (
+        "class Repository{i}:\n"
+        "    \"\"\"Acesso aos itens {i}\"\"\"\n\n"
+        "    def __init__(self, client, retries: int = 3):\n"
+        "        self.client = client\n"
+        "        self.retries = retries\n\n"
+        "    def fetch(self, item_id: int) -> dict:\n"
+        "        for attempt in range(self.retries):\n"
+        "            response = self.client.get(f'/items/{{item_id}}?v={i}')\n"
+        "            if response.ok:\n"
+        "                return response.json()\n"
+        "        raise RuntimeError('falhou após %d tentativas' % self.retries)\n"
+    ),
+    'javascript': (
+        "export async function loadItems{i}(api, options = {{}}) {{\n"
+        "  const {{ limit = 50, offset = 0 }} = options;\n"
+        "  const response = await api.get(`/items?limit=${{limit}}&offset=${{offset}}`);\n"
+        "  if (!response.ok) {{\n"
+        "    throw new Error(`HTTP ${{response.status}} no lote {i}`);\n"
+        "  }}\n"
+        "  return (await response.json()).map((item) => ({{ ...item, batch: {i} }}));\n"
+        "}}\n"
+    ),
+    'sql': (
+        "SELECT i.id, i.name, COUNT(o.id) AS orders\n"
+        "FROM items AS i\n"
+        "LEFT JOIN orders AS o ON o.item_id = i.id\n"
+        "WHERE i.created_at >= '2024-01-{day:02d}' AND i.category = {i}\n"
+        "GROUP BY i.id, i.name\n"
+        "ORDER BY orders DESC\n"
+        "LIMIT 100;\n"
+    ),
+    'bash': (
+        "#!/usr/bin/env bash\n"
+        "set -euo pipefail\n"
+        "for file in docs/*.md; do\n"
+        "  python3 src/main.py \"$file\" --output-dir \"dist/{i}\" || echo \"falha: $file\"\n"
+        "done\n"
+    ),
+}
+
+
+def generate_document(blocks: int) -> str:
+    """
+    Generate a code-heavy document
+
+    Args:
+        blocks: Number of code blocks
+
+    Returns:
+        Markdown content
+    """
+    languages = list(SNIPPETS)
+    parts = ["# Guia de Integração\n"]
+    for i in range(blocks):
+        language = languages[i % len(languages)]
+        code = SNIPPETS[language].format(i=i, day=i % 28 + 1)
+        parts.append(f"## Exemplo {i}\n\nUso de `{language}` no passo {i}.\n\n"
+                     f"```{language}\n{code}```\n")
+    return "\n".join(parts)
+
+
+def build_html(content: str, highlight_classes: bool) -> str:
+    """
+    Parse and render a complete HTML document
+
+    Args:
+        content: Markdown content
+        highlight_classes: Use class-based highlighting
+
+    Returns:
+        HTML document
+    """
+    parser = MarkdownParser(highlight_classes=highlight_classes)
+    try:
+        parsed_data = parser.parse(content)
+    finally:
+        parser.close()
+    highlight_style = parser.highlight_style if highlight_classes else None
+    return HTMLGenerator(highlight_style=highlight_style).generate_html(parsed_data)
+
+
+async def measure_browser(documents: dict, runs: int) -> dict:
+    """
+    Load and print each document in Chromium
+
+    Args:
+        documents: Mode name mapped to HTML document
+        runs: Repetitions per mode (the median is reported)
+
+    Returns:
+        Mode name mapped to {'layout': seconds, 'print': seconds, 'pdf_bytes': int}
+    """
+    from browser import AssetBundle, RenderSession
+
+    results = {}
+    async with RenderSession(assets=AssetBundle(offline=True), max_pages=1) as session:
+        for mode, html in documents.items():
+            layout_times, print_times, pdf_size = [], [], 0
+            for _ in range(runs + 1):
+                async with session.page() as page:
+                    started = time.perf_counter()
+                    await page.set_content(html, wait_until='load')
+                    # Force style recalculation and layout of the whole document
+                    await page.evaluate("document.body.getBoundingClientRect().height")
+                    loaded = time.perf_counter()
+                    pdf = await page.pdf(format='A4', print_background=True)
+                    printed = time.perf_counter()
+                layout_times.append(loaded - started)
+                print_times.append(printed - loaded)
+                pdf_size = len(pdf)
+            # The first run warms up the browser and is discarded
+            results[mode] = {
+                'layout': statistics.median(layout_times[1:]),
+                'print': statistics.median(print_times[1:]),
+                'pdf_bytes': pdf_size,
+            }
+    return results
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Benchmark de destaque de código inline vs. classes')
+    arg_parser.add_argument('--blocks', type=int, default=300,
+                            help='Blocos de código no documento sintético (padrão: 300)')
+    arg_parser.add_argument('--runs', type=int, default=3,
+                            help='Repetições no navegador por modo (padrão: 3)')
+    arg_parser.add_argument('--html-only', action='store_true',
+                            help='Medir apenas o HTML (sem Chromium)')
+    args = arg_parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    content = generate_document(args.blocks)
+    documents = {
+        'inline': build_html(content, highlight_classes=False),
+        'classes': build_html(content, highlight_classes=True),
+    }
+
+    print(f"🖍️  Documento: {args.blocks} blocos de código, {len(content) / 1024:.0f} KiB de Markdown")
+    print("-" * 60)
+    inline_bytes = len(documents['inline'].encode('utf-8'))
+    for mode, html in documents.items():
+        size = len(html.encode('utf-8'))
+        print(f"📄 HTML {mode:<8} {size / 1024:8.0f} KiB  ({size / inline_bytes:5.1%} do inline)")
+
+    if args.html_only:
+        return
+
+    try:
+        results = asyncio.run(measure_browser(documents, args.runs))
+    except Exception as e:
+        print(f"⚠️  Medição no navegador indisponível: {e}")
+        return
+
+    print("-" * 60)
+    inline = results['inline']
+    for mode, result in results.items():
+        print(f"⏱️  {mode:<8} layout {result['layout']:6.2f}s  impressão {result['print']:6.2f}s  "
+              f"PDF {result['pdf_bytes'] / 1024:7.0f} KiB  "
+              f"(layout {inline['layout'] / result['layout']:4.2f}x, "
+              f"PDF {result['pdf_bytes'] / inline['pdf_bytes']:5.1%})")
+
+
+if __name__ == "__main__":
+    main()
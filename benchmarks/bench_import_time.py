@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Benchmark do tempo de importação da CLI (python -X importtime)
+
+Executa src/main.py em subprocessos e soma o tempo de importação dos módulos
+de primeiro nível. Também verifica quais módulos pesados foram carregados:
+--version não deve importar Markdown, Pygments, Jinja, emoji, YAML, bs4 nem
+Playwright, e a geração só de HTML não deve importar Playwright nem bs4.
+
+Termina com código 1 se um módulo proibido for importado, se um cenário
+passar do orçamento (--budget-ms) ou se ficar mais lento que o baseline.
+
+Uso:
+    python benchmarks/bench_import_time.py [--runs 5] [--budget-ms 250]
+        [--output resultados.json] [--baseline baseline.json] [--threshold 0.25]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+project_root = Path(__file__).parent.parent
+main_script = project_root / "src" / "main.py"
+sample_document = project_root / "tests" / "fixtures" / "sample.md"
+
+# Modules that only conversion stages may load
+HEAVY_MODULES = ('markdown', 'pygments', 'jinja2', 'emoji', 'yaml', 'bs4', 'playwright')
+BROWSER_MODULES = ('playwright', 'bs4')
+
+
+def scenarios(output_dir: str) -> Dict[str, Tuple[List[str], Tuple[str, ...]]]:
+    """
+    Build the measured command lines
+
+    Args:
+        output_dir: Directory for the files written by the HTML scenario
+
+    Returns:
+        Scenario name mapped to (CLI arguments, forbidden top-level packages)
+    """
+    html_output = str(Path(output_dir) / "sample.html")
+    return {
+        'version': (['--version'], HEAVY_MODULES),
+        'html': ([str(sample_document), '--html', '--no-mermaid', '--no-cache', '-o', html_output],
+                 BROWSER_MODULES),
+    }
+
+
+def parse_importtime(stderr: str) -> Tuple[int, Set[str]]:
+    """
+    Read the output of ``-X importtime``
+
+    Args:
+        stderr: Standard error of the measured process
+
+    Returns:
+        Tuple of (total microseconds of the top-level imports, imported module names)
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|', 2)
+        depth = len(name) - len(name.lstrip(' '))
+        entries.append((depth, int(cumulative), name.strip()))
+
+    if not entries:
+        return 0, set()
+    top_level = min(depth for depth, _, _ in entries)
+    total = sum(cumulative for depth, cumulative, _ in entries if depth == top_level)
+    return total, {name for _, _, name in entries}
+
+
+def measure(arguments: List[str], runs: int) -> Tuple[List[float], Set[str]]:
+    """
+    Run the CLI with -X importtime, after one discarded run that warms the bytecode
+
+    Args:
+        arguments: CLI arguments
+        runs: Measured runs
+
+    Returns:
+        Tuple of (milliseconds per measured run, modules imported in the last run)
+
+    Raises:
+        RuntimeError: If the CLI fails
+    """
+    samples, modules = [], set()
+    for _ in range(runs + 1):
+        result = subprocess.run([sys.executable, '-X', 'importtime', str(main_script), *arguments],
+                                capture_output=True, text=True, cwd=project_root)
+        if result.returncode != 0:
+            raise RuntimeError(f"main.py {' '.join(arguments)} falhou:\n{result.stderr[-2000:]}")
+        total, modules = parse_importtime(result.stderr)
+        samples.append(total / 1000)
+    return samples[1:], modules
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Benchmark do tempo de importação da CLI')
+    arg_parser.add_argument('--runs', type=int, default=5,
+                            help='Execuções medidas por cenário (padrão: 5)')
+    arg_parser.add_argument('--budget-ms', type=float, default=None,
+                            help='Tempo máximo de importação de --version em ms')
+    arg_parser.add_argument('--output', default=None,
+                            help='Arquivo JSON de resultados (padrão: benchmarks/results/import_time.json)')
+    arg_parser.add_argument('--baseline', default=None,
+                            help='Resultados salvos para comparação')
+    arg_parser.add_argument('--threshold', type=float, default=0.25,
+                            help='Lentidão tolerada em relação ao baseline (padrão: 0.25 = 25%%)')
+    args = arg_parser.parse_args()
+
+    baseline = {}
+    if args.baseline and Path(args.baseline).exists():
+        baseline = json.loads(Path(args.baseline).read_text(encoding='utf-8')).get('results', {})
+
+    failures = []
+    results = {}
+    print(f"⏱️  Tempo de importação: {args.runs} execuções por cenário")
+    print("-" * 60)
+    with tempfile.TemporaryDirectory() as output_dir:
+        for name, (arguments, forbidden) in scenarios(output_dir).items():
+            samples, modules = measure(arguments, args.runs)
+            loaded = sorted(package for package in forbidden
+                            if package in modules or any(module.startswith(package + '.') for module in modules))
+            median = statistics.median(samples)
+            results[name] = {
+                'median_ms': round(median, 2),
+                'min_ms': round(min(samples), 2),
+                'modules': len(modules),
+                'forbidden_loaded': loaded,
+            }
+
+            line = f"📦 {name:<8} {median:7.1f} ms  ({len(modules)} módulos)"
+            saved = baseline.get(name)
+            if saved:
+                change = (median - saved['median_ms']) / saved['median_ms']
+                line += f"  baseline {saved['median_ms']:.1f} ms ({change:+.0%})"
+                if change > args.threshold:
+                    failures.append(f"{name}: {change:+.0%} em relação ao baseline")
+            print(line)
+
+            if loaded:
+                failures.append(f"{name}: importou {', '.join(loaded)}")
+            if name == 'version' and args.budget_ms is not None and median > args.budget_ms:
+                failures.append(f"{name}: {median:.1f} ms acima do orçamento de {args.budget_ms:g} ms")
+
+    output = Path(args.output) if args.output else project_root / 'benchmarks' / 'results' / 'import_time.json'
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({'python': sys.version.split()[0], 'runs': args.runs, 'results': results},
+                                 indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f"💾 Resultados: {output}")
+
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        sys.exit(1)
+    print("✅ Tempo de importação dentro do esperado")
+
+
+if __name__ == "__main__":
+    main()
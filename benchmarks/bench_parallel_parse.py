@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark do parse paralelo por seções (MarkdownParser(workers=N))
+
+Uso:
+    python benchmarks/bench_parallel_parse.py [--sections 2000] [--workers 1,2,4,8]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+# Adicionar o diretório src ao PYTHONPATH
+project_root = Path(__file__).parent.parent
+src_path = project_root / "src"
+sys.path.insert(0, str(src_path))
+
+from parser import MarkdownParser
+
+
+def generate_document(sections: int) -> str:
+    """
+    Generate a synthetic API reference with code, tables, lists and footnotes
+    
+    Args:
+        sections: Number of level-2 sections
+        
+    Returns:
+        Markdown content
+    """
+    parts = ["# Referência da API\n"]
+    for i in range(sections):
+        parts.append(
+            f"## Endpoint {i}: `GET /api/v1/items/{i}`\n\n"
+            f"Retorna o item **{i}** com *detalhes*, veja [guia][ref{i % 50}]"
+            f" e a nota[^n{i % 20}].\n\n"
+            "| Campo | Tipo | Descrição |\n|---|---|---|\n"
+            f"| id | int | identificador {i} |\n| name | str | nome do item |\n\n"
+            f"```python\ndef get_item_{i}(client):\n"
+            f"    response = client.get('/api/v1/items/{i}')\n"
+            "    response.raise_for_status()\n    return response.json()\n```\n\n"
+            f"- passo {i}.1\n- passo {i}.2\n    - detalhe\n"
+        )
+    parts.extend(f"[ref{j}]: https://example.com/guia/{j}" for j in range(50))
+    parts.extend(f"[^n{j}]: Nota de rodapé {j}." for j in range(20))
+    return "\n".join(parts)
+
+
+def run(content: str, workers: int) -> float:
+    """
+    Parse once with a warm pool and return the elapsed time
+    
+    Args:
+        content: Markdown content
+        workers: Number of worker processes
+        
+    Returns:
+        Seconds spent in MarkdownParser.parse()
+    """
+    parser = MarkdownParser(workers=workers)
+    try:
+        if workers > 1:
+            # Start and warm the pool outside the measurement
+            parser.parse(generate_document(max(200, workers * 50)))
+            parser._section_cache.clear()
+        started = time.perf_counter()
+        parser.parse(content)
+        return time.perf_counter() - started
+    finally:
+        parser.close()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Benchmark do parse paralelo')
+    arg_parser.add_argument('--sections', type=int, default=2000,
+                            help='Seções no documento sintético (padrão: 2000)')
+    arg_parser.add_argument('--workers', default=None,
+                            help='Lista de workers, ex.: 1,2,4 (padrão: 1 até o número de CPUs)')
+    args = arg_parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    cpus = os.cpu_count() or 1
+    if args.workers:
+        counts = [int(n) for n in args.workers.split(',')]
+    else:
+        counts = sorted({1, *[n for n in (2, 4, 8, 16) if n <= cpus], cpus})
+
+    content = generate_document(args.sections)
+    print(f"⚡ Documento: {args.sections} seções, {len(content) / 1024:.0f} KiB, {cpus} CPU(s)")
+    print("-" * 50)
+
+    baseline = None
+    for workers in counts:
+        elapsed = run(content, workers)
+        baseline = baseline or elapsed
+        print(f"👷 {workers:>2} worker(s): {elapsed:6.2f}s  (speedup {baseline / elapsed:4.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
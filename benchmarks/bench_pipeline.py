@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Suíte de benchmarks do pipeline: micro-benchmarks por etapa e execução completa
+
+Etapas medidas em cada corpus sintético (ver benchmarks/corpus.py):
+    parse    MarkdownParser.parse() com o cache de destaque de código frio
+    extract  extração dos diagramas Mermaid
+    emojize  substituição dos :shortcodes:
+    toc      HTMLGenerator.format_toc_with_page_numbers()
+    inject   injeção dos SVGs nos placeholders dos diagramas
+    render   renderização do template Jinja (span html.template)
+    e2e      Markdown → PDF no Chromium, pelo RenderServer (omitido com --no-browser)
+
+Os resultados (mediana, mínimo e máximo de cada etapa) são gravados em JSON.
+Com --baseline, cada mediana é comparada à do arquivo salvo e o processo
+termina com código 1 se alguma etapa ficar mais lenta que o limite.
+
+Uso:
+    python benchmarks/bench_pipeline.py [--corpus code] [--stage parse] [--runs 5]
+        [--scale 1] [--no-browser] [--output resultados.json]
+        [--baseline baseline.json] [--threshold 0.15]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# Adicionar o diretório src ao PYTHONPATH
+project_root = Path(__file__).parent.parent
+src_path = project_root / "src"
+sys.path.insert(0, str(src_path))
+
+from parser import MarkdownParser, highlight_cache
+from generator import HTMLGenerator
+from profiling import Profile
+from server import RenderOptions, RenderServer
+
+from corpus import CORPORA, build_corpora
+
+
+STAGES = ('parse', 'extract', 'emojize', 'toc', 'inject', 'render')
+
+# Differences below this many seconds are noise, whatever the ratio
+MIN_REGRESSION_DELTA = 0.001
+
+
+def summarize(samples: List[float]) -> Dict[str, Any]:
+    """
+    Reduce timing samples to the values stored in the results
+
+    Args:
+        samples: Seconds per run
+
+    Returns:
+        Dictionary with median, min, max and number of runs
+    """
+    return {
+        'median': round(statistics.median(samples), 6),
+        'min': round(min(samples), 6),
+        'max': round(max(samples), 6),
+        'runs': len(samples),
+    }
+
+
+def time_call(func: Callable[[], Any], runs: int,
+              setup: Optional[Callable[[], Any]] = None) -> List[float]:
+    """
+    Time a callable, after one discarded warm-up run
+
+    Args:
+        func: Work to measure
+        runs: Measured runs
+        setup: Called before every run, outside the measurement
+
+    Returns:
+        Seconds per measured run
+    """
+    samples = []
+    for _ in range(runs + 1):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return samples[1:]
+
+
+def time_span(func: Callable[[], Any], name: str, runs: int) -> List[float]:
+    """
+    Time one profiling span opened inside a callable
+
+    Args:
+        func: Work that opens the span
+        name: Span name (e.g. ``html.template``)
+        runs: Measured runs
+
+    Returns:
+        Seconds spent in the span per measured run
+    """
+    samples = []
+    for _ in range(runs + 1):
+        profile = Profile(name)
+        with profile.activate():
+            func()
+        samples.append(profile.stages()[name]['wall'])
+    return samples[1:]
+
+
+def fake_svg(diagram_id: str) -> str:
+    """Build a placeholder SVG of typical size for the injection benchmark"""
+    paths = "".join(f'<path d="M{i} {i}L{i + 40} {i + 20}" stroke="#333"/>' for i in range(40))
+    return f'<svg id="{diagram_id}-svg" xmlns="http://www.w3.org/2000/svg" viewBox="0 0 800 600">{paths}</svg>'
+
+
+def bench_stages(content: str, stages: List[str], runs: int) -> Dict[str, Dict[str, Any]]:
+    """
+    Run the per-stage micro-benchmarks on one document
+
+    Args:
+        content: Markdown content
+        stages: Stage names from STAGES
+        runs: Measured runs per stage
+
+    Returns:
+        Stage name mapped to its timing summary
+    """
+    parser = MarkdownParser()
+    generator = HTMLGenerator()
+    try:
+        parsed = parser.parse(content)
+        body, _ = parser.parse_metadata(content)
+        emojized = parser.process_emojis(body)
+        svgs = {diagram['id']: fake_svg(diagram['id']) for diagram in parsed['mermaid_diagrams']}
+
+        benchmarks = {
+            'parse': lambda: time_call(lambda: parser.parse(content), runs,
+                                       setup=highlight_cache.clear),
+            'extract': lambda: time_call(lambda: parser.extract_mermaid_diagrams(emojized), runs),
+            'emojize': lambda: time_call(lambda: parser.process_emojis(body), runs),
+            'toc': lambda: time_call(lambda: generator.format_toc_with_page_numbers(
+                parsed['toc'], parsed['toc_tokens']), runs),
+            'inject': lambda: time_call(lambda: generator.inject_mermaid_svgs(parsed['html'], svgs), runs),
+            'render': lambda: time_span(lambda: generator.generate_html(parsed, svgs), 'html.template', runs),
+        }
+        return {stage: summarize(benchmarks[stage]()) for stage in stages}
+    finally:
+        parser.close()
+
+
+async def bench_end_to_end(corpora: Dict[str, str], runs: int) -> Dict[str, Dict[str, Any]]:
+    """
+    Convert each document to PDF through a warm RenderServer
+
+    Diagrams are rendered on every run (no SVG cache). The per-stage
+    breakdown comes from the profiling spans.
+
+    Args:
+        corpora: Corpus name mapped to Markdown content
+        runs: Measured runs per document
+
+    Returns:
+        Corpus name mapped to its timing summary, with the median wall time
+        of each top-level stage under ``stages``
+
+    Raises:
+        RuntimeError: If Chromium cannot be started
+    """
+    server = RenderServer(concurrency=1, queue_limit=0)
+    await server.start()
+    try:
+        if not server.session.started:
+            raise RuntimeError("Chromium não pôde ser iniciado")
+
+        options = RenderOptions()
+        results = {}
+        for name, content in corpora.items():
+            samples, stage_samples = [], {}
+            for run in range(runs + 1):
+                profile = Profile(name)
+                with profile.activate():
+                    await server.render(content, options)
+                if run == 0:
+                    continue
+                samples.append(profile.root.wall)
+                for stage in profile.root.children:
+                    stage_samples.setdefault(stage.name, []).append(stage.wall)
+            summary = summarize(samples)
+            summary['stages'] = {stage: round(statistics.median(values), 6)
+                                 for stage, values in stage_samples.items()}
+            results[name] = summary
+        return results
+    finally:
+        await server.close()
+
+
+def git_revision() -> Optional[str]:
+    """Get the current commit, if the project is a git checkout"""
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=project_root,
+                                capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+            threshold: float) -> List[str]:
+    """
+    Print current medians next to the baseline and find regressions
+
+    Args:
+        results: Current results (``stage/corpus`` mapped to summary)
+        baseline: Saved results in the same format
+        threshold: Allowed slowdown (0.15 = 15%)
+
+    Returns:
+        Keys of the measurements slower than the threshold allows
+    """
+    regressions = []
+    print("-" * 72)
+    print(f"{'medição':<22} {'baseline':>10} {'atual':>10} {'variação':>10}")
+    for key, current in results.items():
+        saved = baseline.get(key)
+        if not saved:
+            print(f"{key:<22} {'-':>10} {current['median'] * 1000:8.2f}ms {'novo':>10}")
+            continue
+        before, after = saved['median'], current['median']
+        change = (after - before) / before if before else 0.0
+        slower = after > before * (1 + threshold) and after - before > MIN_REGRESSION_DELTA
+        if slower:
+            regressions.append(key)
+        mark = "  🐢" if slower else ("  🚀" if change < -threshold else "")
+        print(f"{key:<22} {before * 1000:8.2f}ms {after * 1000:8.2f}ms {change:+9.1%}{mark}")
+    return regressions
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Benchmarks do pipeline por etapa e ponta a ponta')
+    arg_parser.add_argument('--corpus', action='append', choices=list(CORPORA),
+                            help='Corpus a medir (repetível; padrão: todos)')
+    arg_parser.add_argument('--stage', action='append', choices=list(STAGES) + ['e2e'],
+                            help='Etapa a medir (repetível; padrão: todas)')
+    arg_parser.add_argument('--runs', type=int, default=5,
+                            help='Repetições medidas por etapa, após um aquecimento (padrão: 5)')
+    arg_parser.add_argument('--scale', type=float, default=1.0,
+                            help='Multiplica as quantidades de cada corpus (padrão: 1)')
+    arg_parser.add_argument('--seed', type=int, default=0,
+                            help='Semente do texto dos corpora (padrão: 0)')
+    arg_parser.add_argument('--no-browser', action='store_true',
+                            help='Omitir a execução ponta a ponta no Chromium')
+    arg_parser.add_argument('--output', default=None,
+                            help='Arquivo JSON de resultados (padrão: benchmarks/results/latest.json)')
+    arg_parser.add_argument('--baseline', default=None,
+                            help='Resultados salvos para comparação')
+    arg_parser.add_argument('--threshold', type=float, default=0.15,
+                            help='Lentidão tolerada em relação ao baseline (padrão: 0.15 = 15%%)')
+    args = arg_parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    stages = args.stage or list(STAGES) + ['e2e']
+    micro_stages = [stage for stage in STAGES if stage in stages]
+    corpora = build_corpora(args.corpus, args.scale, args.seed)
+
+    print(f"⚡ {len(corpora)} corpus(ora), {args.runs} repetições, escala {args.scale:g}, "
+          f"{os.cpu_count() or 1} CPU(s)")
+    print("-" * 72)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for name, content in corpora.items():
+        for stage, summary in bench_stages(content, micro_stages, args.runs).items():
+            results[f"{stage}/{name}"] = summary
+        timings = "  ".join(f"{stage} {results[f'{stage}/{name}']['median'] * 1000:.1f}ms"
+                            for stage in micro_stages)
+        print(f"📄 {name:<10} {len(content) / 1024:6.0f} KiB  {timings}")
+
+    if 'e2e' in stages and not args.no_browser:
+        try:
+            for name, summary in asyncio.run(bench_end_to_end(corpora, args.runs)).items():
+                results[f"e2e/{name}"] = summary
+                breakdown = "  ".join(f"{stage} {wall:.2f}s" for stage, wall in summary['stages'].items())
+                print(f"🌐 {name:<10} {summary['median']:6.2f}s  ({breakdown})")
+        except Exception as e:
+            print(f"⚠️  Execução ponta a ponta indisponível: {e}")
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'runs': args.runs,
+            'scale': args.scale,
+            'seed': args.seed,
+        },
+        'corpora': {name: {'chars': len(content), **asdict(CORPORA[name].scaled(args.scale))}
+                    for name, content in corpora.items()},
+        'results': results,
+    }
+
+    output = Path(args.output) if args.output else project_root / 'benchmarks' / 'results' / 'latest.json'
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f"💾 Resultados: {output}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding='utf-8'))
+        if baseline.get('meta', {}).get('scale') != args.scale:
+            print(f"⚠️  Baseline medido com escala {baseline.get('meta', {}).get('scale')}, "
+                  f"atual {args.scale:g}: comparação pouco confiável")
+        regressions = compare(results, baseline.get('results', {}), args.threshold)
+        if regressions:
+            print(f"🐢 {len(regressions)} regressão(ões) acima de {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print("✅ Nenhuma regressão")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Gerador de corpora sintéticos para os benchmarks
+
+Cada recurso (títulos, tabelas, blocos de código, emojis, notas de rodapé e
+diagramas Mermaid) escala de forma independente, para medir o custo de cada
+etapa isoladamente. Os documentos são determinísticos: a mesma especificação
+sempre gera o mesmo texto.
+
+Uso:
+    python benchmarks/corpus.py --output-dir /tmp/corpora [--scale 2]
+"""
+
+import argparse
+import random
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+@dataclass(frozen=True)
+class CorpusSpec:
+    """
+    Quantity of each Markdown feature in a synthetic document
+    """
+    sections: int = 20
+    subsections: int = 2
+    paragraphs: int = 2
+    tables: int = 0
+    table_rows: int = 10
+    code_blocks: int = 0
+    emojis: int = 0
+    footnotes: int = 0
+    diagrams: int = 0
+
+    def scaled(self, factor: float) -> 'CorpusSpec':
+        """
+        Multiply every count (not the per-item sizes) by ``factor``
+
+        Args:
+            factor: Scale factor
+
+        Returns:
+            New specification
+        """
+        counts = ('sections', 'tables', 'code_blocks', 'emojis', 'footnotes', 'diagrams')
+        return replace(self, **{name: int(round(getattr(self, name) * factor)) for name in counts})
+
+
+# Corpora measured by default: one per feature plus a mixed document
+CORPORA: Dict[str, CorpusSpec] = {
+    'headings': CorpusSpec(sections=600, subsections=4, paragraphs=1),
+    'tables': CorpusSpec(tables=150, table_rows=20),
+    'code': CorpusSpec(code_blocks=300),
+    'emoji': CorpusSpec(emojis=5000),
+    'footnotes': CorpusSpec(footnotes=800),
+    'mermaid': CorpusSpec(diagrams=30),
+    'mixed': CorpusSpec(sections=200, subsections=2, tables=40, code_blocks=80,
+                        emojis=800, footnotes=120, diagrams=6),
+}
+
+WORDS = (
+    "api cliente servidor documento página seção tabela código diagrama "
+    "configuração requisição resposta cache navegador processo tempo etapa "
+    "formato margem conteúdo índice arquivo lote fila renderização"
+).split()
+
+EMOJI_SHORTCODES = (
+    ':rocket:', ':white_check_mark:', ':warning:', ':memo:', ':sparkles:',
+    ':fire:', ':bug:', ':tada:', ':package:', ':zap:', ':x:', ':bulb:',
+)
+
+CODE_SNIPPETS = {
+    'python': (
+        "def handler_{i}(request, retries: int = 3):\n"
+        "    for attempt in range(retries):\n"
+        "        response = request.send(timeout={i})\n"
+        "        if response.ok:\n"
+        "            return response.json()\n"
+        "    raise RuntimeError('falhou: {i}')\n"
+    ),
+    'javascript': (
+        "export async function load{i}(api) {{\n"
+        "  const response = await api.get(`/items/{i}`);\n"
+        "  return response.ok ? response.json() : null;\n"
+        "}}\n"
+    ),
+    'yaml': (
+        "job_{i}:\n"
+        "  image: python:3.11\n"
+        "  script:\n"
+        "    - make test\n"
+        "  retries: {i}\n"
+    ),
+    'bash': (
+        "for file in docs/*.md; do\n"
+        "  python3 src/main.py \"$file\" --output-dir \"dist/{i}\"\n"
+        "done\n"
+    ),
+}
+
+DIAGRAMS = (
+    "flowchart TD\n    A{i}[Entrada] --> B{i}{{Válido?}}\n"
+    "    B{i} -->|sim| C{i}[Processar]\n    B{i} -->|não| D{i}[Erro]\n",
+    "sequenceDiagram\n    Cliente->>Servidor: POST /render ({i})\n"
+    "    Servidor-->>Cliente: 200 application/pdf\n",
+    "pie title Etapas {i}\n    \"parse\" : 40\n    \"html\" : 20\n    \"pdf\" : 40\n",
+)
+
+
+def _spread(total: int, buckets: int) -> List[int]:
+    """Split ``total`` items as evenly as possible over ``buckets``"""
+    if buckets <= 0:
+        return []
+    base, extra = divmod(total, buckets)
+    return [base + (1 if i < extra else 0) for i in range(buckets)]
+
+
+def _sentence(rng: random.Random, words: int = 12) -> str:
+    """Generate a sentence of filler words"""
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+def generate_corpus(spec: CorpusSpec, seed: int = 0) -> str:
+    """
+    Generate a Markdown document following a specification
+
+    Tables, code blocks, emojis, footnote references and diagrams are spread
+    evenly over the level-2 sections.
+
+    Args:
+        spec: Feature counts
+        seed: Seed of the filler text
+
+    Returns:
+        Markdown content
+    """
+    rng = random.Random(seed)
+    sections = max(1, spec.sections)
+    tables = _spread(spec.tables, sections)
+    code_blocks = _spread(spec.code_blocks, sections)
+    emojis = _spread(spec.emojis, sections)
+    footnotes = _spread(spec.footnotes, sections)
+    diagrams = _spread(spec.diagrams, sections)
+    languages = list(CODE_SNIPPETS)
+
+    parts = ["---\ntitle: Corpus sintético\nauthor: Benchmarks\n---\n",
+             "# Documento de Benchmark\n"]
+    counters = {'table': 0, 'code': 0, 'emoji': 0, 'footnote': 0, 'diagram': 0}
+
+    for s in range(sections):
+        parts.append(f"## Seção {s}: {rng.choice(WORDS)} {rng.choice(WORDS)}\n")
+
+        for p in range(spec.paragraphs):
+            words = [_sentence(rng)]
+            if p == 0:
+                for _ in range(emojis[s]):
+                    words.append(EMOJI_SHORTCODES[counters['emoji'] % len(EMOJI_SHORTCODES)])
+                    counters['emoji'] += 1
+                for _ in range(footnotes[s]):
+                    words.append(f"Ver nota[^n{counters['footnote']}].")
+                    counters['footnote'] += 1
+            parts.append(" ".join(words) + "\n")
+
+        for _ in range(tables[s]):
+            t = counters['table']
+            rows = "".join(f"| {t}.{r} | `{rng.choice(WORDS)}` | {_sentence(rng, 5)} | {r * t} |\n"
+                           for r in range(spec.table_rows))
+            parts.append(f"| Item | Chave | Descrição | Valor |\n|---|---|---|---:|\n{rows}")
+            counters['table'] += 1
+
+        for _ in range(code_blocks[s]):
+            c = counters['code']
+            language = languages[c % len(languages)]
+            parts.append(f"```{language}\n{CODE_SNIPPETS[language].format(i=c)}```\n")
+            counters['code'] += 1
+
+        for _ in range(diagrams[s]):
+            d = counters['diagram']
+            parts.append(f"```mermaid\n{DIAGRAMS[d % len(DIAGRAMS)].format(i=d)}```\n")
+            counters['diagram'] += 1
+
+        for sub in range(spec.subsections):
+            parts.append(f"### {s}.{sub} {rng.choice(WORDS).capitalize()}\n\n{_sentence(rng, 20)}\n")
+
+    parts.extend(f"[^n{n}]: Nota de rodapé {n}: {_sentence(rng, 6)}" for n in range(spec.footnotes))
+    return "\n".join(parts) + "\n"
+
+
+def build_corpora(names: Optional[List[str]] = None, scale: float = 1.0, seed: int = 0) -> Dict[str, str]:
+    """
+    Generate the named corpora
+
+    Args:
+        names: Corpus names from CORPORA (default: all)
+        scale: Scale factor applied to every count
+        seed: Seed of the filler text
+
+    Returns:
+        Corpus name mapped to Markdown content
+    """
+    names = names or list(CORPORA)
+    unknown = [name for name in names if name not in CORPORA]
+    if unknown:
+        raise ValueError(f"Unknown corpus: {', '.join(unknown)} (available: {', '.join(CORPORA)})")
+    return {name: generate_corpus(CORPORA[name].scaled(scale), seed) for name in names}
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Gera os corpora sintéticos dos benchmarks')
+    arg_parser.add_argument('--output-dir', required=True,
+                            help='Diretório onde gravar <corpus>.md')
+    arg_parser.add_argument('--corpus', action='append',
+                            help=f"Corpus a gerar (repetível; padrão: todos: {', '.join(CORPORA)})")
+    arg_parser.add_argument('--scale', type=float, default=1.0,
+                            help='Multiplica as quantidades de cada recurso (padrão: 1)')
+    arg_parser.add_argument('--seed', type=int, default=0,
+                            help='Semente do texto (padrão: 0)')
+    args = arg_parser.parse_args()
+
+    try:
+        corpora = build_corpora(args.corpus, args.scale, args.seed)
+    except ValueError as e:
+        arg_parser.error(str(e))
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for name, content in corpora.items():
+        path = output_dir / f"{name}.md"
+        path.write_text(content, encoding='utf-8')
+        spec = asdict(CORPORA[name].scaled(args.scale))
+        print(f"📝 {path}: {len(content) / 1024:.0f} KiB {spec}")
+
+
+if __name__ == "__main__":
+    main()
@@ -64,6 +64,7 @@ async def test_mermaid_timeout():
             complex_diagram['id'], 
             complex_diagram['content']
         )
+        await processor.close()
         
         if result:
             print("   ✅ Diagrama renderizado com sucesso!")
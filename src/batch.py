@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Batch conversion of many Markdown files with shared browsers
+"""
+
+import asyncio
+import glob
+import os
+import time
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Awaitable, Callable, List, Optional, Sequence
+
+from parser import MarkdownParser
+from browser import AssetBundle, RenderSession
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# Extensions read as manifests (one input path or glob per line)
+MANIFEST_SUFFIXES = ('.txt', '.lst', '.list')
+GLOB_CHARS = ('*', '?', '[')
+
+
+@dataclass
+class BatchItem:
+    """
+    One file of a batch run and its outcome
+    """
+    input_file: str
+    output_file: str
+    success: bool = False
+    duration: float = 0.0
+    error: Optional[str] = None
+
+
+def _expand_source(source: str, base_dir: Optional[Path] = None) -> List[Path]:
+    """
+    Expand one source into markdown files
+
+    Args:
+        source: Directory, glob pattern, manifest file or markdown file
+        base_dir: Directory relative sources resolve against
+
+    Returns:
+        Markdown files found for the source
+    """
+    path = Path(source)
+    if base_dir is not None and not path.is_absolute():
+        path = base_dir / path
+
+    if any(char in source for char in GLOB_CHARS):
+        return sorted(Path(match) for match in glob.glob(str(path), recursive=True)
+                      if match.lower().endswith('.md'))
+
+    if path.is_dir():
+        return sorted(p for p in path.rglob('*.md') if p.is_file())
+
+    if path.suffix.lower() in MANIFEST_SUFFIXES and path.is_file():
+        files = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                entry = line.strip()
+                if entry and not entry.startswith('#'):
+                    files.extend(_expand_source(entry, path.parent))
+        return files
+
+    return [path]
+
+
+def collect_inputs(sources: Sequence[str]) -> List[Path]:
+    """
+    Resolve batch sources into a de-duplicated list of markdown files
+
+    Args:
+        sources: Directories, glob patterns, manifest files or markdown files
+
+    Returns:
+        Markdown files in source order
+    """
+    files = []
+    seen = set()
+    for source in sources:
+        matches = _expand_source(source)
+        if not matches:
+            logger.warning(f"No markdown files matched: {source}")
+        for path in matches:
+            key = path.resolve()
+            if key not in seen:
+                seen.add(key)
+                files.append(path)
+    return files
+
+
+def plan_outputs(inputs: Sequence[Path], output_dir: Optional[str] = None,
+                 suffix: str = '.pdf') -> List[str]:
+    """
+    Compute an output path for every input file
+
+    Without ``output_dir`` each output sits next to its input. With it, the
+    directory layout below the inputs' common parent is mirrored.
+
+    Args:
+        inputs: Markdown files
+        output_dir: Optional directory that receives every output
+        suffix: Output extension
+
+    Returns:
+        Output paths, in input order
+    """
+    if not output_dir:
+        return [str(path.with_suffix(suffix)) for path in inputs]
+
+    resolved = [path.resolve() for path in inputs]
+    root = Path(os.path.commonpath([str(p.parent) for p in resolved])) if resolved else None
+    return [
+        str(Path(output_dir) / path.relative_to(root).with_suffix(suffix))
+        for path in resolved
+    ]
+
+
+async def run_batch(inputs: Sequence[Path], args,
+                    convert: Callable[..., Awaitable[bool]],
+                    make_parser: Callable[[], MarkdownParser] = MarkdownParser,
+                    jobs: int = 4,
+                    output_dir: Optional[str] = None) -> List[BatchItem]:
+    """
+    Convert many files with a bounded pool of workers
+
+    Workers share one render session, so Chromium is launched once for the
+    whole batch and at most ``jobs`` pages are in use at a time. Each worker
+    keeps its own MarkdownParser and parses off the event loop, which lets
+    parsing overlap with Mermaid rendering and printing of other files.
+
+    Args:
+        inputs: Markdown files to convert
+        args: Command line arguments (same options as a single conversion)
+        convert: Single-file conversion coroutine (main.convert_document)
+        make_parser: Factory for the per-worker MarkdownParser
+        jobs: Number of files converted concurrently
+        output_dir: Optional directory that receives every output
+
+    Returns:
+        One BatchItem per input, in input order
+    """
+    jobs = max(1, jobs)
+    suffix = '.html' if args.html else '.pdf'
+    items = [
+        BatchItem(input_file=str(path), output_file=output)
+        for path, output in zip(inputs, plan_outputs(inputs, output_dir, suffix))
+    ]
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for item in items:
+        queue.put_nowait(item)
+
+    async def worker(session: RenderSession):
+        parser = make_parser()
+        while True:
+            try:
+                item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                parser.close()
+                return
+
+            started = time.perf_counter()
+            try:
+                Path(item.output_file).parent.mkdir(parents=True, exist_ok=True)
+                item.success = await convert(
+                    item.input_file, item.output_file, args, session, parser=parser
+                )
+                if not item.success:
+                    item.error = "conversion failed"
+            except Exception as e:
+                item.error = str(e)
+            item.duration = time.perf_counter() - started
+
+    assets = AssetBundle(offline=not args.allow_network)
+    browsers = max(1, jobs // 4)
+    async with RenderSession(assets=assets, max_pages=jobs, browsers=browsers) as session:
+        await asyncio.gather(*(worker(session) for _ in range(min(jobs, len(items)))))
+
+    return items
+
+
+def print_summary(items: Sequence[BatchItem], elapsed: float):
+    """
+    Print per-file status and aggregate throughput
+
+    Args:
+        items: Batch results
+        elapsed: Wall-clock duration of the whole batch in seconds
+    """
+    succeeded = sum(1 for item in items if item.success)
+    failed = len(items) - succeeded
+
+    print("-" * 50)
+    for item in items:
+        if item.success:
+            print(f"✅ {item.input_file} → {item.output_file} ({item.duration:.2f}s)")
+        else:
+            print(f"❌ {item.input_file} ({item.duration:.2f}s): {item.error}")
+    print("-" * 50)
+
+    throughput = len(items) / elapsed if elapsed > 0 else 0.0
+    print(f"📦 Arquivos: {len(items)} | ✅ Sucesso: {succeeded} | ❌ Falhas: {failed}")
+    print(f"⏱️  Tempo total: {elapsed:.2f}s | 🚀 Vazão: {throughput:.2f} arquivos/s")
+    if items:
+        average = sum(item.duration for item in items) / len(items)
+        print(f"📊 Tempo médio por arquivo: {average:.2f}s")
@@ -0,0 +1,11 @@
+#!/usr/bin/env python3
+"""
+Browser module for Markdown PDF Generator
+"""
+
+from .assets import AssetBundle
+from .browser_pool import BrowserPool
+from .page_loader import serve_html
+from .render_session import RenderSession
+
+__all__ = ["AssetBundle", "BrowserPool", "RenderSession", "serve_html"]
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Offline asset bundle served to Playwright pages through request routing
+"""
+
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+from urllib.parse import unquote
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# Mermaid release used by the render page and the print template
+MERMAID_VERSION = '10.6.1'
+MERMAID_URL = f"https://cdn.jsdelivr.net/npm/mermaid@{MERMAID_VERSION}/dist/mermaid.min.js"
+
+# Google Fonts stylesheet referenced by the print template
+FONTS_CSS_URL = (
+    "https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700"
+    "&family=JetBrains+Mono:wght@300;400;500&display=swap"
+)
+
+# Font files referenced by the vendored fonts.css
+FONT_FILES_URL = "https://fonts.gstatic.com/mdpdf/"
+
+VENDOR_DIR = Path(__file__).parent.parent / "templates" / "vendor"
+
+# Schemes that never leave the machine
+LOCAL_SCHEMES = ('file:', 'data:', 'about:', 'blob:')
+
+CONTENT_TYPES = {
+    '.js': 'application/javascript; charset=utf-8',
+    '.css': 'text/css; charset=utf-8',
+    '.woff2': 'font/woff2',
+}
+
+
+class AssetBundle:
+    """
+    In-memory bundle of vendored mermaid.js and web fonts.
+
+    Installed on a browser context, it answers requests for the known CDN
+    URLs from memory and, in offline mode, aborts every other external
+    request. Run ``make assets`` to populate ``src/templates/vendor``.
+    """
+
+    def __init__(self, vendor_dir: Optional[Union[str, Path]] = None, offline: bool = True):
+        """
+        Initialize asset bundle
+
+        Args:
+            vendor_dir: Directory with vendored assets
+            offline: Abort external requests that are not in the bundle
+        """
+        self.vendor_dir = Path(vendor_dir) if vendor_dir else VENDOR_DIR
+        self.offline = offline
+        self.missing: List[str] = []
+        self._assets: Dict[str, Tuple[bytes, str]] = {}
+        self._load()
+
+    def _manifest(self) -> Dict[str, Path]:
+        """Map each served URL to its vendored file"""
+        manifest = {
+            MERMAID_URL: self.vendor_dir / "mermaid.min.js",
+            FONTS_CSS_URL: self.vendor_dir / "fonts.css",
+        }
+        fonts_css = self.vendor_dir / "fonts.css"
+        if fonts_css.exists():
+            for line in fonts_css.read_text(encoding='utf-8').splitlines():
+                if FONT_FILES_URL in line:
+                    name = line.split(FONT_FILES_URL, 1)[1].split(')', 1)[0]
+                    manifest[FONT_FILES_URL + name] = self.vendor_dir / "fonts" / name
+        return manifest
+
+    def _load(self):
+        """Read every vendored file into memory"""
+        for url, path in self._manifest().items():
+            try:
+                body = path.read_bytes()
+            except OSError:
+                self.missing.append(url)
+                continue
+            content_type = CONTENT_TYPES.get(path.suffix, 'application/octet-stream')
+            # Chromium may percent-encode query characters such as ';' and '@'
+            self._assets[unquote(url)] = (body, content_type)
+
+        if self.missing:
+            logger.warning(
+                f"{len(self.missing)} vendored asset(s) missing from {self.vendor_dir}; "
+                f"run 'make assets' for fully offline rendering"
+            )
+
+    @property
+    def complete(self) -> bool:
+        """Whether every asset is available locally"""
+        return not self.missing
+
+    def is_allowed(self, url: str) -> bool:
+        """
+        Check if a request may go to the network
+
+        Args:
+            url: Request URL
+
+        Returns:
+            True if the request should be continued
+        """
+        if url.startswith(LOCAL_SCHEMES):
+            return True
+        if not self.offline:
+            return True
+        # Assets not vendored yet fall back to their CDN so rendering still works
+        return unquote(url) in (unquote(missing) for missing in self.missing)
+
+    async def handle_route(self, route):
+        """
+        Playwright route handler: serve, continue or abort a request
+
+        Args:
+            route: Playwright Route object
+        """
+        url = route.request.url
+        asset = self._assets.get(unquote(url))
+        if asset is not None:
+            body, content_type = asset
+            await route.fulfill(
+                status=200,
+                body=body,
+                headers={
+                    'Content-Type': content_type,
+                    'Access-Control-Allow-Origin': '*',
+                    'Cache-Control': 'max-age=31536000',
+                }
+            )
+        elif self.is_allowed(url):
+            await route.continue_()
+        else:
+            logger.debug(f"Blocked external request: {url}")
+            await route.abort('blockedbyclient')
+
+    async def install(self, context):
+        """
+        Route every request of a browser context through the bundle
+
+        Args:
+            context: Playwright BrowserContext
+        """
+        await context.route('**/*', self.handle_route)
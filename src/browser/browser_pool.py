@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Long-lived Chromium browser pool with reusable pages
+"""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, List, Optional
+
+from profiling import span
+
+from .assets import AssetBundle
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_LAUNCH_ARGS = ['--no-sandbox', '--disable-setuid-sandbox']
+
+
+@dataclass
+class PooledPage:
+    """
+    A page handed out by the pool, with its owning context and usage count
+    """
+    page: object
+    context: object
+    browser: object
+    uses: int = 0
+
+
+class BrowserPool:
+    """
+    Keep a few Chromium browsers alive and lend out reusable pages.
+
+    Pages are created lazily (one browser context per page), returned to an
+    idle list after use and recycled after ``max_uses_per_page`` renders.
+    The number of pages in flight is capped by ``max_pages``.
+    """
+
+    def __init__(self,
+                 browsers: int = 1,
+                 max_pages: int = 4,
+                 max_uses_per_page: int = 50,
+                 headless: bool = True,
+                 launch_args: Optional[List[str]] = None,
+                 assets: Optional[AssetBundle] = None):
+        """
+        Initialize browser pool
+
+        Args:
+            browsers: Number of Chromium processes to launch
+            max_pages: Maximum number of pages in use at the same time
+            max_uses_per_page: Renders after which a page is closed and replaced
+            headless: Run browsers in headless mode
+            launch_args: Extra Chromium command line arguments
+            assets: Asset bundle routed into every browser context
+        """
+        self.browsers_count = max(1, browsers)
+        self.max_pages = max(1, max_pages)
+        self.max_uses_per_page = max(1, max_uses_per_page)
+        self.headless = headless
+        self.launch_args = launch_args if launch_args is not None else list(DEFAULT_LAUNCH_ARGS)
+        self.assets = assets
+
+        self._playwright_manager = None
+        self._playwright = None
+        self._browsers: List[object] = []
+        self._idle: List[PooledPage] = []
+        self._next_browser = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._closed = False
+
+        # Pool statistics
+        self.stats = {
+            'browsers_launched': 0,
+            'pages_created': 0,
+            'pages_recycled': 0,
+            'renders': 0,
+        }
+
+    @property
+    def started(self) -> bool:
+        """Whether the browsers have been launched"""
+        return bool(self._browsers)
+
+    async def __aenter__(self) -> 'BrowserPool':
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _ensure_primitives(self):
+        """Create asyncio primitives inside the running event loop"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_pages)
+            self._start_lock = asyncio.Lock()
+
+    async def start(self):
+        """
+        Launch Playwright and the configured number of browsers
+        """
+        self._ensure_primitives()
+        async with self._start_lock:
+            if self._browsers:
+                return
+            if self._closed:
+                raise RuntimeError("BrowserPool is closed")
+
+            logger.info(f"Launching browser pool ({self.browsers_count} browser(s), "
+                        f"{self.max_pages} page(s) max)")
+            with span('browser.launch', browsers=self.browsers_count):
+                # Imported here so HTML-only runs never load Playwright
+                from playwright.async_api import async_playwright
+                self._playwright_manager = async_playwright()
+                try:
+                    self._playwright = await self._playwright_manager.start()
+                    for _ in range(self.browsers_count):
+                        browser = await self._playwright.chromium.launch(
+                            headless=self.headless,
+                            args=self.launch_args
+                        )
+                        self._browsers.append(browser)
+                        self.stats['browsers_launched'] += 1
+                except BaseException:
+                    # Leave nothing running, so the next start() begins afresh
+                    await self._stop_browsers()
+                    raise
+
+    async def _stop_browsers(self):
+        """Close the launched browsers and stop the Playwright driver"""
+        browsers, self._browsers = self._browsers, []
+        for browser in browsers:
+            try:
+                await browser.close()
+            except Exception as e:
+                logger.debug(f"Error closing browser: {e}")
+
+        if self._playwright_manager is not None:
+            try:
+                await self._playwright_manager.__aexit__(None, None, None)
+            except Exception as e:
+                logger.debug(f"Error stopping Playwright: {e}")
+            self._playwright_manager = None
+            self._playwright = None
+
+    async def close(self):
+        """
+        Close all pages, browsers and the Playwright driver
+        """
+        self._closed = True
+        idle, self._idle = self._idle, []
+        for pooled in idle:
+            await self._discard(pooled, recycled=False)
+
+        await self._stop_browsers()
+
+    def _pick_browser(self):
+        """Pick the next connected browser (round robin)"""
+        connected = [b for b in self._browsers if b.is_connected()]
+        if not connected:
+            raise RuntimeError("No connected browser available in pool")
+        browser = connected[self._next_browser % len(connected)]
+        self._next_browser += 1
+        return browser
+
+    async def _new_page(self) -> PooledPage:
+        """Create a fresh page in its own browser context"""
+        with span('browser.new_page'):
+            browser = self._pick_browser()
+            context = await browser.new_context()
+            if self.assets is not None:
+                await self.assets.install(context)
+            page = await context.new_page()
+        self.stats['pages_created'] += 1
+        return PooledPage(page=page, context=context, browser=browser)
+
+    async def _discard(self, pooled: PooledPage, recycled: bool = True):
+        """Close a page together with its context"""
+        if recycled:
+            self.stats['pages_recycled'] += 1
+        try:
+            await pooled.context.close()
+        except Exception as e:
+            logger.debug(f"Error closing browser context: {e}")
+
+    def _is_reusable(self, pooled: PooledPage) -> bool:
+        """Check if a returned page can go back to the idle list"""
+        return (
+            not self._closed
+            and pooled.uses < self.max_uses_per_page
+            and pooled.browser.is_connected()
+            and not pooled.page.is_closed()
+        )
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[object]:
+        """
+        Borrow a page from the pool
+
+        The page is returned to the pool when the block exits. Pages whose
+        block raised an exception are discarded instead of reused.
+
+        Yields:
+            Playwright page object
+        """
+        self._ensure_primitives()
+        async with self._semaphore:
+            await self.start()
+
+            pooled = None
+            while self._idle:
+                candidate = self._idle.pop()
+                if self._is_reusable(candidate):
+                    pooled = candidate
+                    break
+                await self._discard(candidate)
+            if pooled is None:
+                pooled = await self._new_page()
+
+            healthy = False
+            try:
+                yield pooled.page
+                healthy = True
+            finally:
+                pooled.uses += 1
+                self.stats['renders'] += 1
+                if healthy and self._is_reusable(pooled):
+                    self._idle.append(pooled)
+                else:
+                    await self._discard(pooled)
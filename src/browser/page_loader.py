@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Serve HTML strings to Playwright pages from memory
+"""
+
+import os
+import logging
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Optional, Union
+from urllib.parse import quote, unquote, urlsplit
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# Virtual origin for in-memory documents; never resolved through DNS
+LOCAL_ORIGIN = "http://mdpdf.invalid"
+DOCUMENT_NAME = "__document__.html"
+
+# Which local files a document may load:
+#   'any'       every readable file, like a file:// page (CLI conversions)
+#   'base_dir'  only files inside base_dir
+#   'none'      no local files (untrusted documents, e.g. the render server)
+FILE_ACCESS_MODES = ('any', 'base_dir', 'none')
+
+
+def _is_within(path: Path, base_path: Path) -> bool:
+    """Check that a resolved path lies inside base_path"""
+    try:
+        path.relative_to(base_path)
+        return True
+    except ValueError:
+        return False
+
+
+@asynccontextmanager
+async def serve_html(page, html_content: str,
+                     base_dir: Optional[Union[str, Path]] = None,
+                     file_access: str = 'any') -> AsyncIterator[str]:
+    """
+    Route an HTML string to a page under a virtual URL
+
+    The document is answered from memory, so nothing is written to disk.
+    Its URL mirrors ``base_dir``, which makes relative links such as
+    ``images/logo.png`` resolve to files served from that directory, while
+    absolute paths and ``../`` links keep working as they did with file://
+    URLs. ``file_access`` narrows that down for untrusted documents; refused
+    and missing files get a 404 and a warning.
+
+    Args:
+        page: Playwright page object
+        html_content: Complete HTML document
+        base_dir: Directory relative URLs resolve against (default: cwd)
+        file_access: Local files the page may load (see FILE_ACCESS_MODES)
+
+    Yields:
+        URL to pass to page.goto()
+    """
+    if file_access not in FILE_ACCESS_MODES:
+        raise ValueError(f"Invalid file_access {file_access!r}, expected one of {FILE_ACCESS_MODES}")
+
+    base_path = Path(base_dir or os.getcwd()).resolve()
+    base_url = LOCAL_ORIGIN + quote('/' + base_path.as_posix().strip('/') + '/')
+    document_url = base_url + DOCUMENT_NAME
+    body = html_content.encode('utf-8')
+
+    async def handle(route):
+        url = route.request.url.split('#', 1)[0]
+        if url == document_url:
+            await route.fulfill(
+                status=200,
+                body=body,
+                headers={'Content-Type': 'text/html; charset=utf-8'}
+            )
+            return
+
+        local_path = Path(unquote(urlsplit(url).path)).resolve()
+        if file_access == 'none':
+            logger.warning(f"Refused local resource (local files disabled): {local_path}")
+        elif file_access == 'base_dir' and not _is_within(local_path, base_path):
+            logger.warning(f"Refused local resource outside {base_path}: {local_path}")
+        elif local_path.is_file():
+            await route.fulfill(path=str(local_path))
+            return
+        else:
+            logger.warning(f"Local resource not found: {local_path}")
+        await route.fulfill(status=404, body='')
+
+    pattern = LOCAL_ORIGIN + "/**"
+    await page.route(pattern, handle)
+    try:
+        yield document_url
+    finally:
+        await page.unroute(pattern, handle)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Render session shared by Mermaid rendering and PDF printing
+"""
+
+import logging
+from typing import Optional
+
+from .assets import AssetBundle
+from .browser_pool import BrowserPool
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class RenderSession:
+    """
+    Own one Playwright instance and browser for a whole conversion.
+
+    Every stage borrows pages through ``session.page()``; the browser is
+    launched on the first borrow, so conversions that never need a page
+    (HTML-only output, fully cached diagrams) never start Chromium.
+    """
+
+    def __init__(self,
+                 assets: Optional[AssetBundle] = None,
+                 max_pages: int = 4,
+                 browsers: int = 1,
+                 max_uses_per_page: int = 50):
+        """
+        Initialize render session
+
+        Args:
+            assets: Offline asset bundle (default bundle if omitted)
+            max_pages: Maximum number of pages in use at the same time
+            browsers: Number of Chromium processes
+            max_uses_per_page: Renders after which a page is replaced
+        """
+        self.assets = assets if assets is not None else AssetBundle()
+        self.pool = BrowserPool(
+            browsers=browsers,
+            max_pages=max_pages,
+            max_uses_per_page=max_uses_per_page,
+            assets=self.assets
+        )
+
+    @property
+    def started(self) -> bool:
+        """Whether a browser has been launched"""
+        return self.pool.started
+
+    @property
+    def stats(self) -> dict:
+        """Browser pool statistics"""
+        return self.pool.stats
+
+    def page(self):
+        """
+        Borrow a page for the duration of an ``async with`` block
+
+        Returns:
+            Async context manager yielding a Playwright page
+        """
+        return self.pool.page()
+
+    async def close(self):
+        """
+        Close the browser and the Playwright driver
+        """
+        if self.pool.started:
+            logger.debug(f"Closing render session: {self.pool.stats}")
+        await self.pool.close()
+
+    async def __aenter__(self) -> 'RenderSession':
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
@@ -0,0 +1,10 @@
+#!/usr/bin/env python3
+"""
+Cache module for Markdown PDF Generator
+"""
+
+from .disk_cache import DiskCache, default_cache_dir
+from .parse_cache import ParseCache
+from .svg_cache import SVGCache
+
+__all__ = ["DiskCache", "ParseCache", "SVGCache", "default_cache_dir"]
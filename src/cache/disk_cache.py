@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Content-addressed on-disk cache with a size budget and LRU eviction
+"""
+
+import hashlib
+import os
+import tempfile
+import logging
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def default_cache_dir() -> Path:
+    """
+    Get the base cache directory
+
+    Honours ``MDPDF_CACHE_DIR`` and ``XDG_CACHE_HOME``, falling back to
+    ``~/.cache/markdown-pdf-generator``.
+
+    Returns:
+        Path to the base cache directory
+    """
+    override = os.environ.get('MDPDF_CACHE_DIR')
+    if override:
+        return Path(override).expanduser()
+    xdg_cache = os.environ.get('XDG_CACHE_HOME')
+    base = Path(xdg_cache).expanduser() if xdg_cache else Path.home() / '.cache'
+    return base / 'markdown-pdf-generator'
+
+
+class DiskCache:
+    """
+    Store blobs on disk under the SHA-256 of their key parts.
+
+    Entries live in ``<cache_dir>/<key[:2]>/<key><suffix>``. Reads refresh the
+    file mtime, so eviction (oldest mtime first) behaves as an LRU once the
+    total size exceeds ``max_bytes``.
+    """
+
+    def __init__(self, cache_dir: Union[str, Path], max_bytes: int = 200 * 1024 * 1024,
+                 suffix: str = '.bin'):
+        """
+        Initialize disk cache
+
+        Args:
+            cache_dir: Directory where entries are stored
+            max_bytes: Size budget for all entries
+            suffix: File suffix for entries
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._total_bytes: Optional[int] = None
+
+    @staticmethod
+    def make_key(*parts: Union[str, bytes]) -> str:
+        """
+        Build a content-addressed key from several parts
+
+        Args:
+            parts: Strings or bytes that identify the entry
+
+        Returns:
+            Hex SHA-256 digest
+        """
+        digest = hashlib.sha256()
+        for part in parts:
+            data = part if isinstance(part, bytes) else str(part).encode('utf-8')
+            # Length prefix keeps ("ab", "c") and ("a", "bc") apart
+            digest.update(str(len(data)).encode('ascii') + b':')
+            digest.update(data)
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}{self.suffix}"
+
+    def _entries(self):
+        if not self.cache_dir.exists():
+            return []
+        return [p for p in self.cache_dir.glob(f"*/*{self.suffix}") if p.is_file()]
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        """
+        Read an entry and mark it as recently used
+
+        Args:
+            key: Entry key
+
+        Returns:
+            Stored bytes or None on a miss
+        """
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            self.misses += 1
+            return None
+
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        self.hits += 1
+        return data
+
+    def set_bytes(self, key: str, data: bytes):
+        """
+        Write an entry atomically and enforce the size budget
+
+        Args:
+            key: Entry key
+            data: Bytes to store
+        """
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            previous_size = path.stat().st_size if path.exists() else 0
+            fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except Exception:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            logger.warning(f"Could not write cache entry {key[:12]}: {e}")
+            return
+
+        if self._total_bytes is None:
+            self._total_bytes = sum(p.stat().st_size for p in self._entries())
+        else:
+            self._total_bytes += len(data) - previous_size
+
+        if self._total_bytes > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        """
+        Remove least recently used entries until the size budget is met
+        """
+        entries = []
+        for path in self._entries():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                total -= size
+                self.evictions += 1
+            except OSError:
+                continue
+
+        self._total_bytes = total
+
+    def clear(self):
+        """
+        Remove every entry from the cache
+        """
+        removed = 0
+        for path in self._entries():
+            try:
+                path.unlink()
+                removed += 1
+            except OSError:
+                continue
+        self._total_bytes = 0
+        logger.info(f"Cleared {removed} entries from {self.cache_dir}")
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get hit/miss counters
+
+        Returns:
+            Dictionary with cache statistics
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Persistent cache for Markdown parse results
+"""
+
+import json
+import pickle
+import logging
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .disk_cache import DiskCache, default_cache_dir
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# Bump when MarkdownParser.parse changes the shape or content of its result
+PARSE_FORMAT_VERSION = '3'
+
+
+@lru_cache(maxsize=1)
+def library_versions() -> Tuple[str, str, str]:
+    """
+    Get the versions of the libraries that shape parse results
+
+    The libraries are imported here rather than at module level, so using
+    the cache package does not load them before the parse stage runs.
+
+    Returns:
+        Markdown, Pygments and emoji versions
+    """
+    import emoji
+    import markdown
+    import pygments
+
+    return markdown.__version__, pygments.__version__, emoji.__version__
+
+
+class ParseCache(DiskCache):
+    """
+    Cache full MarkdownParser.parse() results keyed by the document content
+    and everything that affects the conversion: conversion mode, extension
+    list, extension configs and the Markdown, Pygments and emoji versions
+    """
+
+    def __init__(self, cache_dir: Optional[Union[str, Path]] = None,
+                 max_bytes: int = 100 * 1024 * 1024):
+        """
+        Initialize parse cache
+
+        Args:
+            cache_dir: Cache directory (default: <cache>/parse)
+            max_bytes: Size budget for cached results
+        """
+        super().__init__(cache_dir or default_cache_dir() / 'parse', max_bytes, suffix='.pkl')
+
+    def document_key(self, content: str, extensions: List[Any],
+                     extension_configs: Dict[str, Any],
+                     incremental: bool = False) -> str:
+        """
+        Build the cache key for a document
+
+        Args:
+            content: Raw markdown content
+            extensions: Markdown extensions in load order
+            extension_configs: Configuration for each extension
+            incremental: Whether the document is converted section by section,
+                which can give slightly different HTML than a whole-document run
+
+        Returns:
+            Cache key
+        """
+        kind = 'document-incremental' if incremental else 'document'
+        return self._key(kind, content, extensions, extension_configs)
+
+    def section_key(self, text: str, extensions: List[Any],
+                    extension_configs: Dict[str, Any]) -> str:
+        """
+        Build the cache key for one section of an incremental conversion
+
+        Args:
+            text: Section source with its definitions appended
+            extensions: Markdown extensions in load order
+            extension_configs: Configuration for each extension
+
+        Returns:
+            Cache key
+        """
+        return self._key('section', text, extensions, extension_configs)
+
+    def _key(self, kind: str, content: str, extensions: List[Any],
+             extension_configs: Dict[str, Any]) -> str:
+        return self.make_key(
+            kind,
+            content,
+            PARSE_FORMAT_VERSION,
+            *library_versions(),
+            json.dumps([str(ext) for ext in extensions]),
+            json.dumps(extension_configs, sort_keys=True, default=repr),
+        )
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Get a cached parse result
+
+        Args:
+            key: Key from document_key() or section_key()
+
+        Returns:
+            Cached dictionary or None on a miss
+        """
+        data = self.get_bytes(key)
+        if data is None:
+            return None
+        try:
+            return pickle.loads(data)
+        except Exception as e:
+            logger.warning(f"Discarding unreadable parse cache entry {key[:12]}: {e}")
+            self.hits -= 1
+            self.misses += 1
+            return None
+
+    def set(self, key: str, result: Dict):
+        """
+        Store a parse result
+
+        Args:
+            key: Key from document_key() or section_key()
+            result: Dictionary returned by MarkdownParser.parse() (or one
+                converted section)
+        """
+        try:
+            data = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            logger.warning(f"Could not serialize parse result: {e}")
+            return
+        self.set_bytes(key, data)
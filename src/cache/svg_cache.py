@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Persistent cache for rendered Mermaid SVGs
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from .disk_cache import DiskCache, default_cache_dir
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class SVGCache(DiskCache):
+    """
+    Cache rendered Mermaid SVGs keyed by everything that affects the output:
+    diagram source, Mermaid version, Mermaid configuration and viewport
+    """
+
+    def __init__(self, cache_dir: Optional[Union[str, Path]] = None,
+                 max_bytes: int = 200 * 1024 * 1024):
+        """
+        Initialize SVG cache
+
+        Args:
+            cache_dir: Cache directory (default: <cache>/mermaid)
+            max_bytes: Size budget for cached SVGs
+        """
+        super().__init__(cache_dir or default_cache_dir() / 'mermaid', max_bytes, suffix='.svg')
+
+    def diagram_key(self, source: str, mermaid_version: str,
+                    mermaid_config: Dict[str, Any], viewport: Dict[str, int]) -> str:
+        """
+        Build the cache key for a diagram
+
+        Args:
+            source: Mermaid diagram source
+            mermaid_version: Mermaid library version
+            mermaid_config: Configuration passed to mermaid.initialize
+            viewport: Viewport used for rendering
+
+        Returns:
+            Cache key
+        """
+        return self.make_key(
+            source,
+            mermaid_version,
+            json.dumps(mermaid_config, sort_keys=True),
+            json.dumps(viewport, sort_keys=True),
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Get a cached SVG
+
+        Args:
+            key: Key from diagram_key()
+
+        Returns:
+            SVG markup or None on a miss
+        """
+        data = self.get_bytes(key)
+        if data is None:
+            return None
+        try:
+            return data.decode('utf-8')
+        except UnicodeDecodeError as e:
+            logger.warning(f"Discarding unreadable SVG cache entry {key[:12]}: {e}")
+            self.hits -= 1
+            self.misses += 1
+            return None
+
+    def set(self, key: str, svg_content: str):
+        """
+        Store a rendered SVG
+
+        Args:
+            key: Key from diagram_key()
+            svg_content: SVG markup
+        """
+        self.set_bytes(key, svg_content.encode('utf-8'))
@@ -4,5 +4,13 @@ Configuration module for Markdown PDF Generator
 """
 
 from .config_manager import ConfigManager, TemplateVariables
+from .template_env import compile_template, configure_bytecode_cache, get_environment, get_template
 
-__all__ = ["ConfigManager", "TemplateVariables"] 
\ No newline at end of file
+__all__ = [
+    "ConfigManager",
+    "TemplateVariables",
+    "compile_template",
+    "configure_bytecode_cache",
+    "get_environment",
+    "get_template",
+] 
\ No newline at end of file
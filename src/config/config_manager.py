@@ -4,15 +4,44 @@ Configuration Manager for PDF generation settings
 """
 
 import os
+import re
+import json
 import yaml
 from typing import Dict, Any, Optional, Union
 from datetime import datetime
 from pathlib import Path
 import logging
 
+from .template_env import compile_template
+
 logger = logging.getLogger(__name__)
 
 
+# Page number expressions that Chromium can fill per printed page:
+# {{ page.current }}, {{ page['total'] }}, {{ page.current|string }}, ...
+NATIVE_PAGE_PATTERN = re.compile(
+    r'\{\{\s*page\s*(?:\.\s*(?P<attr>current|total)'
+    r'|\[\s*(?P<quote>[\'"])(?P<key>current|total)(?P=quote)\s*\])'
+    r'(?:\s*\|\s*(?:string|int|e|escape|safe|trim))*\s*\}\}'
+)
+
+# Print classes Chromium replaces with the page number and page count
+NATIVE_PAGE_CLASSES = {'current': 'pageNumber', 'total': 'totalPages'}
+
+# Jinja expressions and statements, checked for other uses of ``page``
+JINJA_TAG_PATTERN = re.compile(r'\{\{.*?\}\}|\{%.*?%\}', re.DOTALL)
+PAGE_VARIABLE_PATTERN = re.compile(r'\bpage\b')
+
+# Rendered header/footer templates kept per manager (render server)
+MAX_RENDERED_TEMPLATES = 256
+
+
+def _native_page_span(match: re.Match) -> str:
+    """Print class element for a matched page number expression"""
+    name = match.group('attr') or match.group('key')
+    return f'<span class="{NATIVE_PAGE_CLASSES[name]}"></span>'
+
+
 class TemplateVariables:
     """
     Manages dynamic variables for header/footer templates
@@ -23,6 +52,8 @@ class TemplateVariables:
         self.stats = stats
         self._current_page = 1
         self._total_pages = 1
+        # Fixed at creation so every render of a document sees the same date
+        self._now = datetime.now()
         
     def set_page_info(self, current: int, total: int):
         """Set current page and total pages"""
@@ -36,7 +67,7 @@ class TemplateVariables:
         Returns:
             Dictionary with all template variables
         """
-        now = datetime.now()
+        now = self._now
         
         return {
             'document': {
@@ -113,6 +144,7 @@ class ConfigManager:
         """
         self.config_path = config_path or self._find_config_file()
         self.config = self._load_config()
+        self._render_cache: Dict[tuple, str] = {}
         
     def _find_config_file(self) -> str:
         """Find config.yaml in project directory"""
@@ -162,6 +194,7 @@ class ConfigManager:
             },
             'page_numbers': {
                 'enabled': True,
+                'native': True,
                 'position': 'footer-right',
                 'format': 'Página {current} de {total}',
                 'start_from': 1
@@ -218,15 +251,26 @@ class ConfigManager:
             Page configuration dictionary
         """
         config = self.config['page'].copy()
+        config['margins'] = dict(config.get('margins', {}))
         
         # Override with document metadata if provided
         if document_metadata:
-            if 'format' in document_metadata:
+            if document_metadata.get('format'):
                 config['format'] = document_metadata['format']
             if 'orientation' in document_metadata:
                 config['orientation'] = document_metadata['orientation']
             if 'margins' in document_metadata:
                 config['margins'].update(document_metadata['margins'])
+            
+            # CLI overrides forwarded by PDFGenerator (None means not given)
+            if document_metadata.get('landscape') is not None:
+                config['orientation'] = 'landscape' if document_metadata['landscape'] else 'portrait'
+            if document_metadata.get('margin'):
+                config['margins'].update(document_metadata['margin'])
+            if document_metadata.get('scale') is not None:
+                config['scale'] = document_metadata['scale']
+            if document_metadata.get('print_background') is not None:
+                config['print_background'] = document_metadata['print_background']
         
         return config
     
@@ -275,21 +319,79 @@ class ConfigManager:
         Returns:
             Rendered template string
         """
-        from jinja2 import Template
-        
         try:
-            jinja_template = Template(template)
-            return jinja_template.render(**variables.get_variables())
+            return compile_template(template).render(**variables.get_variables())
         except Exception as e:
             logger.error(f"Error rendering template: {e}")
             return template
     
-    def get_pdf_options(self, document_metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    @property
+    def native_page_numbers(self) -> bool:
+        """Whether page numbers are filled in by Chromium at print time"""
+        return bool(self.config.get('page_numbers', {}).get('native', True))
+    
+    def to_native_page_numbers(self, template: str) -> str:
+        """
+        Replace {{page.current}}/{{page.total}} with Chromium print classes
+        
+        Other uses of ``page`` (conditions, arithmetic, page.roman, ...)
+        cannot be filled per page; they render with the values of page 1 of
+        1, and a warning is logged.
+        
+        Args:
+            template: Header or footer template
+            
+        Returns:
+            Template where page numbers are filled per printed page
+        """
+        template = NATIVE_PAGE_PATTERN.sub(_native_page_span, template)
+        unsupported = [tag for tag in JINJA_TAG_PATTERN.findall(template)
+                       if PAGE_VARIABLE_PATTERN.search(tag)]
+        if unsupported:
+            logger.warning(
+                f"Page variables in {', '.join(unsupported)} cannot be filled per page and render "
+                f"as page 1 of 1; use {{{{ page.current }}}}/{{{{ page.total }}}} or set "
+                f"page_numbers.native: false"
+            )
+        return template
+    
+    def render_header_footer(self, template: str, variables: TemplateVariables) -> str:
+        """
+        Render a header/footer template, once per template and variables
+        
+        In native mode the page placeholders are handed to Chromium, so the
+        result does not depend on page info and is cached.
+        
+        Args:
+            template: Header or footer template
+            variables: TemplateVariables instance
+            
+        Returns:
+            Rendered template string
+        """
+        if not self.native_page_numbers:
+            return self.render_template(template, variables)
+        
+        cache_key = (template, json.dumps(variables.get_variables(), sort_keys=True, default=str))
+        rendered = self._render_cache.get(cache_key)
+        if rendered is None:
+            rendered = self.render_template(self.to_native_page_numbers(template), variables)
+            # Bounded, since one manager may serve many documents (render server)
+            if len(self._render_cache) >= MAX_RENDERED_TEMPLATES:
+                self._render_cache.pop(next(iter(self._render_cache)))
+            self._render_cache[cache_key] = rendered
+        return rendered
+    
+    def get_pdf_options(self, document_metadata: Optional[Dict[str, Any]] = None,
+                        stats: Optional[Dict[str, Any]] = None,
+                        variables: Optional[TemplateVariables] = None) -> Dict[str, Any]:
         """
         Get complete PDF generation options
         
         Args:
             document_metadata: Document-specific metadata
+            stats: Document statistics for templates
+            variables: Template variables (built from metadata and stats if omitted)
             
         Returns:
             PDF options for Playwright
@@ -304,7 +406,8 @@ class ConfigManager:
             template_name = document_metadata.get('template', None)
         
         # Create template variables
-        variables = TemplateVariables(document_metadata or {}, {})
+        if variables is None:
+            variables = TemplateVariables(document_metadata or {}, stats or {})
         
         # Build PDF options
         pdf_options = {
@@ -320,12 +423,12 @@ class ConfigManager:
         # Add header template
         if header_config.get('enabled', False):
             header_template = self.get_header_template(template_name)
-            pdf_options['header_template'] = self.render_template(header_template, variables)
+            pdf_options['header_template'] = self.render_header_footer(header_template, variables)
         
         # Add footer template
         if footer_config.get('enabled', False):
             footer_template = self.get_footer_template(template_name)
-            pdf_options['footer_template'] = self.render_template(footer_template, variables)
+            pdf_options['footer_template'] = self.render_header_footer(footer_template, variables)
         
         return pdf_options
     
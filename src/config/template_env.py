@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Shared Jinja environment with compiled-template caching
+"""
+
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Union
+import logging
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template
+
+from cache import default_cache_dir
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# Document templates shipped with the generator
+TEMPLATES_DIR = Path(__file__).parent.parent / "templates"
+
+# Distinct inline sources (headers, footers) kept compiled in memory
+MAX_COMPILED_SOURCES = 128
+
+# Bytecode cache settings, set by configure_bytecode_cache()
+_bytecode_dir: Optional[Path] = None
+_bytecode_enabled = True
+
+
+def configure_bytecode_cache(cache_dir: Optional[Union[str, Path]] = None, enabled: bool = True):
+    """
+    Choose where compiled template bytecode is stored
+
+    An environment built before the call is discarded, so the next template
+    load uses the new settings.
+
+    Args:
+        cache_dir: Bytecode directory (default: <cache>/jinja)
+        enabled: False to keep compiled templates in memory only
+    """
+    global _bytecode_dir, _bytecode_enabled
+    _bytecode_dir = Path(cache_dir) if cache_dir else None
+    _bytecode_enabled = enabled
+    get_environment.cache_clear()
+    compile_template.cache_clear()
+
+
+@lru_cache(maxsize=1)
+def get_environment() -> Environment:
+    """
+    Get the process-wide Jinja environment
+
+    Templates under ``src/templates`` are loaded through a FileSystemLoader,
+    and their compiled bytecode is kept on disk (``<cache>/jinja`` unless
+    configure_bytecode_cache() says otherwise), so new processes skip
+    compiling them. Autoescaping stays off, as with plain ``jinja2.Template``.
+
+    Returns:
+        Shared jinja2.Environment
+    """
+    bytecode_cache = None
+    if _bytecode_enabled:
+        bytecode_dir = _bytecode_dir or default_cache_dir() / 'jinja'
+        try:
+            bytecode_dir.mkdir(parents=True, exist_ok=True)
+            bytecode_cache = FileSystemBytecodeCache(str(bytecode_dir))
+        except OSError as e:
+            logger.warning(f"Jinja bytecode cache disabled ({bytecode_dir}): {e}")
+
+    return Environment(
+        loader=FileSystemLoader(str(TEMPLATES_DIR)),
+        bytecode_cache=bytecode_cache,
+    )
+
+
+def get_template(name: str) -> Template:
+    """
+    Load a template from ``src/templates``
+
+    Args:
+        name: Template file name (e.g. ``document.html``)
+
+    Returns:
+        Compiled template (reused until the file changes)
+    """
+    return get_environment().get_template(name)
+
+
+@lru_cache(maxsize=MAX_COMPILED_SOURCES)
+def compile_template(source: str) -> Template:
+    """
+    Compile an inline template source once
+
+    Args:
+        source: Template source (e.g. a header or footer from config.yaml)
+
+    Returns:
+        Compiled template, shared by every caller with the same source
+    """
+    return get_environment().from_string(source)
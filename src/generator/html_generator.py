@@ -3,122 +3,80 @@
 Professional HTML Generator with templates and styling
 """
 
+import html
 import os
+import re
 import tempfile
-from typing import Dict, Optional
-from jinja2 import Template
+from functools import lru_cache
+from typing import Dict, List, Optional
 import logging
 
+from browser.assets import FONTS_CSS_URL, MERMAID_URL
+from config import get_template
+from profiling import span
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+# Placeholder left by MarkdownParser where a Mermaid diagram was extracted
+MERMAID_PLACEHOLDER_PATTERN = re.compile(r'<div id="([^"]+)" class="mermaid-placeholder"></div>')
+
+# Diagram left for the Mermaid runtime to render in the page
+CLIENT_DIAGRAM_PATTERN = re.compile(r'<(?:div|pre)\b[^>]*\bclass="mermaid"')
+
+
+@lru_cache(maxsize=8)
+def pygments_stylesheet(style: str, css_class: str = 'highlight') -> str:
+    """
+    Build the stylesheet for class-based Pygments output
+    
+    Every rule is scoped to ``css_class``, including the ``pre`` line height
+    that Pygments would otherwise apply to the whole page.
+    
+    Args:
+        style: Pygments style name
+        css_class: CSS class of the code block wrapper
+        
+    Returns:
+        CSS rules for the token classes of the given style
+    """
+    from pygments.formatters import HtmlFormatter
+    
+    formatter = HtmlFormatter(style=style, cssclass=css_class)
+    selector = f'.{css_class}'
+    return '\n'.join([
+        f'{selector} pre {{ line-height: 125%; }}',
+        *(rule for rule in formatter.get_linenos_style_defs() if not rule.startswith('pre ')),
+        *formatter.get_background_style_defs(selector),
+        *formatter.get_token_style_defs(selector),
+    ])
+
+
 class HTMLGenerator:
     """
     Generate professional HTML from parsed markdown with embedded styles
     """
     
-    def __init__(self, custom_css: Optional[str] = None):
+    def __init__(self, custom_css: Optional[str] = None,
+                 highlight_style: Optional[str] = None):
         """
         Initialize HTML generator
         
         Args:
             custom_css: Optional custom CSS to override default styles
+            highlight_style: Pygments style whose class-based stylesheet is
+                embedded once per document (for MarkdownParser(highlight_classes=True));
+                None when code blocks carry inline styles
         """
         self.custom_css = custom_css
-        self.html_template = """
-<!DOCTYPE html>
-<html lang="pt-BR">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <meta name="author" content="{{ metadata.get('author', 'SoundLink') }}">
-    <meta name="description" content="{{ metadata.get('description', 'Professional PDF Document') }}">
-    <title>{{ metadata.get('title', 'Document') }}</title>
-    
-    <!-- Google Fonts -->
-    <link rel="preconnect" href="https://fonts.googleapis.com">
-    <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
-    <link href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&family=JetBrains+Mono:wght@300;400;500&display=swap" rel="stylesheet">
-    
-    <!-- Mermaid -->
-    <script src="https://cdn.jsdelivr.net/npm/mermaid@10.6.1/dist/mermaid.min.js"></script>
-    
-    <style>
-        {{ css_content }}
-    </style>
-</head>
-<body>
-    <div class="document-container">
-        {% if metadata.get('title') %}
-        <header class="document-header">
-            <h1 class="document-title">{{ metadata.title }}</h1>
-            {% if metadata.get('subtitle') %}
-            <p class="document-subtitle">{{ metadata.subtitle }}</p>
-            {% endif %}
-            {% if metadata.get('author') %}
-            <p class="document-author">{{ metadata.author }}</p>
-            {% endif %}
-            {% if metadata.get('date') %}
-            <p class="document-date">{{ metadata.date }}</p>
-            {% endif %}
-        </header>
-        {% endif %}
-        
-        {% if toc %}
-        <nav class="table-of-contents">
-            <h2>Índice</h2>
-            {{ toc_formatted|safe }}
-        </nav>
-        {% endif %}
-        
-        <main class="document-content">
-            {{ content|safe }}
-        </main>
-        
-        {% if stats %}
-        <footer class="document-footer">
-            <div class="stats">
-                <span>{{ stats.words }} palavras</span>
-                <span>{{ stats.lines }} linhas</span>
-                {% if stats.mermaid_count > 0 %}
-                <span>{{ stats.mermaid_count }} diagramas</span>
-                {% endif %}
-            </div>
-            <div class="generated-by">
-                <p>Gerado por <strong>SoundLink PDF Generator</strong></p>
-            </div>
-        </footer>
-        {% endif %}
-    </div>
-    
-    <!-- Mermaid initialization -->
-    <script>
-        mermaid.initialize({
-            startOnLoad: true,
-            theme: 'default',
-            themeVariables: {
-                primaryColor: '#3498db',
-                primaryTextColor: '#2c3e50',
-                primaryBorderColor: '#2980b9',
-                lineColor: '#34495e',
-                sectionBkgColor: '#ecf0f1',
-                altSectionBkgColor: '#bdc3c7',
-                gridColor: '#95a5a6',
-                secondaryColor: '#e74c3c',
-                tertiaryColor: '#f39c12'
-            },
-            flowchart: {
-                useMaxWidth: true,
-                htmlLabels: true,
-                curve: 'basis'
-            }
-        });
-    </script>
-</body>
-</html>
-        """
+        self.highlight_style = highlight_style
+        # Diagram ids whose placeholder had no SVG in the last generated document
+        self.unresolved_diagrams: List[str] = []
+        # Whether the last generated document loads the Mermaid runtime
+        self.mermaid_runtime = False
+        self.template_name = 'document.html'
     
     def get_default_css(self) -> str:
         """
@@ -565,7 +523,10 @@ em, i {
     
     def inject_mermaid_svgs(self, html_content: str, mermaid_svgs: Dict[str, str]) -> str:
         """
-        Inject rendered Mermaid SVGs into HTML placeholders
+        Inject rendered Mermaid SVGs into HTML placeholders in a single pass
+        
+        Placeholders without an SVG are kept and their ids stored in
+        ``self.unresolved_diagrams``.
         
         Args:
             html_content: HTML content with mermaid placeholders
@@ -574,55 +535,79 @@ em, i {
         Returns:
             HTML with SVGs injected
         """
-        for diagram_id, svg_content in mermaid_svgs.items():
-            placeholder = f'<div id="{diagram_id}" class="mermaid-placeholder"></div>'
-            replacement = f'<div class="mermaid-diagram" id="{diagram_id}">{svg_content}</div>'
-            html_content = html_content.replace(placeholder, replacement)
+        unresolved: List[str] = []
+        
+        def replace(match: re.Match) -> str:
+            diagram_id = match.group(1)
+            svg_content = mermaid_svgs.get(diagram_id)
+            if svg_content is None:
+                unresolved.append(diagram_id)
+                return match.group(0)
+            return f'<div class="mermaid-diagram" id="{diagram_id}">{svg_content}</div>'
+        
+        html_content = MERMAID_PLACEHOLDER_PATTERN.sub(replace, html_content)
+        self.unresolved_diagrams = unresolved
+        
+        if unresolved:
+            log = logger.warning if mermaid_svgs else logger.info
+            log(f"{len(unresolved)} Mermaid placeholder(s) left without SVG: {', '.join(unresolved[:10])}"
+                + (" ..." if len(unresolved) > 10 else ""))
         
         return html_content
     
-    def format_toc_with_page_numbers(self, toc_html: str) -> str:
+    def format_toc_with_page_numbers(self, toc_html: str,
+                                     toc_tokens: Optional[List[Dict]] = None) -> str:
         """
         Format TOC HTML to include page numbers and better styling
         
+        The list is rebuilt in one pass over the nested heading tokens of
+        Python-Markdown's toc extension; each item gets a page number
+        placeholder and a ``toc-h<n>`` class, ``n`` being the number of
+        enclosing lists plus one (``toc-h2`` for top-level entries).
+        
         Args:
             toc_html: Original TOC HTML from markdown parser
+            toc_tokens: Nested TOC tokens from markdown parser (``md.toc_tokens``)
             
         Returns:
             Formatted TOC HTML with page numbers and styling
         """
         if not toc_html:
             return ""
+        if not toc_tokens:
+            return toc_html
         
-        import re
-        from bs4 import BeautifulSoup
-        
-        try:
-            # Parse the TOC HTML
-            soup = BeautifulSoup(toc_html, 'html.parser')
-            
-            # Find all list items
-            for li in soup.find_all('li'):
-                # Add CSS classes based on heading level
-                link = li.find('a')
-                if link and link.get('href'):
-                    # Extract heading level from href (e.g., #heading-1)
-                    href = link.get('href', '')
-                    
-                    # Determine level based on nesting
-                    level = len(li.find_parents('ul')) + 1
-                    li['class'] = li.get('class', []) + [f'toc-h{level}']
-                    
-                    # Add page number placeholder (will be calculated during PDF generation)
-                    page_span = soup.new_tag('span', **{'class': 'toc-page-number'})
-                    page_span.string = '•'  # Placeholder, PDF generator will replace
-                    li.append(page_span)
-            
-            return str(soup)
-            
-        except Exception as e:
-            logger.warning(f"Failed to format TOC: {e}")
+        # Keep the toc div and title exactly as the toc extension wrote them
+        list_start = toc_html.find('<ul>')
+        list_end = toc_html.rfind('</ul>')
+        if list_start < 0 or list_end < 0:
             return toc_html
+        
+        parts = [toc_html[:list_start]]
+        self._append_toc_items(parts, toc_tokens, 2)
+        parts.append(toc_html[list_end + len('</ul>'):])
+        return ''.join(parts)
+    
+    def _append_toc_items(self, parts: List[str], tokens: List[Dict], level: int):
+        """
+        Append a TOC list level and its children to ``parts``
+        
+        Args:
+            parts: Output fragments
+            tokens: Tokens at this level (names are already HTML-escaped)
+            level: Level of the ``toc-h<level>`` class, 2 for top-level entries
+        """
+        parts.append('<ul>\n')
+        for token in tokens:
+            parts.append(
+                f'<li class="toc-h{level}">'
+                f'<a href="#{html.escape(token["id"])}">{token["name"]}</a>'
+            )
+            if token.get('children'):
+                self._append_toc_items(parts, token['children'], level + 1)
+                parts.append('\n')
+            parts.append('<span class="toc-page-number">•</span></li>\n')
+        parts.append('</ul>')
     
     def generate_html(self, parsed_data: Dict, mermaid_svgs: Optional[Dict[str, str]] = None) -> str:
         """
@@ -635,25 +620,41 @@ em, i {
         Returns:
             Complete HTML document as string
         """
-        logger.info("Generating HTML document...")
-        
-        # Prepare template data
-        template_data = {
-            'content': parsed_data['html'],
-            'toc': parsed_data['toc'],
-            'toc_formatted': self.format_toc_with_page_numbers(parsed_data['toc']),
-            'metadata': parsed_data['metadata'],
-            'stats': parsed_data['stats'],
-            'css_content': self.custom_css or self.get_default_css()
-        }
-        
-        # Render HTML template
-        template = Template(self.html_template)
-        html_content = template.render(**template_data)
-        
-        # Inject Mermaid SVGs if provided
-        if mermaid_svgs:
-            html_content = self.inject_mermaid_svgs(html_content, mermaid_svgs)
+        with span('html', cprofile=True) as stage:
+            logger.info("Generating HTML document...")
+            
+            # Inject Mermaid SVGs into the body only, before it is embedded in the page
+            with span('html.inject_svgs'):
+                content = self.inject_mermaid_svgs(parsed_data['html'], mermaid_svgs or {})
+            
+            # The ~3 MB Mermaid runtime is only shipped if the page still has work for it
+            self.mermaid_runtime = CLIENT_DIAGRAM_PATTERN.search(content) is not None
+            
+            with span('html.toc'):
+                toc_formatted = self.format_toc_with_page_numbers(
+                    parsed_data['toc'], parsed_data.get('toc_tokens')
+                )
+            
+            # Prepare template data
+            template_data = {
+                'content': content,
+                'toc': parsed_data['toc'],
+                'toc_formatted': toc_formatted,
+                'metadata': parsed_data['metadata'],
+                'stats': parsed_data['stats'],
+                'css_content': self.custom_css or self.get_default_css(),
+                'highlight_css': pygments_stylesheet(self.highlight_style) if self.highlight_style else '',
+                'mermaid_url': MERMAID_URL,
+                'mermaid_runtime': self.mermaid_runtime,
+                'fonts_css_url': FONTS_CSS_URL,
+            }
+            
+            # Render HTML template (compiled once per process)
+            with span('html.template'):
+                template = get_template(self.template_name)
+                html_content = template.render(**template_data)
+            
+            stage.record(html_chars=len(html_content))
         
         logger.info("HTML generation complete")
         return html_content
@@ -4,20 +4,74 @@ Professional PDF Generator using Playwright with advanced configuration
 """
 
 import asyncio
+import math
 import os
-import tempfile
+import re
+from pathlib import Path
 from typing import Dict, Optional
-from playwright.async_api import async_playwright
 import logging
 
 # Import configuration manager
 from config import ConfigManager, TemplateVariables
+from browser import RenderSession, serve_html
+from profiling import span
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+# Resolves when client-side rendering and font loading are complete
+WAIT_FOR_READY_JS = """
+async () => {
+    if (window.documentReadyPromise) {
+        await window.documentReadyPromise;
+    }
+    await document.fonts.ready;
+}
+"""
+
+# Pages without client-side diagrams only wait for their web fonts
+WAIT_FOR_FONTS_JS = "async () => { await document.fonts.ready; }"
+
+
+# Paper sizes (width, height) in millimetres, portrait orientation
+PAPER_SIZES_MM = {
+    'A0': (841, 1189),
+    'A1': (594, 841),
+    'A2': (420, 594),
+    'A3': (297, 420),
+    'A4': (210, 297),
+    'Letter': (215.9, 279.4),
+    'Legal': (215.9, 355.6),
+    'Tabloid': (279.4, 431.8),
+}
+
+PAGE_OBJECT_PATTERN = re.compile(rb'/Type\s*/Page(?![A-Za-z])')
+PAGE_TREE_COUNT_PATTERN = re.compile(rb'/Type\s*/Pages\b[^>]*?/Count\s+(\d+)|/Count\s+(\d+)[^>]*?/Type\s*/Pages\b')
+
+
+def count_pdf_pages(pdf_bytes: bytes) -> int:
+    """
+    Count the pages of a printed PDF
+    
+    Counts page objects; falls back to the page tree /Count when page
+    objects are hidden in compressed object streams.
+    
+    Args:
+        pdf_bytes: PDF file content
+        
+    Returns:
+        Number of pages (at least 1)
+    """
+    pages = len(PAGE_OBJECT_PATTERN.findall(pdf_bytes))
+    if pages:
+        return pages
+    
+    counts = [int(a or b) for a, b in PAGE_TREE_COUNT_PATTERN.findall(pdf_bytes)]
+    return max(counts) if counts else 1
+
+
 class PDFGenerator:
     """
     Generate PDF from HTML using Playwright with advanced configuration system
@@ -29,7 +83,10 @@ class PDFGenerator:
                  margin: Dict[str, str] = None,
                  print_background: bool = None,
                  landscape: bool = None,
-                 scale: float = None):
+                 scale: float = None,
+                 ready_timeout: int = 30000,
+                 session: Optional[RenderSession] = None,
+                 config_manager: Optional[ConfigManager] = None):
         """
         Initialize PDF generator with configuration support
         
@@ -40,9 +97,15 @@ class PDFGenerator:
             print_background: Print background (overrides config)
             landscape: Landscape orientation (overrides config)
             scale: Scale factor (overrides config)
+            ready_timeout: Maximum wait for diagrams and fonts in milliseconds
+            session: Shared render session (a private one is created per PDF if omitted)
+            config_manager: Already loaded configuration to share (config_path
+                is ignored when given)
         """
         # Initialize configuration manager
-        self.config_manager = ConfigManager(config_path)
+        self.config_manager = config_manager or ConfigManager(config_path)
+        self.ready_timeout = ready_timeout
+        self.session = session
         
         # Store overrides
         self.overrides = {
@@ -74,112 +137,219 @@ class PDFGenerator:
         try:
             logger.info(f"Starting PDF generation: {output_path}")
             
-            # Merge metadata with overrides
-            combined_metadata = (metadata or {}).copy()
-            combined_metadata.update(self.overrides)
-            
-            # Create template variables
-            template_vars = TemplateVariables(
-                document_metadata=combined_metadata,
-                stats=stats or {}
-            )
-            
-            # Get PDF options from configuration
-            pdf_options = self.config_manager.get_pdf_options(combined_metadata)
+            async def load(page):
+                with span('pdf.load'):
+                    await page.goto(Path(html_file_path).resolve().as_uri(), wait_until='load')
+                return await self._print_page(page, metadata, stats)
             
-            async with async_playwright() as p:
-                # Launch browser
-                browser = await p.chromium.launch(headless=True)
-                context = await browser.new_context()
-                page = await context.new_page()
-                
-                # Set viewport for consistent rendering
-                await page.set_viewport_size({"width": 1200, "height": 1600})
-                
-                # Navigate to HTML file
-                await page.goto(f"file://{html_file_path}")
-                
-                # Wait for content to load
-                await page.wait_for_load_state('networkidle')
-                
-                # Wait for Mermaid diagrams to render if any
-                try:
-                    await page.wait_for_selector('.mermaid-diagram svg', timeout=30000)
-                    await page.wait_for_timeout(5000)  # Additional wait for complete rendering
-                    logger.info("Mermaid diagrams rendered successfully")
-                except:
-                    logger.info("No Mermaid diagrams found or timeout")
-                
-                # Update template variables with actual page count
-                total_pages = await self._get_page_count(page, pdf_options)
-                template_vars.set_page_info(1, total_pages)
-                
-                # Re-render templates with correct page info
-                template_name = combined_metadata.get('template')
-                if pdf_options.get('display_header_footer'):
-                    if 'header_template' in pdf_options:
-                        header_template = self.config_manager.get_header_template(template_name)
-                        pdf_options['header_template'] = self.config_manager.render_template(
-                            header_template, template_vars
-                        )
-                    
-                    if 'footer_template' in pdf_options:
-                        footer_template = self.config_manager.get_footer_template(template_name)
-                        pdf_options['footer_template'] = self.config_manager.render_template(
-                            footer_template, template_vars
-                        )
-                
-                # Generate PDF
-                await page.pdf(path=output_path, **pdf_options)
-                
-                await browser.close()
-                
-                logger.info(f"PDF generated successfully: {output_path}")
-                logger.info(f"Configuration template: {template_name or 'default'}")
-                logger.info(f"Total pages: {total_pages}")
-                
-                return True
+            with span('pdf', cprofile=True):
+                pdf_bytes = await self._with_page(load)
+                self._write_pdf(pdf_bytes, output_path, metadata)
+            return True
                 
         except Exception as e:
             logger.error(f"PDF generation failed: {e}")
             return False
     
-    async def _get_page_count(self, page, pdf_options: Dict) -> int:
+    async def render_pdf_bytes(self, html_content: str,
+                               metadata: Optional[Dict] = None,
+                               stats: Optional[Dict] = None,
+                               base_dir: Optional[str] = None,
+                               wait_for_diagrams: bool = True,
+                               file_access: str = 'any') -> bytes:
+        """
+        Print an HTML string to PDF bytes without touching the filesystem
+        
+        Args:
+            html_content: HTML content as string
+            metadata: Document metadata for templates
+            stats: Document statistics for templates
+            base_dir: Directory relative URLs (images, CSS) resolve against
+            wait_for_diagrams: Wait for client-side Mermaid rendering (False when
+                every diagram was injected as SVG, see HTMLGenerator.mermaid_runtime)
+            file_access: Local files the page may load: 'any' (default),
+                'base_dir' or 'none' (see browser.page_loader)
+            
+        Returns:
+            PDF file content
+        """
+        async def load(page):
+            async with serve_html(page, html_content, base_dir, file_access) as url:
+                with span('pdf.load', html_chars=len(html_content)):
+                    await page.goto(url, wait_until='load')
+                return await self._print_page(page, metadata, stats, wait_for_diagrams)
+        
+        with span('pdf', cprofile=True):
+            return await self._with_page(load)
+    
+    async def _with_page(self, action):
         """
-        Get the total number of pages that will be generated
+        Run an action on a page borrowed from the shared (or a private) session
+        
+        Args:
+            action: Coroutine function receiving the page
+            
+        Returns:
+            Whatever the action returns
+        """
+        session = self.session or RenderSession(max_pages=1)
+        try:
+            async with session.page() as page:
+                # Set viewport for consistent rendering
+                await page.set_viewport_size({"width": 1200, "height": 1600})
+                return await action(page)
+        finally:
+            if self.session is None:
+                await session.close()
+    
+    async def _print_page(self, page, metadata: Optional[Dict] = None,
+                          stats: Optional[Dict] = None,
+                          wait_for_diagrams: bool = True) -> bytes:
+        """
+        Print a loaded page once, with header and footer from configuration
+        
+        Args:
+            page: Playwright page with the document loaded
+            metadata: Document metadata for templates
+            stats: Document statistics for templates
+            wait_for_diagrams: Wait for client-side diagrams, not just fonts
+            
+        Returns:
+            PDF file content
+        """
+        # Merge metadata with overrides
+        combined_metadata = (metadata or {}).copy()
+        combined_metadata.update(self.overrides)
+        
+        # Create template variables
+        template_vars = TemplateVariables(
+            document_metadata=combined_metadata,
+            stats=stats or {}
+        )
+        
+        # Get PDF options from configuration (header/footer rendered once)
+        pdf_options = self.config_manager.get_pdf_options(
+            combined_metadata, variables=template_vars
+        )
+        
+        # Wait for pending diagrams and web fonts, if any
+        with span('pdf.wait'):
+            await self._wait_until_ready(page, wait_for_diagrams)
+        
+        # Legacy mode: templates need a total before printing
+        template_name = combined_metadata.get('template')
+        if pdf_options.get('display_header_footer') and not self.config_manager.native_page_numbers:
+            with span('pdf.estimate_pages'):
+                estimated_pages = await self._estimate_page_count(page, pdf_options)
+            template_vars.set_page_info(1, estimated_pages)
+            
+            # Re-render templates with the estimated page info
+            if 'header_template' in pdf_options:
+                header_template = self.config_manager.get_header_template(template_name)
+                pdf_options['header_template'] = self.config_manager.render_template(
+                    header_template, template_vars
+                )
+            
+            if 'footer_template' in pdf_options:
+                footer_template = self.config_manager.get_footer_template(template_name)
+                pdf_options['footer_template'] = self.config_manager.render_template(
+                    footer_template, template_vars
+                )
+        
+        # Generate PDF (single print pass)
+        with span('pdf.print') as stage:
+            pdf_bytes = await page.pdf(**pdf_options)
+            stage.record(pdf_bytes=len(pdf_bytes))
+        return pdf_bytes
+    
+    def _write_pdf(self, pdf_bytes: bytes, output_path: str, metadata: Optional[Dict] = None):
+        """
+        Write printed PDF bytes and log the real page total
+        
+        Args:
+            pdf_bytes: PDF file content
+            output_path: Path for output PDF
+            metadata: Document metadata
+        """
+        with span('pdf.write', pdf_bytes=len(pdf_bytes)):
+            with open(output_path, 'wb') as f:
+                f.write(pdf_bytes)
+        
+        template_name = (metadata or {}).get('template')
+        logger.info(f"PDF generated successfully: {output_path}")
+        logger.info(f"Configuration template: {template_name or 'default'}")
+        logger.info(f"Total pages: {count_pdf_pages(pdf_bytes)}")
+    
+    async def _wait_until_ready(self, page, wait_for_diagrams: bool = True):
+        """
+        Wait for the document's explicit completion signals
+        
+        Awaits ``window.documentReadyPromise`` (set by the HTML template when
+        client-side diagrams are pending) and ``document.fonts.ready``. Both
+        resolve immediately when there is nothing left to do.
+        
+        Args:
+            page: Playwright page object
+            wait_for_diagrams: Also await client-side diagram rendering
+        """
+        try:
+            await asyncio.wait_for(
+                page.evaluate(WAIT_FOR_READY_JS if wait_for_diagrams else WAIT_FOR_FONTS_JS),
+                timeout=self.ready_timeout / 1000
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Document not ready after {self.ready_timeout}ms, printing anyway")
+    
+    async def _estimate_page_count(self, page, pdf_options: Dict) -> int:
+        """
+        Estimate the page total before printing, for header/footer templates
+        
+        Lays the document out at the printable width of the configured paper
+        (format, orientation, margins and scale) and divides its height by
+        the printable height. The real total is read from the printed PDF.
         
         Args:
             page: Playwright page object
             pdf_options: PDF generation options
             
         Returns:
-            Total number of pages
+            Estimated number of pages
         """
         try:
-            # Create a temporary PDF to count pages
-            temp_pdf = await page.pdf(**{k: v for k, v in pdf_options.items() 
-                                       if k not in ['header_template', 'footer_template']})
-            
-            # Use a simple heuristic based on content height
-            content_height = await page.evaluate('document.documentElement.scrollHeight')
-            page_height = 1123  # A4 height in pixels at 96 DPI
+            width_mm, height_mm = PAPER_SIZES_MM.get(pdf_options.get('format', 'A4'), PAPER_SIZES_MM['A4'])
+            if pdf_options.get('landscape'):
+                width_mm, height_mm = height_mm, width_mm
             
-            # Account for margins
-            margin_top = self._parse_margin(pdf_options.get('margin', {}).get('top', '20mm'))
-            margin_bottom = self._parse_margin(pdf_options.get('margin', {}).get('bottom', '20mm'))
+            margins = pdf_options.get('margin', {})
+            scale = pdf_options.get('scale', 1.0) or 1.0
+            printable_width = (self._parse_margin(f"{width_mm}mm")
+                               - self._parse_margin(margins.get('left', '15mm'))
+                               - self._parse_margin(margins.get('right', '15mm'))) / scale
+            printable_height = (self._parse_margin(f"{height_mm}mm")
+                                - self._parse_margin(margins.get('top', '20mm'))
+                                - self._parse_margin(margins.get('bottom', '20mm'))) / scale
             
-            effective_page_height = page_height - margin_top - margin_bottom
-            estimated_pages = max(1, (content_height // effective_page_height) + 1)
+            await page.emulate_media(media='print')
+            await page.set_viewport_size({
+                "width": max(1, int(printable_width)),
+                "height": max(1, int(printable_height)),
+            })
+            content_height = await page.evaluate('document.documentElement.scrollHeight')
+            await page.emulate_media(media='screen')
             
-            return int(estimated_pages)
+            return max(1, math.ceil(content_height / max(1.0, printable_height)))
             
         except Exception as e:
-            logger.warning(f"Could not determine page count: {e}")
+            logger.warning(f"Could not estimate page count: {e}")
             return 1
     
     def _parse_margin(self, margin_str: str) -> int:
         """Parse margin string to pixels"""
-        if margin_str.endswith('mm'):
+        if margin_str.endswith('in'):
+            return int(float(margin_str[:-2]) * 96)
+        elif margin_str.endswith('cm'):
+            return int(float(margin_str[:-2]) * 37.8)
+        elif margin_str.endswith('mm'):
             mm = float(margin_str[:-2])
             return int(mm * 3.78)  # Convert mm to pixels
         elif margin_str.endswith('px'):
@@ -189,34 +359,36 @@ class PDFGenerator:
     
     async def generate_pdf_from_html_content(self, html_content: str, 
                                            output_path: str,
-                                           metadata: Optional[Dict] = None) -> bool:
+                                           metadata: Optional[Dict] = None,
+                                           stats: Optional[Dict] = None,
+                                           base_dir: Optional[str] = None,
+                                           wait_for_diagrams: bool = True) -> bool:
         """
         Generate PDF directly from HTML content
         
+        The HTML is handed to the page from memory; no temporary file is
+        written. Relative asset URLs resolve against ``base_dir``.
+        
         Args:
             html_content: HTML content as string
             output_path: Path for output PDF
             metadata: Optional metadata for PDF
+            stats: Optional document statistics for templates
+            base_dir: Directory relative URLs resolve against (default: cwd)
+            wait_for_diagrams: Wait for client-side Mermaid rendering
             
         Returns:
             True if successful, False otherwise
         """
-        # Create temporary HTML file
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.html', 
-                                       delete=False, encoding='utf-8') as f:
-            f.write(html_content)
-            temp_html_path = f.name
-        
         try:
-            # Generate PDF from temporary file
-            result = await self.generate_pdf(temp_html_path, output_path, metadata)
-            return result
-        finally:
-            # Clean up temporary file
-            try:
-                os.unlink(temp_html_path)
-            except:
-                pass
+            logger.info(f"Starting PDF generation: {output_path}")
+            pdf_bytes = await self.render_pdf_bytes(html_content, metadata, stats, base_dir,
+                                                    wait_for_diagrams)
+            self._write_pdf(pdf_bytes, output_path, metadata)
+            return True
+        except Exception as e:
+            logger.error(f"PDF generation failed: {e}")
+            return False
     
     def get_supported_formats(self) -> list:
         """
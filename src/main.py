@@ -7,13 +7,21 @@ import argparse
 import asyncio
 import os
 import sys
+import time
 import logging
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 from pathlib import Path
 
-# Import project modules
-from parser import MarkdownParser, MermaidProcessor
-from generator import HTMLGenerator, PDFGenerator
+# Import project modules (parser, generator, batch and server pull in
+# Markdown, Pygments, Jinja and friends, so they are imported by the stage
+# that needs them; Playwright only loads when a browser is launched)
+from cache import ParseCache, SVGCache
+from browser import AssetBundle, RenderSession
+from profiling import Profile, bind_context, span
+
+if TYPE_CHECKING:
+    from parser import MarkdownParser
+    from parser.parallel import SectionPool
 
 # Configure logging
 logging.basicConfig(
@@ -43,6 +51,18 @@ Exemplos de uso:
   %(prog)s documento.md --no-mermaid       # Ignora diagramas Mermaid
   %(prog)s documento.md --css custom.css   # CSS customizado
   %(prog)s documento.md --verbose          # Logs detalhados
+  %(prog)s documento.md --no-cache         # Ignora os caches (parse e diagramas)
+  %(prog)s --clear-cache                   # Limpa os caches
+  %(prog)s relatorio.md --incremental     # Reconverte só as seções alteradas
+  %(prog)s api.md --workers 8             # Parse paralelo por seções
+  %(prog)s codigo.md --highlight-classes  # Código com classes CSS (HTML menor)
+  %(prog)s --batch docs/ -j 8              # Converte um diretório inteiro
+  %(prog)s --batch "docs/**/*.md" --output-dir pdfs/  # Glob com saída separada
+  %(prog)s --batch lista.txt               # Arquivo de manifesto (um caminho por linha)
+  %(prog)s --serve --port 8765             # Servidor de renderização HTTP
+  %(prog)s --serve --socket /tmp/mdpdf.sock  # Servidor em socket Unix
+  %(prog)s documento.md --profile          # Tempo por etapa em documento.profile.json
+  %(prog)s documento.md --cprofile perfis/ # Um arquivo cProfile (.prof) por etapa
 
 Formatos suportados: A4, A3, A2, A1, A0, Letter, Legal, Tabloid
 Recursos: Markdown, Emojis, Tabelas, Código, Mermaid, TOC, Metadados
@@ -52,6 +72,7 @@ Recursos: Markdown, Emojis, Tabelas, Código, Mermaid, TOC, Metadados
     # Required arguments
     parser.add_argument(
         'input_file',
+        nargs='?',
         help='Arquivo Markdown de entrada (.md)'
     )
     
@@ -70,14 +91,24 @@ Recursos: Markdown, Emojis, Tabelas, Código, Mermaid, TOC, Metadados
     parser.add_argument(
         '--format',
         choices=['A4', 'A3', 'A2', 'A1', 'A0', 'Letter', 'Legal', 'Tabloid'],
-        default='A4',
-        help='Formato do papel (padrão: A4)'
+        default=None,
+        help='Formato do papel (padrão: front matter ou config.yaml, A4)'
     )
     
+    # Page options default to None so only flags actually passed override
+    # the document front matter and config.yaml
     parser.add_argument(
         '--landscape',
         action='store_true',
-        help='Orientação paisagem (padrão: retrato)'
+        default=None,
+        help='Orientação paisagem (padrão: front matter ou config.yaml, retrato)'
+    )
+    
+    parser.add_argument(
+        '--portrait',
+        action='store_false',
+        dest='landscape',
+        help='Orientação retrato, mesmo que o documento ou config.yaml peça paisagem'
     )
     
     parser.add_argument(
@@ -105,8 +136,121 @@ Recursos: Markdown, Emojis, Tabelas, Código, Mermaid, TOC, Metadados
     parser.add_argument(
         '--scale',
         type=float,
-        default=1.0,
-        help='Fator de escala para renderização (padrão: 1.0)'
+        default=None,
+        help='Fator de escala para renderização (padrão: config.yaml, 1.0)'
+    )
+    
+    parser.add_argument(
+        '--highlight-classes',
+        action='store_true',
+        help='Destacar código com classes CSS e uma única folha de estilos (HTML menor)'
+    )
+    
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Não usar os caches de parse, de diagramas Mermaid renderizados e de templates compilados'
+    )
+    
+    parser.add_argument(
+        '--clear-cache',
+        action='store_true',
+        help='Limpar os caches de parse e de diagramas antes da conversão'
+    )
+    
+    parser.add_argument(
+        '--cache-dir',
+        help='Diretório base dos caches (padrão: ~/.cache/markdown-pdf-generator)'
+    )
+    
+    parser.add_argument(
+        '--allow-network',
+        action='store_true',
+        help='Permitir requisições externas durante a renderização (padrão: offline)'
+    )
+    
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='Converter seções separadamente e reaproveitar as que não mudaram'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Processos para converter seções em paralelo, compartilhados entre os jobs (padrão: 1; >1 implica --incremental)'
+    )
+    
+    parser.add_argument(
+        '--batch',
+        nargs='+',
+        metavar='FONTE',
+        help='Converter em lote: diretórios, globs ou arquivos de manifesto (.txt)'
+    )
+    
+    parser.add_argument(
+        '--jobs', '-j',
+        type=int,
+        default=4,
+        help='Conversões em paralelo no modo lote ou servidor (padrão: 4)'
+    )
+    
+    parser.add_argument(
+        '--output-dir',
+        help='Diretório de saída no modo lote (padrão: ao lado de cada arquivo)'
+    )
+    
+    parser.add_argument(
+        '--serve',
+        action='store_true',
+        help='Iniciar o servidor de renderização (POST /render, GET /health)'
+    )
+    
+    parser.add_argument(
+        '--host',
+        default='127.0.0.1',
+        help='Endereço do servidor HTTP (padrão: 127.0.0.1)'
+    )
+    
+    parser.add_argument(
+        '--port',
+        type=int,
+        default=8765,
+        help='Porta do servidor HTTP (padrão: 8765)'
+    )
+    
+    parser.add_argument(
+        '--socket',
+        help='Escutar em um socket Unix em vez de TCP'
+    )
+    
+    parser.add_argument(
+        '--base-dir',
+        help='Diretório de onde o servidor pode servir imagens e CSS locais '
+             '(padrão: nenhum arquivo local é servido)'
+    )
+    
+    parser.add_argument(
+        '--queue-limit',
+        type=int,
+        default=16,
+        help='Requisições aguardando no servidor antes de responder 503 (padrão: 16)'
+    )
+    
+    parser.add_argument(
+        '--profile',
+        nargs='?',
+        const='',
+        metavar='ARQUIVO',
+        help='Grava o tempo e o tamanho de cada etapa em JSON '
+             '(padrão: <saída>.profile.json; no modo lote, ARQUIVO é um diretório)'
+    )
+    
+    parser.add_argument(
+        '--cprofile',
+        metavar='DIRETÓRIO',
+        help='Grava um perfil cProfile (.prof) por etapa no diretório (implica --profile)'
     )
     
     parser.add_argument(
@@ -199,7 +343,61 @@ def load_custom_css(css_path: str) -> Optional[str]:
         return None
 
 
-async def generate_pdf(input_file: str, output_file: str, args) -> bool:
+def cache_path(args, name: str) -> Optional[Path]:
+    """
+    Get a cache subdirectory below --cache-dir
+    
+    Args:
+        args: Command line arguments
+        name: Cache name ('parse', 'mermaid' or 'jinja')
+        
+    Returns:
+        Cache directory, or None for the default location
+    """
+    return Path(args.cache_dir) / name if args.cache_dir else None
+
+
+def create_parser(args, section_pool: Optional['SectionPool'] = None) -> 'MarkdownParser':
+    """
+    Create a Markdown parser, with the parse cache unless --no-cache is set
+    and section-by-section conversion when --incremental or --workers is set
+    (class-based code highlighting with --highlight-classes)
+    
+    Args:
+        args: Command line arguments
+        section_pool: Optional section pool shared with other parsers (see
+            create_section_pool)
+        
+    Returns:
+        Configured MarkdownParser
+    """
+    from parser import MarkdownParser
+    
+    parse_cache = None if args.no_cache else ParseCache(cache_path(args, 'parse'))
+    return MarkdownParser(cache=parse_cache, incremental=args.incremental,
+                          workers=args.workers,
+                          highlight_classes=args.highlight_classes,
+                          section_pool=section_pool)
+
+
+def create_section_pool(args) -> Optional['SectionPool']:
+    """
+    Create the section pool shared by every parser of a batch or server run,
+    so at most --workers processes convert sections whatever --jobs is
+    
+    Args:
+        args: Command line arguments
+        
+    Returns:
+        SectionPool, or None when --workers is 1
+    """
+    if args.workers <= 1:
+        return None
+    return create_parser(args).create_section_pool()
+
+
+async def generate_pdf(input_file: str, output_file: str, args,
+                       session: Optional[RenderSession] = None) -> bool:
     """
     Main PDF generation function
     
@@ -207,28 +405,138 @@ async def generate_pdf(input_file: str, output_file: str, args) -> bool:
         input_file: Input markdown file path
         output_file: Output PDF file path
         args: Command line arguments
+        session: Shared render session (one is created for this file if omitted)
         
     Returns:
         True if successful, False otherwise
     """
+    if session is not None:
+        return await convert_document(input_file, output_file, args, session)
+    
+    # One browser for the whole conversion, launched only if a stage needs it
+    assets = AssetBundle(offline=not args.allow_network)
+    async with RenderSession(assets=assets) as session:
+        return await convert_document(input_file, output_file, args, session)
+
+
+def profile_path(output_file: str, args) -> Path:
+    """
+    Pick where the --profile report of one conversion goes
+    
+    Args:
+        output_file: Output file of the conversion
+        args: Command line arguments
+        
+    Returns:
+        Report path
+    """
+    report_name = Path(output_file).with_suffix('.profile.json')
+    if not args.profile:
+        return report_name
+    if getattr(args, 'batch', None):
+        return Path(args.profile) / report_name.name
+    return Path(args.profile)
+
+
+def log_profile(profile: Profile, report_file: Path):
+    """
+    Log a one-line summary of the top-level stages
+    
+    Args:
+        profile: Finished profile
+        report_file: Where the report was written
+    """
+    stages = {}
+    for stage in profile.root.children:
+        stages[stage.name] = stages.get(stage.name, 0.0) + stage.wall
+    summary = ", ".join(f"{name} {wall:.2f}s" for name, wall in stages.items())
+    logger.info(f"⏱️  Perfil ({profile.root.wall:.2f}s): {summary} → {report_file}")
+
+
+async def convert_document(input_file: str, output_file: str, args,
+                           session: RenderSession,
+                           parser: Optional['MarkdownParser'] = None) -> bool:
+    """
+    Convert one markdown file, borrowing browser pages from a render session
+    
+    With --profile (or --cprofile), the conversion is timed stage by stage
+    and the report is written next to the output.
+    
+    Args:
+        input_file: Input markdown file path
+        output_file: Output PDF file path
+        args: Command line arguments
+        session: Render session shared by Mermaid rendering and PDF printing
+        parser: Markdown parser to reuse (a new one is created if omitted)
+        
+    Returns:
+        True if successful, False otherwise
+    """
+    if args.profile is None and not args.cprofile:
+        return await _convert_document(input_file, output_file, args, session, parser)
+    
+    profile = Profile(input_file, cprofile_dir=args.cprofile)
+    with profile.activate():
+        success = await _convert_document(input_file, output_file, args, session, parser)
+    
+    report_file = profile_path(output_file, args)
+    try:
+        report_file.parent.mkdir(parents=True, exist_ok=True)
+        profile.write(report_file)
+        log_profile(profile, report_file)
+    except OSError as e:
+        logger.warning(f"⚠️  Não foi possível gravar o perfil {report_file}: {e}")
+    return success
+
+
+async def _convert_document(input_file: str, output_file: str, args,
+                            session: RenderSession,
+                            parser: Optional['MarkdownParser'] = None) -> bool:
+    """
+    Run the conversion stages of convert_document()
+    
+    Args:
+        input_file: Input markdown file path
+        output_file: Output PDF file path
+        args: Command line arguments
+        session: Render session shared by Mermaid rendering and PDF printing
+        parser: Markdown parser to reuse (a new one is created if omitted)
+        
+    Returns:
+        True if successful, False otherwise
+    """
+    from parser import MermaidProcessor
+    from generator import HTMLGenerator, PDFGenerator
+    
     try:
         # 1. Read markdown file
         logger.info(f"📖 Lendo arquivo: {input_file}")
-        with open(input_file, 'r', encoding='utf-8') as f:
-            markdown_content = f.read()
+        with span('read') as read_span:
+            with open(input_file, 'r', encoding='utf-8') as f:
+                markdown_content = f.read()
+            read_span.record(input_chars=len(markdown_content))
         
         # 2. Initialize parser
-        parser = MarkdownParser()
+        owns_parser = parser is None
+        if owns_parser:
+            parser = create_parser(args)
         
-        # 3. Parse markdown
+        # 3. Parse markdown (off the event loop, so other files keep rendering)
         logger.info("🔍 Parseando Markdown...")
-        parsed_data = parser.parse(markdown_content)
+        loop = asyncio.get_running_loop()
+        try:
+            parsed_data = await loop.run_in_executor(None, bind_context(parser.parse),
+                                                     markdown_content)
+        finally:
+            if owns_parser:
+                parser.close()
         
         # 4. Process Mermaid diagrams if enabled
         mermaid_svgs = {}
         if not args.no_mermaid and parsed_data['mermaid_diagrams']:
             logger.info("🎨 Processando diagramas Mermaid...")
-            mermaid_processor = MermaidProcessor()
+            svg_cache = None if args.no_cache else SVGCache(cache_path(args, 'mermaid'))
+            mermaid_processor = MermaidProcessor(cache=svg_cache, session=session)
             mermaid_svgs = await mermaid_processor.process_diagrams(
                 parsed_data['mermaid_diagrams']
             )
@@ -240,14 +548,16 @@ async def generate_pdf(input_file: str, output_file: str, args) -> bool:
         
         # 6. Generate HTML
         logger.info("🌐 Gerando HTML...")
-        html_generator = HTMLGenerator(custom_css=custom_css)
+        highlight_style = parser.highlight_style if parser.highlight_classes else None
+        html_generator = HTMLGenerator(custom_css=custom_css, highlight_style=highlight_style)
         html_content = html_generator.generate_html(parsed_data, mermaid_svgs)
         
         # 7. Generate HTML only if requested
         if args.html:
             html_output = output_file.replace('.pdf', '.html')
-            with open(html_output, 'w', encoding='utf-8') as f:
-                f.write(html_content)
+            with span('html.write'):
+                with open(html_output, 'w', encoding='utf-8') as f:
+                    f.write(html_content)
             logger.info(f"✅ HTML gerado: {html_output}")
             return True
         
@@ -260,7 +570,8 @@ async def generate_pdf(input_file: str, output_file: str, args) -> bool:
             format=args.format,
             margin=margins,
             landscape=args.landscape,
-            scale=args.scale
+            scale=args.scale,
+            session=session
         )
         
         # 9. Generate PDF
@@ -268,7 +579,10 @@ async def generate_pdf(input_file: str, output_file: str, args) -> bool:
         success = await pdf_generator.generate_pdf_from_html_content(
             html_content, 
             output_file,
-            parsed_data['metadata']
+            parsed_data['metadata'],
+            stats=parsed_data['stats'],
+            base_dir=str(Path(input_file).resolve().parent),
+            wait_for_diagrams=html_generator.mermaid_runtime
         )
         
         if success:
@@ -279,6 +593,10 @@ async def generate_pdf(input_file: str, output_file: str, args) -> bool:
             # Print statistics
             stats = parsed_data['stats']
             logger.info(f"📊 Estatísticas: {stats['words']} palavras, {stats['lines']} linhas, {stats['mermaid_count']} diagramas")
+            highlight = stats.get('highlight')
+            if highlight and highlight['hits'] + highlight['misses']:
+                logger.info(f"🖍️  Destaque de código: {highlight['hits']} do cache, "
+                            f"{highlight['misses']} processados ({highlight['hit_rate']:.0%})")
             
             return True
         else:
@@ -290,6 +608,93 @@ async def generate_pdf(input_file: str, output_file: str, args) -> bool:
         return False
 
 
+def run_batch_mode(args):
+    """
+    Convert every file matched by --batch and exit
+    
+    Args:
+        args: Command line arguments
+    """
+    from batch import collect_inputs, run_batch, print_summary
+    
+    sources = list(args.batch)
+    if args.input_file:
+        sources.insert(0, args.input_file)
+    
+    inputs = [path for path in collect_inputs(sources) if validate_input_file(str(path))]
+    if not inputs:
+        logger.error("❌ Nenhum arquivo Markdown válido encontrado")
+        sys.exit(1)
+    
+    print("🚀 SoundLink Markdown PDF Generator v1.0.0")
+    print(f"📦 Modo lote: {len(inputs)} arquivo(s), {args.jobs} em paralelo")
+    print(f"📄 Saída: {args.output_dir or 'ao lado de cada arquivo'}")
+    print(f"📐 Formato: {args.format or 'do documento/config.yaml'}")
+    print("-" * 50)
+    
+    section_pool = create_section_pool(args)
+    started = time.perf_counter()
+    try:
+        items = asyncio.run(run_batch(inputs, args, convert_document,
+                                    make_parser=lambda: create_parser(args, section_pool),
+                                    jobs=args.jobs, output_dir=args.output_dir))
+    except KeyboardInterrupt:
+        print("\n⏹️  Operação cancelada pelo usuário")
+        sys.exit(1)
+    finally:
+        if section_pool is not None:
+            section_pool.close()
+    
+    print_summary(items, time.perf_counter() - started)
+    sys.exit(0 if all(item.success for item in items) else 1)
+
+
+def run_server_mode(args):
+    """
+    Serve conversions over HTTP or a Unix socket until interrupted
+    
+    Args:
+        args: Command line arguments
+    """
+    from server import RenderOptions, RenderServer, serve
+    
+    custom_css = load_custom_css(args.css) if args.css else None
+    margins = parse_margins(args.margin) if args.margin else None
+    defaults = RenderOptions(
+        format=args.format,
+        landscape=args.landscape,
+        scale=args.scale,
+        margin=margins,
+        mermaid=not args.no_mermaid,
+        css=custom_css,
+        output='html' if args.html else 'pdf',
+    )
+    section_pool = create_section_pool(args)
+    server = RenderServer(
+        make_parser=lambda: create_parser(args, section_pool),
+        defaults=defaults,
+        concurrency=args.jobs,
+        queue_limit=args.queue_limit,
+        svg_cache=None if args.no_cache else SVGCache(cache_path(args, 'mermaid')),
+        allow_network=args.allow_network,
+        base_dir=args.base_dir,
+    )
+    
+    print("🚀 SoundLink Markdown PDF Generator v1.0.0")
+    print(f"🛰️  Servidor: {'unix:' + args.socket if args.socket else f'http://{args.host}:{args.port}'}")
+    print(f"👷 Conversões simultâneas: {args.jobs}, fila: {args.queue_limit}")
+    print("-" * 50)
+    
+    try:
+        asyncio.run(serve(server, host=args.host, port=args.port, socket_path=args.socket))
+    except KeyboardInterrupt:
+        print("\n⏹️  Servidor encerrado")
+    finally:
+        if section_pool is not None:
+            section_pool.close()
+    sys.exit(0)
+
+
 def main():
     """
     Main entry point
@@ -302,6 +707,27 @@ def main():
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
     
+    # Clear the caches if requested
+    if args.clear_cache:
+        ParseCache(cache_path(args, 'parse')).clear()
+        SVGCache(cache_path(args, 'mermaid')).clear()
+        if not args.input_file and not args.batch and not args.serve:
+            print("🧹 Caches limpos!")
+            sys.exit(0)
+    
+    # Compiled templates follow --cache-dir and --no-cache like the other caches
+    from config import configure_bytecode_cache
+    configure_bytecode_cache(cache_path(args, 'jinja'), enabled=not args.no_cache)
+    
+    if args.serve:
+        run_server_mode(args)
+    
+    if args.batch:
+        run_batch_mode(args)
+    
+    if not args.input_file:
+        parser.error('o arquivo de entrada é obrigatório')
+    
     # Validate input file
     if not validate_input_file(args.input_file):
         sys.exit(1)
@@ -320,8 +746,9 @@ def main():
     print("🚀 SoundLink Markdown PDF Generator v1.0.0")
     print(f"📝 Entrada: {args.input_file}")
     print(f"📄 Saída: {output_file}")
-    print(f"📐 Formato: {args.format}")
-    print(f"🔧 Orientação: {'Paisagem' if args.landscape else 'Retrato'}")
+    print(f"📐 Formato: {args.format or 'do documento/config.yaml'}")
+    orientation = {True: 'Paisagem', False: 'Retrato', None: 'do documento/config.yaml'}[args.landscape]
+    print(f"🔧 Orientação: {orientation}")
     print(f"🎨 Mermaid: {'Desabilitado' if args.no_mermaid else 'Habilitado'}")
     print("-" * 50)
     
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Line-based, fence-aware scanner for Markdown block structure
+"""
+
+import re
+import hashlib
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# Opening code fence: up to three spaces of indentation, then ``` or ~~~
+FENCE_PATTERN = re.compile(r'^( {0,3})(`{3,}|~{3,})(.*?)\s*$')
+
+MERMAID_DIV_OPEN = '<div class="mermaid">'
+MERMAID_DIV_CLOSE = '</div>'
+
+
+@dataclass
+class Fence:
+    """
+    An open fenced code block
+    """
+    indent: int
+    char: str
+    length: int
+    info: str
+    line: int
+
+    @property
+    def language(self) -> str:
+        """First word of the info string, lowercased"""
+        return self.info.split()[0].lower() if self.info.split() else ''
+
+
+def open_fence(line: str, line_number: int = 0) -> Optional[Fence]:
+    """
+    Check if a line opens a fenced code block
+
+    Args:
+        line: Line without trailing newline
+        line_number: 1-based line number, stored on the fence
+
+    Returns:
+        Fence if the line opens one, None otherwise
+    """
+    match = FENCE_PATTERN.match(line)
+    if not match:
+        return None
+    indent, marker, info = match.groups()
+    # Backtick fences may not carry backticks in their info string
+    if marker[0] == '`' and '`' in info:
+        return None
+    return Fence(indent=len(indent), char=marker[0], length=len(marker),
+                 info=info.strip(), line=line_number)
+
+
+def closes_fence(line: str, fence: Fence, exact: bool = False) -> bool:
+    """
+    Check if a line closes an open fence
+
+    Args:
+        line: Line without trailing newline
+        fence: Currently open fence
+        exact: Require the exact opening marker at column 0, as
+            Python-Markdown's fenced_code does (CommonMark rules otherwise)
+
+    Returns:
+        True if the line is a matching closing fence
+    """
+    if exact:
+        return line.rstrip() == fence.char * fence.length
+    stripped = line.strip()
+    indent = len(line) - len(line.lstrip(' '))
+    return (
+        indent <= 3
+        and len(stripped) >= fence.length
+        and stripped == fence.char * len(stripped)
+    )
+
+
+def _dedent(line: str, width: int) -> str:
+    """Remove up to ``width`` leading spaces, as CommonMark does for fence content"""
+    if not width:
+        return line
+    stripped = line.lstrip(' ')
+    removed = len(line) - len(stripped)
+    return line[min(removed, width):]
+
+
+class MermaidScanner:
+    """
+    Extract Mermaid diagrams from Markdown in a single pass.
+
+    Finds fenced ``mermaid`` blocks and ``<div class="mermaid">`` blocks
+    outside other code fences, replaces each one with a placeholder and
+    builds the output once. Diagram ids are derived from the diagram source,
+    so they stay stable when unrelated parts of the document change.
+    """
+
+    def __init__(self, line_offset: int = 0):
+        """
+        Initialize scanner
+
+        Args:
+            line_offset: Lines preceding the scanned content (e.g. front matter)
+        """
+        self.line_offset = line_offset
+        self._id_counts: Dict[str, int] = {}
+
+    def _diagram(self, source: str, line: int) -> Dict:
+        """Build the diagram record with a stable, de-duplicated id"""
+        digest = hashlib.sha1(source.encode('utf-8')).hexdigest()[:8]
+        base_id = f"mermaid-{digest}"
+        count = self._id_counts.get(base_id, 0) + 1
+        self._id_counts[base_id] = count
+        diagram_id = base_id if count == 1 else f"{base_id}-{count}"
+        return {
+            'id': diagram_id,
+            'content': source,
+            'line': line + self.line_offset,
+            'placeholder': f'<div id="{diagram_id}" class="mermaid-placeholder"></div>',
+        }
+
+    def scan(self, content: str) -> Tuple[str, List[Dict]]:
+        """
+        Replace Mermaid blocks with placeholders
+
+        Args:
+            content: Markdown content
+
+        Returns:
+            Tuple of (content_with_placeholders, list_of_mermaid_diagrams)
+        """
+        lines = content.splitlines(keepends=True)
+        output: List[str] = []
+        diagrams: List[Dict] = []
+        total = len(lines)
+        i = 0
+
+        while i < total:
+            raw = lines[i]
+            line = raw.rstrip('\r\n')
+            fence = open_fence(line, i + 1)
+
+            if fence is not None:
+                # Find the closing fence
+                end = i + 1
+                while end < total and not closes_fence(lines[end].rstrip('\r\n'), fence):
+                    end += 1
+
+                if fence.language == 'mermaid' and end < total:
+                    body = ''.join(_dedent(l, fence.indent) for l in lines[i + 1:end])
+                    diagram = self._diagram(body.strip(), fence.line)
+                    diagrams.append(diagram)
+                    closing = lines[end]
+                    output.append(' ' * fence.indent + diagram['placeholder'])
+                    output.append(closing[len(closing.rstrip('\r\n')):])
+                else:
+                    # Other code blocks (or an unclosed fence) pass through verbatim
+                    output.extend(lines[i:end + 1])
+                i = end + 1
+                continue
+
+            if MERMAID_DIV_OPEN not in line:
+                output.append(raw)
+                i += 1
+                continue
+
+            i = self._scan_divs(lines, i, output, diagrams)
+
+        return ''.join(output), diagrams
+
+    def _scan_divs(self, lines: List[str], i: int, output: List[str],
+                   diagrams: List[Dict]) -> int:
+        """
+        Replace ``<div class="mermaid">`` blocks starting on line ``i``
+
+        Args:
+            lines: All lines of the document (with line endings)
+            i: Index of a line containing an opening div
+            output: Output fragments, appended to
+            diagrams: Extracted diagrams, appended to
+
+        Returns:
+            Index of the next line to scan
+        """
+        text = lines[i]
+        start_line = i
+        while True:
+            start = text.find(MERMAID_DIV_OPEN)
+            if start < 0:
+                output.append(text)
+                return i + 1
+
+            # Collect lines until the closing tag appears
+            body_start = start + len(MERMAID_DIV_OPEN)
+            end = text.find(MERMAID_DIV_CLOSE, body_start)
+            parts = [text[body_start:]] if end < 0 else [text[body_start:end]]
+            j = i
+            while end < 0 and j + 1 < len(lines):
+                j += 1
+                end = lines[j].find(MERMAID_DIV_CLOSE)
+                parts.append(lines[j] if end < 0 else lines[j][:end])
+
+            if end < 0:
+                # Unclosed div: leave the rest of the document untouched
+                output.append(text)
+                output.extend(lines[i + 1:])
+                return len(lines)
+
+            diagram = self._diagram(''.join(parts).strip(), start_line + 1)
+            diagrams.append(diagram)
+            output.append(text[:start])
+            output.append(diagram['placeholder'])
+
+            # Keep scanning the remainder of the closing line
+            text = (text if j == i else lines[j])[end + len(MERMAID_DIV_CLOSE):]
+            i = j
+            start_line = j
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Fast :shortcode: to emoji replacement that leaves code untouched
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# Candidate shortcode: no whitespace, colons or backticks between the colons
+SHORTCODE_PATTERN = re.compile(r':([^\s:`]+):')
+
+# Every candidate name; the closing colon is left for the next candidate,
+# so names sharing a colon (``10:30:smile:``) are all found
+CANDIDATE_NAME_PATTERN = re.compile(r':([^\s:`]+)(?=:)')
+
+# Opening fence line, matched from the newline before it (the same rules as
+# block_scanner.open_fence: up to three spaces of indentation and no
+# backticks in a backtick info string)
+FENCE_OPEN_PATTERN = re.compile(r'\n {0,3}(?:(`{3,})(?![^\n]*`)|(~{3,}))[^\n]*')
+
+# Candidates chained by shared colons (``:smile:``, ``10:30:smile:``)
+SHORTCODE_CHAIN_PATTERN = re.compile(r':(?:[^\s:`]+:)+')
+
+# The same, or an inline code span on one line (a backtick run closed by the
+# next run of the same length), which is kept as is
+CODE_OR_SHORTCODE_PATTERN = re.compile(
+    r'`(?<!``)(`*)(?!`)[^\n]*?(?<!`)`\1(?!`)'
+    r'|:(?:[^\s:`]+:)+'
+)
+
+
+@lru_cache(maxsize=1)
+def alias_map() -> Dict[str, str]:
+    """
+    Build the shortcode lookup used by emoji.emojize(language='alias')
+
+    Aliases take precedence over English names, and only fully-qualified
+    emoji are mapped, mirroring emoji.unicode_codes.get_emoji_by_name.
+
+    Returns:
+        Mapping of shortcode name (without colons) to emoji
+    """
+    import emoji
+    from emoji import unicode_codes
+
+    load_from_json = getattr(unicode_codes, 'load_from_json', None)
+    if load_from_json is not None:
+        load_from_json('alias')
+        load_from_json('en')
+
+    fully_qualified = unicode_codes.STATUS['fully_qualified']
+    qualified = [
+        (emj, data) for emj, data in emoji.EMOJI_DATA.items()
+        if data.get('status', fully_qualified) <= fully_qualified
+    ]
+
+    names: Dict[str, str] = {}
+    for emj, data in qualified:
+        for alias in data.get('alias', []):
+            names.setdefault(alias.strip(':'), emj)
+    for emj, data in qualified:
+        if data.get('en'):
+            names.setdefault(data['en'].strip(':'), emj)
+    return names
+
+
+def _lookup(name: str, names: Dict[str, str]) -> Optional[str]:
+    """Find the emoji for a shortcode name"""
+    found = names.get(name)
+    if found is None and not name.isascii():
+        found = names.get(unicodedata.normalize('NFKC', name))
+    return found
+
+
+def _replace_chain(text: str, names: Dict[str, str]) -> str:
+    """
+    Replace the shortcodes of a colon chain from left to right
+
+    A colon that ends an unknown name may still open the next shortcode,
+    so ``10:30:smile:`` becomes ``10:30😄``.
+    """
+    pieces: List[str] = []
+    last = 0
+    pos = 0
+    while True:
+        match = SHORTCODE_PATTERN.search(text, pos)
+        if match is None:
+            break
+        found = _lookup(match.group(1), names)
+        if found is None:
+            pos = match.end() - 1
+            continue
+        pieces.append(text[last:match.start()])
+        pieces.append(found)
+        last = pos = match.end()
+
+    if not pieces:
+        return text
+    pieces.append(text[last:])
+    return ''.join(pieces)
+
+
+@lru_cache(maxsize=32)
+def _fence_close_pattern(marker: str) -> re.Pattern:
+    """
+    Closing fence for an opening marker: same character, at least as long
+
+    As in block_scanner.closes_fence, at most three leading spaces are
+    allowed, and any other whitespace around the marker is ignored.
+    """
+    return re.compile(r'\n {0,3}(?:[^\S\n ][^\S\n]*)?' + re.escape(marker)
+                      + re.escape(marker[0]) + r'*[^\S\n]*(?=\n|\Z)')
+
+
+def _fenced_blocks(content: str) -> Iterator[Tuple[int, int]]:
+    """
+    Find fenced code blocks
+
+    Args:
+        content: Markdown content
+
+    Yields:
+        (start, end) offsets of each block, from its opening line to its
+        closing fence (or the end of the content if it is never closed)
+    """
+    # A leading newline lets a fence on the first line match; offsets in
+    # ``text`` map back to ``content`` as start -> start, end -> end - 1
+    text = '\n' + content
+    pos = 0
+    while True:
+        opening = FENCE_OPEN_PATTERN.search(text, pos)
+        if opening is None:
+            return
+        closing = _fence_close_pattern(opening.group(1) or opening.group(2)).search(text, opening.end())
+        pos = closing.end() if closing is not None else len(text)
+        yield opening.start(), pos - 1
+
+
+def _emojize_text(text: str, names: Dict[str, str]) -> str:
+    """Replace shortcodes in text outside fenced code, skipping inline code spans"""
+    get = names.get
+
+    def replace(match):
+        found = match.group(0)
+        if found[0] == '`':
+            return found
+        # Names never contain colons, so this only hits single shortcodes
+        emj = get(found[1:-1])
+        if emj is not None:
+            return emj
+        if found.count(':') > 2:
+            return _replace_chain(found, names)
+        return _lookup(found[1:-1], names) or found
+
+    pattern = CODE_OR_SHORTCODE_PATTERN if '`' in text else SHORTCODE_CHAIN_PATTERN
+    return pattern.sub(replace, text)
+
+
+def _has_known_shortcode(content: str, names: Dict[str, str]) -> bool:
+    """Check if any candidate shortcode in the content names an emoji"""
+    return any(_lookup(match.group(1), names) is not None
+               for match in CANDIDATE_NAME_PATTERN.finditer(content))
+
+
+def emojize_markdown(content: str) -> str:
+    """
+    Convert :shortcodes: to Unicode emoji outside fenced and inline code
+
+    Args:
+        content: Markdown content
+
+    Returns:
+        Content with shortcodes replaced (the same object if nothing changed)
+    """
+    if ':' not in content:
+        return content
+    names = alias_map()
+    if not _has_known_shortcode(content, names):
+        return content
+
+    pieces: List[str] = []
+    last = 0
+    if '```' in content or '~~~' in content:
+        for start, end in _fenced_blocks(content):
+            pieces.append(_emojize_text(content[last:start], names))
+            pieces.append(content[start:end])
+            last = end
+    pieces.append(_emojize_text(content[last:], names))
+
+    result = ''.join(pieces)
+    return content if result == content else result
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Cached Pygments highlighting for the codehilite and fenced_code extensions
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Tuple
+import logging
+
+from markdown.extensions import codehilite, fenced_code
+from markdown.extensions.codehilite import CodeHilite
+from pygments import highlight
+from pygments.formatters import HtmlFormatter, get_formatter_by_name
+from pygments.lexers import get_lexer_by_name, guess_lexer
+from pygments.util import ClassNotFound
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# Highlighted blocks kept in memory (most recently used last)
+MAX_CACHED_BLOCKS = 4096
+
+_html_cache: 'OrderedDict[Tuple, str]' = OrderedDict()
+_lexer_cache: Dict[Tuple, Any] = {}
+_formatter_cache: Dict[Tuple, Any] = {}
+
+# Batch and server mode parse in executor threads; the caches and counters
+# are only touched under this lock (highlighting itself runs outside it)
+_lock = threading.Lock()
+
+_stats = {
+    'hits': 0,
+    'misses': 0,
+    'lexer_hits': 0,
+    'lexer_misses': 0,
+    'formatter_hits': 0,
+    'formatter_misses': 0,
+}
+
+
+def _freeze(value: Any) -> Hashable:
+    """Turn option values (lists, dicts) into something hashable"""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(item) for item in value)
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return repr(value)
+
+
+def _cached_lexer(lang: str, options: Dict[str, Any]):
+    """Resolve a lexer by name once per (language, options)"""
+    key = (lang, _freeze(options))
+    with _lock:
+        lexer = _lexer_cache.get(key)
+        _stats['lexer_misses' if lexer is None else 'lexer_hits'] += 1
+    if lexer is None:
+        lexer = get_lexer_by_name(lang, **options)
+        with _lock:
+            lexer = _lexer_cache.setdefault(key, lexer)
+    return lexer
+
+
+def _cached_formatter(name: Any, lang_str: str, options: Dict[str, Any]):
+    """Resolve a formatter once per (formatter, language, options)"""
+    key = (name if isinstance(name, str) else id(name), lang_str, _freeze(options))
+    with _lock:
+        formatter = _formatter_cache.get(key)
+        _stats['formatter_misses' if formatter is None else 'formatter_hits'] += 1
+    if formatter is not None:
+        return formatter
+
+    if isinstance(name, str):
+        try:
+            formatter = get_formatter_by_name(name, **options)
+        except ClassNotFound:
+            formatter = get_formatter_by_name('html', **options)
+    else:
+        formatter = name(lang_str=lang_str, **options)
+    with _lock:
+        return _formatter_cache.setdefault(key, formatter)
+
+
+class CompactHtmlFormatter(HtmlFormatter):
+    """
+    Class-based HtmlFormatter that only wraps tokens the style colours.
+
+    The stock formatter gives every token a span (``<span class="n">``) even
+    when its style is empty. This one emits the class of the nearest styled
+    token type, exactly where ``noclasses`` would emit an inline style, so
+    the markup stays as small as the classes allow.
+    """
+
+    def _get_css_classes(self, ttype):
+        css_class = self._get_css_inline_styles(ttype)
+        return self.classprefix + css_class if css_class else ''
+
+
+# CompactHtmlFormatter overrides private HtmlFormatter methods; on a Pygments
+# release without them, class mode falls back to the stock formatter
+COMPACT_FORMATTER_SUPPORTED = all(
+    callable(getattr(HtmlFormatter, name, None))
+    for name in ('_get_css_classes', '_get_css_inline_styles')
+)
+
+
+class CachedCodeHilite(CodeHilite):
+    """
+    CodeHilite that reuses lexers, formatters and previously highlighted
+    blocks.
+
+    Blocks are cached on everything that affects the output: source,
+    language, options (style, noclasses, line numbers, ...), formatter and
+    language prefix.
+    """
+
+    def hilite(self, shebang: bool = True) -> str:
+        if not (codehilite.pygments and self.use_pygments):
+            return super().hilite(shebang)
+
+        key = (
+            self.src, self.lang, shebang, self.guess_lang, self.lang_prefix,
+            self.pygments_formatter if isinstance(self.pygments_formatter, str)
+            else id(self.pygments_formatter),
+            _freeze(self.options),
+        )
+        with _lock:
+            cached = _html_cache.get(key)
+            if cached is not None:
+                _html_cache.move_to_end(key)
+                _stats['hits'] += 1
+                return cached
+            _stats['misses'] += 1
+
+        html = self._highlight(shebang)
+        with _lock:
+            _html_cache[key] = html
+            _html_cache.move_to_end(key)
+            while len(_html_cache) > MAX_CACHED_BLOCKS:
+                _html_cache.popitem(last=False)
+        return html
+
+    def _highlight(self, shebang: bool) -> str:
+        """CodeHilite.hilite() with cached lexer and formatter lookups"""
+        self.src = self.src.strip('\n')
+
+        if self.lang is None and shebang:
+            self._parseHeader()
+
+        try:
+            lexer = _cached_lexer(self.lang, self.options)
+        except ValueError:
+            try:
+                if self.guess_lang:
+                    lexer = guess_lexer(self.src, **self.options)
+                else:
+                    lexer = _cached_lexer('text', self.options)
+            except ValueError:
+                lexer = _cached_lexer('text', self.options)
+        if not self.lang:
+            # Use the guessed lexer's language instead
+            self.lang = lexer.aliases[0]
+        lang_str = f'{self.lang_prefix}{self.lang}'
+        formatter = _cached_formatter(self.pygments_formatter, lang_str, self.options)
+        return highlight(self.src, lexer, formatter)
+
+
+def install():
+    """
+    Make codehilite and fenced_code highlight through CachedCodeHilite
+
+    Both extensions look ``CodeHilite`` up in their module namespace at
+    conversion time, so swapping the name is enough. Safe to call repeatedly.
+    """
+    codehilite.CodeHilite = CachedCodeHilite
+    fenced_code.CodeHilite = CachedCodeHilite
+
+
+def get_stats() -> Dict[str, Any]:
+    """
+    Get highlighting cache counters for this process
+
+    Returns:
+        Dictionary with hits, misses and hit rates
+    """
+    with _lock:
+        stats: Dict[str, Any] = dict(_stats)
+        stats['cached_blocks'] = len(_html_cache)
+    total = stats['hits'] + stats['misses']
+    stats['hit_rate'] = stats['hits'] / total if total else 0.0
+    lexer_total = stats['lexer_hits'] + stats['lexer_misses']
+    stats['lexer_hit_rate'] = stats['lexer_hits'] / lexer_total if lexer_total else 0.0
+    return stats
+
+
+def stats_since(before: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Get the counters accumulated since an earlier get_stats() snapshot
+
+    Args:
+        before: Earlier snapshot
+
+    Returns:
+        Dictionary with the differences and the hit rate over that span
+    """
+    now = get_stats()
+    delta = {key: now[key] - before.get(key, 0) for key in _stats}
+    total = delta['hits'] + delta['misses']
+    delta['hit_rate'] = delta['hits'] / total if total else 0.0
+    return delta
+
+
+def clear():
+    """
+    Drop all cached blocks, lexers and formatters
+    """
+    with _lock:
+        _html_cache.clear()
+        _lexer_cache.clear()
+        _formatter_cache.clear()
@@ -4,13 +4,26 @@ Advanced Markdown Parser with emoji and extensions support
 """
 
 import re
-import markdown
-from markdown.extensions import codehilite, tables, toc, fenced_code
-from markdown.extensions.extra import ExtraExtension
-import emoji
+from collections import OrderedDict
 from typing import Dict, List, Tuple, Optional
 import logging
 
+from cache import ParseCache
+from profiling import span
+from . import highlight_cache
+from .highlight_cache import COMPACT_FORMATTER_SUPPORTED, CompactHtmlFormatter
+from .block_scanner import MermaidScanner
+from .emoji_shortcodes import emojize_markdown
+from .parallel import MIN_PARALLEL_CHARS, SectionPool, create_markdown
+from .sections import (
+    build_footnotes,
+    build_toc,
+    convert_section,
+    needs_whole_document,
+    split_sections,
+    stitch_sections,
+)
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -26,13 +39,41 @@ class MarkdownParser:
     - Mermaid diagram extraction
     """
     
-    def __init__(self, custom_extensions: Optional[List[str]] = None):
+    def __init__(self, custom_extensions: Optional[List[str]] = None,
+                 cache: Optional[ParseCache] = None,
+                 incremental: bool = False,
+                 workers: int = 1,
+                 highlight_classes: bool = False,
+                 section_pool: Optional[SectionPool] = None):
         """
         Initialize the parser with extensions
         
         Args:
             custom_extensions: Optional list of additional markdown extensions
+            cache: Optional parse cache; byte-identical documents skip conversion
+            incremental: Convert top-level sections separately and reuse the
+                HTML of sections that did not change
+            workers: Processes converting sections in parallel (> 1 implies
+                section-by-section conversion)
+            highlight_classes: Emit Pygments CSS classes instead of inline
+                styles on code tokens; the stylesheet for highlight_style
+                must then be embedded in the page (see HTMLGenerator)
+            section_pool: Optional pool shared with other parsers built with
+                the same options; it is left running by close()
         """
+        self.cache = cache
+        self.incremental = incremental or workers > 1
+        self.workers = max(1, workers)
+        self._pool = section_pool
+        self._owns_pool = section_pool is None
+        self.highlight_classes = highlight_classes
+        self.highlight_style = 'default'
+        
+        # Converted sections of incremental runs, most recently used last
+        self._section_cache: OrderedDict = OrderedDict()
+        self.section_cache_size = 4096
+        self.section_stats = {'sections': 0, 'converted': 0}
+        
         self.extensions = [
             'markdown.extensions.extra',
             'markdown.extensions.codehilite',
@@ -56,7 +97,8 @@ class MarkdownParser:
             'markdown.extensions.codehilite': {
                 'css_class': 'highlight',
                 'use_pygments': True,
-                'noclasses': True,
+                'noclasses': not highlight_classes,
+                'pygments_style': self.highlight_style,
             },
             'markdown.extensions.toc': {
                 'anchorlink': True,
@@ -69,73 +111,177 @@ class MarkdownParser:
             'markdown.extensions.fenced_code': {},
         }
         
-        # Initialize markdown processor
-        self.md = markdown.Markdown(
-            extensions=self.extensions,
-            extension_configs=self.extension_configs,
-            tab_length=4,
-            safe_mode=False,
-        )
+        if highlight_classes:
+            if COMPACT_FORMATTER_SUPPORTED:
+                self.extension_configs['markdown.extensions.codehilite']['pygments_formatter'] = CompactHtmlFormatter
+            else:
+                logger.warning("Pygments lacks the HtmlFormatter internals CompactHtmlFormatter "
+                               "overrides; using the stock class-based formatter")
         
-        # Mermaid diagram patterns
-        self.mermaid_patterns = [
-            r'```mermaid\s*\n(.*?)\n```',
-            r'```\s*mermaid\s*\n(.*?)\n```',
-            r'<div class="mermaid">(.*?)</div>',
-        ]
+        # Initialize markdown processor
+        self.md = create_markdown(self.extensions, self.extension_configs)
     
-    def extract_mermaid_diagrams(self, content: str) -> Tuple[str, List[Dict]]:
+    def extract_mermaid_diagrams(self, content: str, line_offset: int = 0) -> Tuple[str, List[Dict]]:
         """
         Extract Mermaid diagrams from markdown content
         
         Args:
             content: Raw markdown content
+            line_offset: Lines removed before ``content`` (front matter), so
+                diagram line numbers refer to the source file
             
         Returns:
             Tuple of (content_without_mermaid, list_of_mermaid_diagrams)
         """
-        diagrams = []
-        processed_content = content
-        
-        for i, pattern in enumerate(self.mermaid_patterns):
-            matches = re.finditer(pattern, processed_content, re.DOTALL | re.MULTILINE)
-            
-            for match in matches:
-                diagram_id = f"mermaid-{len(diagrams)}"
-                diagram_content = match.group(1).strip()
-                
-                diagrams.append({
-                    'id': diagram_id,
-                    'content': diagram_content,
-                    'placeholder': f'<div id="{diagram_id}" class="mermaid-placeholder"></div>'
-                })
-                
-                # Replace diagram with placeholder
-                processed_content = processed_content.replace(
-                    match.group(0),
-                    f'<div id="{diagram_id}" class="mermaid-placeholder"></div>'
-                )
+        processed_content, diagrams = MermaidScanner(line_offset).scan(content)
         
         logger.info(f"Extracted {len(diagrams)} Mermaid diagrams")
         return processed_content, diagrams
     
+    def convert_incremental(self, content: str) -> Optional[Tuple[str, str, List[Dict]]]:
+        """
+        Convert a document section by section, reusing unchanged sections
+        
+        Sections start at top-level ATX headings. Reference links,
+        abbreviations and footnotes defined elsewhere are appended to the
+        sections that use them; header ids, footnote numbers, the footnote
+        list and the TOC are then rebuilt for the whole document.
+        
+        Args:
+            content: Markdown content (front matter and diagrams already removed)
+            
+        Returns:
+            Tuple of (html, toc, toc_tokens), or None if the document must be
+            converted whole
+        """
+        if needs_whole_document(content):
+            return None
+        
+        sections, definitions = split_sections(content)
+        if len(sections) < 2:
+            return None
+        
+        converted = []
+        pending = []
+        for index, section in enumerate(sections):
+            extra = definitions.for_section(section)
+            text = f"{section}\n\n{extra}" if extra else section
+            result = self._get_section(text)
+            if result is None:
+                pending.append((index, text))
+            converted.append(result)
+        
+        for (index, text), result in zip(pending, self._convert_sections([t for _, t in pending])):
+            converted[index] = result
+            self._set_section(text, result)
+        misses = len(pending)
+        
+        html_content, tokens, ref_counts = stitch_sections(
+            self.md, converted, list(definitions.footnotes)
+        )
+        footnotes = build_footnotes(self.md, definitions.footnotes, ref_counts)
+        if footnotes:
+            html_content = f"{html_content}\n{footnotes}"
+        toc, toc_tokens = build_toc(self.md, tokens)
+        
+        self.section_stats = {'sections': len(sections), 'converted': misses}
+        logger.info(f"Incremental conversion: {misses} of {len(sections)} sections converted")
+        return html_content, toc, toc_tokens
+    
+    def _convert_sections(self, texts: List[str]) -> List[Dict]:
+        """
+        Convert sections, in worker processes when it pays off
+        
+        Args:
+            texts: Section sources with their definitions appended
+            
+        Returns:
+            Converted sections, in order
+        """
+        if (self.workers > 1 and len(texts) > 1
+                and sum(len(text) for text in texts) >= MIN_PARALLEL_CHARS):
+            if self._pool is None:
+                self._pool = self.create_section_pool()
+            return self._pool.convert(texts)
+        return [convert_section(self.md, text) for text in texts]
+    
+    def create_section_pool(self) -> SectionPool:
+        """
+        Create a section pool for this parser's extensions and worker count
+        
+        Returns:
+            SectionPool that can also be passed to other parsers built with
+            the same options
+        """
+        return SectionPool(self.extensions, self.extension_configs, self.workers)
+    
+    def close(self):
+        """
+        Stop the section worker processes, if this parser started them
+        """
+        if self._pool is not None and self._owns_pool:
+            self._pool.close()
+            self._pool = None
+    
+    def _get_section(self, text: str) -> Optional[Dict]:
+        """
+        Look up a converted section in memory, then in the parse cache
+        
+        Args:
+            text: Section source with its definitions appended
+            
+        Returns:
+            Converted section or None on a miss
+        """
+        memory_key = ParseCache.make_key(text)
+        result = self._section_cache.get(memory_key)
+        if result is not None:
+            self._section_cache.move_to_end(memory_key)
+            return result
+        
+        if self.cache is not None:
+            result = self.cache.get(
+                self.cache.section_key(text, self.extensions, self.extension_configs)
+            )
+            if result is not None:
+                self._remember_section(memory_key, result)
+        return result
+    
+    def _set_section(self, text: str, result: Dict):
+        """
+        Store a converted section in memory and in the parse cache
+        
+        Args:
+            text: Section source with its definitions appended
+            result: Converted section
+        """
+        self._remember_section(ParseCache.make_key(text), result)
+        if self.cache is not None:
+            self.cache.set(
+                self.cache.section_key(text, self.extensions, self.extension_configs),
+                result
+            )
+    
+    def _remember_section(self, key: str, result: Dict):
+        """Keep a converted section in the bounded in-memory cache"""
+        self._section_cache[key] = result
+        self._section_cache.move_to_end(key)
+        while len(self._section_cache) > self.section_cache_size:
+            self._section_cache.popitem(last=False)
+    
     def process_emojis(self, content: str) -> str:
         """
         Process emojis in content (both Unicode and :shortcodes:)
         
+        Shortcodes inside fenced and inline code are left untouched.
+        
         Args:
             content: Content with emojis
             
         Returns:
             Content with processed emojis
         """
-        # Convert :shortcodes: to Unicode emojis
-        content = emoji.emojize(content, language='alias')
-        
-        # Ensure Unicode emojis are properly handled
-        content = content.encode('utf-8').decode('utf-8')
-        
-        return content
+        return emojize_markdown(content)
     
     def parse_metadata(self, content: str) -> Tuple[str, Dict]:
         """
@@ -172,29 +318,59 @@ class MarkdownParser:
         Returns:
             Dictionary with parsed content and metadata
         """
+        with span('parse', cprofile=True, input_chars=len(content)) as stage:
+            result = self._parse(content)
+            stage.record(html_chars=len(result['html']))
+        return result
+    
+    def _parse(self, content: str) -> Dict:
+        """Parse markdown content (see parse())"""
         logger.info("Starting markdown parsing...")
+        highlight_before = highlight_cache.get_stats()
+        
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.document_key(content, self.extensions, self.extension_configs,
+                                                self.incremental)
+            with span('parse.cache_lookup'):
+                cached = self.cache.get(cache_key)
+            if cached is not None:
+                cached['stats']['highlight'] = highlight_cache.stats_since(highlight_before)
+                logger.info(f"Parse cache hit: {cached['stats']}")
+                return cached
         
         # 1. Parse metadata
+        source_lines = content.count('\n')
         content, metadata = self.parse_metadata(content)
+        line_offset = source_lines - content.count('\n')
         
         # 2. Process emojis
-        content = self.process_emojis(content)
+        with span('parse.emoji'):
+            content = self.process_emojis(content)
         
         # 3. Extract Mermaid diagrams
-        content, mermaid_diagrams = self.extract_mermaid_diagrams(content)
-        
-        # 4. Convert to HTML
-        html_content = self.md.convert(content)
+        with span('parse.mermaid_extract'):
+            content, mermaid_diagrams = self.extract_mermaid_diagrams(content, line_offset)
         
-        # 5. Get TOC if available
-        toc = getattr(self.md, 'toc', '')
-        
-        # 6. Reset markdown instance for next use
-        self.md.reset()
+        # 4. Convert to HTML (section by section when incremental)
+        with span('parse.convert'):
+            converted = self.convert_incremental(content) if self.incremental else None
+            if converted is not None:
+                html_content, toc, toc_tokens = converted
+            else:
+                html_content = self.md.convert(content)
+                
+                # 5. Get TOC (HTML and nested heading tokens) if available
+                toc = getattr(self.md, 'toc', '')
+                toc_tokens = getattr(self.md, 'toc_tokens', [])
+                
+                # 6. Reset markdown instance for next use
+                self.md.reset()
         
         result = {
             'html': html_content,
             'toc': toc,
+            'toc_tokens': toc_tokens,
             'metadata': metadata,
             'mermaid_diagrams': mermaid_diagrams,
             'stats': {
@@ -202,9 +378,13 @@ class MarkdownParser:
                 'words': len(content.split()),
                 'chars': len(content),
                 'mermaid_count': len(mermaid_diagrams),
+                'highlight': highlight_cache.stats_since(highlight_before),
             }
         }
         
+        if cache_key is not None:
+            self.cache.set(cache_key, result)
+        
         logger.info(f"Parsing complete: {result['stats']}")
         return result
     
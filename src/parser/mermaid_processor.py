@@ -4,40 +4,106 @@ Mermaid Diagram Processor using Playwright
 """
 
 import asyncio
-import tempfile
-import os
+import hashlib
+import json
 import base64
 import logging
 from typing import Dict, List, Optional
-from playwright.async_api import async_playwright
+
+from browser import RenderSession
+from browser.assets import MERMAID_VERSION, MERMAID_URL
+from cache import SVGCache
+from profiling import span
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+# Options passed to mermaid.initialize(); part of the SVG cache key
+MERMAID_CONFIG = {
+    'theme': 'default',
+    'securityLevel': 'loose',
+    'themeVariables': {
+        'primaryColor': '#3498db',
+        'primaryTextColor': '#2c3e50',
+        'primaryBorderColor': '#2980b9',
+        'lineColor': '#34495e',
+        'sectionBkgColor': '#ecf0f1',
+        'altSectionBkgColor': '#bdc3c7',
+        'gridColor': '#95a5a6',
+        'secondaryColor': '#e74c3c',
+        'tertiaryColor': '#f39c12',
+    },
+    'flowchart': {
+        'useMaxWidth': True,
+        'htmlLabels': True,
+        'curve': 'basis',
+    },
+    'sequence': {
+        'diagramMarginX': 50,
+        'diagramMarginY': 10,
+        'actorMargin': 50,
+        'width': 150,
+        'height': 65,
+        'boxMargin': 10,
+        'boxTextMargin': 5,
+        'noteMargin': 10,
+        'messageMargin': 35,
+        'mirrorActors': True,
+        'bottomMarginAdj': 1,
+        'useMaxWidth': True,
+        'rightAngles': False,
+        'showSequenceNumbers': False,
+    },
+    'gantt': {
+        'titleTopMargin': 25,
+        'barHeight': 20,
+        'fontSize': 11,
+        'sidePadding': 75,
+        'leftPadding': 75,
+        'gridLineStartPadding': 35,
+        'fontFamily': '"Open Sans", sans-serif',
+        'numberSectionStyles': 4,
+        'axisFormat': '%Y-%m-%d',
+    },
+}
+
+
 class MermaidProcessor:
     """
     Process Mermaid diagrams to SVG using Playwright
     """
     
-    def __init__(self, timeout: int = 60000, scale: float = 2.0):
+    def __init__(self, timeout: int = 60000, scale: float = 2.0,
+                 session: Optional[RenderSession] = None,
+                 max_concurrency: int = 4,
+                 cache: Optional[SVGCache] = None):
         """
         Initialize Mermaid processor
         
         Args:
             timeout: Timeout for rendering in milliseconds
             scale: Scale factor for high-DPI rendering
+            session: Shared render session (a private one is created if omitted)
+            max_concurrency: Pages in flight when a private session is created
+            cache: Optional persistent SVG cache consulted before rendering
         """
         self.timeout = timeout
         self.scale = scale
+        self.session = session
+        self.max_concurrency = max_concurrency
+        self._owns_session = False
+        self.cache = cache
+        self.mermaid_config = MERMAID_CONFIG
+        self.viewport = {"width": 1200, "height": 800}
         self.mermaid_html_template = """
 <!DOCTYPE html>
 <html>
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <script src="https://cdn.jsdelivr.net/npm/mermaid@10.6.1/dist/mermaid.min.js"></script>
+    <script src="{mermaid_url}"></script>
     <style>
         body {
             font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
@@ -45,103 +111,174 @@ class MermaidProcessor:
             padding: 20px;
             background: white;
         }
-        .mermaid {
-            display: flex;
-            justify-content: center;
-            align-items: center;
-            min-height: 300px;
-            text-align: center;
-        }
-        .mermaid svg {
-            max-width: 100%;
-            height: auto;
-        }
-        #diagram-container {
+        #render-area {
             width: 100%;
-            min-height: 400px;
-            display: flex;
-            justify-content: center;
-            align-items: center;
         }
     </style>
 </head>
 <body>
-    <div id="diagram-container">
-        <div class="mermaid">
-{mermaid_content}
-        </div>
-    </div>
+    <div id="render-area"></div>
     <script>
-        document.addEventListener('DOMContentLoaded', function() {
-            try {
-                mermaid.initialize({
-                    startOnLoad: true,
-                    theme: 'default',
-                    securityLevel: 'loose',
-                    themeVariables: {
-                        primaryColor: '#3498db',
-                        primaryTextColor: '#2c3e50',
-                        primaryBorderColor: '#2980b9',
-                        lineColor: '#34495e',
-                        sectionBkgColor: '#ecf0f1',
-                        altSectionBkgColor: '#bdc3c7',
-                        gridColor: '#95a5a6',
-                        secondaryColor: '#e74c3c',
-                        tertiaryColor: '#f39c12'
-                    },
-                    flowchart: {
-                        useMaxWidth: true,
-                        htmlLabels: true,
-                        curve: 'basis'
-                    },
-                    sequence: {
-                        diagramMarginX: 50,
-                        diagramMarginY: 10,
-                        actorMargin: 50,
-                        width: 150,
-                        height: 65,
-                        boxMargin: 10,
-                        boxTextMargin: 5,
-                        noteMargin: 10,
-                        messageMargin: 35,
-                        mirrorActors: true,
-                        bottomMarginAdj: 1,
-                        useMaxWidth: true,
-                        rightAngles: false,
-                        showSequenceNumbers: false
-                    },
-                    gantt: {
-                        titleTopMargin: 25,
-                        barHeight: 20,
-                        fontSize: 11,
-                        sidePadding: 75,
-                        leftPadding: 75,
-                        gridLineStartPadding: 35,
-                        fontFamily: '"Open Sans", sans-serif',
-                        numberSectionStyles: 4,
-                        axisFormat: '%Y-%m-%d'
-                    }
+        mermaid.initialize(Object.assign({ startOnLoad: false }, {mermaid_config}));
+        
+        // Render each diagram independently, each with its own time limit,
+        // so one syntax error or slow diagram does not take the batch down.
+        // A timed-out mermaid.render() cannot be cancelled and keeps running,
+        // so timedOut tells the caller not to reuse this page.
+        window.renderMermaidDiagrams = async function(diagrams, timeoutMs) {
+            const container = document.getElementById('render-area');
+            const results = [];
+            let timedOut = false;
+            // Text is measured during layout, so fonts must be in place first
+            await document.fonts.ready;
+            for (const diagram of diagrams) {
+                let timer;
+                const timeout = new Promise((_, reject) => {
+                    timer = setTimeout(() => {
+                        timedOut = true;
+                        reject(new Error('Timed out after ' + timeoutMs + ' ms'));
+                    }, timeoutMs);
                 });
-                
-                // Force rendering after a small delay
-                setTimeout(function() {
-                    try {
-                        mermaid.run();
-                        console.log('Mermaid rendering completed');
-                    } catch (error) {
-                        console.error('Error during mermaid.run():', error);
-                    }
-                }, 100);
-                
-            } catch (error) {
-                console.error('Error initializing Mermaid:', error);
+                try {
+                    const { svg } = await Promise.race([
+                        mermaid.render(diagram.id, diagram.source, container),
+                        timeout,
+                    ]);
+                    results.push({ id: diagram.id, svg: svg });
+                } catch (error) {
+                    results.push({ id: diagram.id, error: String((error && error.message) || error) });
+                } finally {
+                    clearTimeout(timer);
+                }
+                // Mermaid leaves its scratch element behind on failure
+                const leftover = document.getElementById('d' + diagram.id);
+                if (leftover) {
+                    leftover.remove();
+                }
             }
-        });
+            container.innerHTML = '';
+            return { results: results, timedOut: timedOut };
+        };
+        
+        window.mermaidRenderPageReady = true;
     </script>
 </body>
 </html>
         """
     
+    @staticmethod
+    def render_id(mermaid_content: str) -> str:
+        """
+        Get the DOM id used when rendering a diagram
+        
+        Derived from the source so that cached SVGs never carry a
+        position-dependent id into another document.
+        
+        Args:
+            mermaid_content: Mermaid diagram code
+            
+        Returns:
+            Render id for mermaid.render()
+        """
+        digest = hashlib.sha1(mermaid_content.encode('utf-8')).hexdigest()[:12]
+        return f"mermaid-svg-{digest}"
+    
+    def build_render_page(self) -> str:
+        """
+        Build the render page HTML with Mermaid loaded and initialized
+        
+        Returns:
+            Render page HTML
+        """
+        return (
+            self.mermaid_html_template
+            .replace('{mermaid_url}', MERMAID_URL)
+            .replace('{mermaid_config}', json.dumps(self.mermaid_config))
+        )
+    
+    async def _prepare_render_page(self, page):
+        """
+        Load the render page unless the pooled page already has it
+        
+        Args:
+            page: Playwright page borrowed from the pool
+        """
+        already_loaded = await page.evaluate("() => window.mermaidRenderPageReady === true")
+        if already_loaded:
+            return
+        
+        await page.set_viewport_size(self.viewport)
+        await page.set_content(self.build_render_page(), timeout=self.timeout)
+        await page.wait_for_function(
+            "() => window.mermaidRenderPageReady === true", timeout=self.timeout
+        )
+    
+    async def render_diagrams(self, diagrams: List[Dict]) -> Dict[str, Dict[str, str]]:
+        """
+        Render several Mermaid diagrams in a single preloaded page
+        
+        Mermaid is loaded once and mermaid.render() is called for every
+        diagram, so there is no per-diagram navigation or library parse.
+        Each diagram gets ``self.timeout`` on its own; one that runs over is
+        reported as failed and the others still render. The whole batch is
+        bounded by that budget times the number of diagrams. After any
+        timeout the page is closed rather than returned to the pool, since
+        the abandoned render may still be running in it.
+        
+        Args:
+            diagrams: List of diagram dictionaries with id and content
+            
+        Returns:
+            Dictionary mapping diagram IDs to {'svg': ...} or {'error': ...}
+        """
+        if not diagrams:
+            return {}
+        
+        # Identical sources are rendered once
+        sources = {}
+        for diagram in diagrams:
+            sources.setdefault(self.render_id(diagram['content']), diagram['content'])
+        
+        logger.info(f"Rendering {len(sources)} unique diagram(s) in one page...")
+        
+        batch_timeout = self.timeout / 1000 * len(sources)
+        async with self._get_session().page() as page:
+            await self._prepare_render_page(page)
+            try:
+                outcome = await asyncio.wait_for(
+                    page.evaluate(
+                        "([diagrams, timeoutMs]) => window.renderMermaidDiagrams(diagrams, timeoutMs)",
+                        [[{'id': render_id, 'source': source} for render_id, source in sources.items()],
+                         self.timeout]
+                    ),
+                    timeout=batch_timeout
+                )
+            except asyncio.TimeoutError:
+                outcome = {
+                    'results': [
+                        {'id': render_id, 'error': f"Timed out after {batch_timeout:.1f} s"}
+                        for render_id in sources
+                    ],
+                    'timedOut': True,
+                }
+            if outcome['timedOut']:
+                # A closed page is discarded by the pool instead of reused
+                logger.warning("Mermaid render timed out; discarding its page")
+                await page.close()
+        
+        by_render_id = {item['id']: item for item in outcome['results']}
+        results = {}
+        for diagram in diagrams:
+            item = by_render_id.get(self.render_id(diagram['content']), {})
+            if item.get('svg'):
+                results[diagram['id']] = {'svg': item['svg']}
+            else:
+                error = item.get('error', 'No SVG returned')
+                logger.error(f"Failed to render diagram {diagram['id']}: {error}")
+                results[diagram['id']] = {'error': error}
+        
+        return results
+    
     async def render_diagram(self, diagram_id: str, mermaid_content: str) -> Optional[str]:
         """
         Render a single Mermaid diagram to SVG
@@ -153,89 +290,11 @@ class MermaidProcessor:
         Returns:
             SVG content as string or None if failed
         """
-        temp_html_path = None
         try:
-            logger.info(f"Rendering diagram {diagram_id}...")
-            
-            # Create temporary HTML file
-            html_content = self.mermaid_html_template.format(
-                mermaid_content=mermaid_content
-            )
-            
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.html', delete=False, encoding='utf-8') as f:
-                f.write(html_content)
-                temp_html_path = f.name
-            
-            logger.debug(f"Created temporary HTML file: {temp_html_path}")
-            
-            async with async_playwright() as p:
-                # Launch browser with more options
-                browser = await p.chromium.launch(
-                    headless=True,
-                    args=['--no-sandbox', '--disable-setuid-sandbox']
-                )
-                page = await browser.new_page()
-                
-                # Set viewport for consistent rendering
-                await page.set_viewport_size({"width": 1200, "height": 800})
-                
-                # Navigate to the HTML file
-                await page.goto(f"file://{temp_html_path}")
-                
-                # Wait for page to load
-                await page.wait_for_load_state('networkidle')
-                
-                # Wait for diagram container to be ready
-                await page.wait_for_selector('#diagram-container', timeout=5000)
-                
-                # Wait for Mermaid to initialize and render
-                try:
-                    await page.wait_for_selector('.mermaid svg', timeout=self.timeout)
-                    logger.info(f"SVG found for diagram {diagram_id}")
-                except Exception as e:
-                    logger.warning(f"SVG not found immediately for {diagram_id}, trying alternative approach: {e}")
-                    
-                    # Try to force render
-                    await page.evaluate("""
-                        if (window.mermaid) {
-                            window.mermaid.run();
-                        }
-                    """)
-                    
-                    # Wait a bit more
-                    await page.wait_for_timeout(5000)
-                    
-                    # Try again with longer timeout
-                    await page.wait_for_selector('.mermaid svg', timeout=30000)
-                
-                # Additional wait for complete rendering
-                await page.wait_for_timeout(3000)
-                
-                # Get the SVG element
-                svg_element = await page.query_selector('.mermaid svg')
-                if not svg_element:
-                    logger.error(f"No SVG found for diagram {diagram_id} after all attempts")
-                    return None
-                
-                # Get the outer HTML to include the SVG tag
-                svg_outer = await svg_element.evaluate('element => element.outerHTML')
-                
-                await browser.close()
-                
-                # Clean up temporary file
-                os.unlink(temp_html_path)
-                
-                logger.info(f"Successfully rendered diagram {diagram_id}")
-                return svg_outer
-                
+            results = await self.render_diagrams([{'id': diagram_id, 'content': mermaid_content}])
+            return results[diagram_id].get('svg')
         except Exception as e:
             logger.error(f"Failed to render diagram {diagram_id}: {e}")
-            # Clean up temporary file if it exists
-            if temp_html_path and os.path.exists(temp_html_path):
-                try:
-                    os.unlink(temp_html_path)
-                except:
-                    pass
             return None
     
     async def process_diagrams(self, diagrams: List[Dict]) -> Dict[str, str]:
@@ -248,29 +307,76 @@ class MermaidProcessor:
         Returns:
             Dictionary mapping diagram IDs to SVG content
         """
-        logger.info(f"Processing {len(diagrams)} Mermaid diagrams...")
-        
-        results = {}
-        
-        # Process diagrams concurrently
-        tasks = []
-        for diagram in diagrams:
-            task = self.render_diagram(diagram['id'], diagram['content'])
-            tasks.append(task)
-        
-        # Wait for all tasks to complete
-        svg_results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Collect successful results
-        for i, result in enumerate(svg_results):
-            if isinstance(result, Exception):
-                logger.error(f"Failed to process diagram {diagrams[i]['id']}: {result}")
-            elif result:
-                results[diagrams[i]['id']] = result
+        with span('mermaid', cprofile=True, diagrams=len(diagrams)) as stage:
+            logger.info(f"Processing {len(diagrams)} Mermaid diagrams...")
+            
+            results = {}
+            
+            # Serve unchanged diagrams from the cache, render the rest
+            pending = []
+            cache_keys = {}
+            with span('mermaid.cache_lookup'):
+                for diagram in diagrams:
+                    if self.cache is not None:
+                        key = self.cache.diagram_key(
+                            diagram['content'], MERMAID_VERSION, self.mermaid_config, self.viewport
+                        )
+                        cache_keys[diagram['id']] = key
+                        cached_svg = self.cache.get(key)
+                        if cached_svg is not None:
+                            results[diagram['id']] = cached_svg
+                            continue
+                    pending.append(diagram)
+            
+            if pending:
+                try:
+                    with span('mermaid.render', diagrams=len(pending)):
+                        rendered = await self.render_diagrams(pending)
+                except Exception as e:
+                    logger.error(f"Failed to render Mermaid diagrams: {e}")
+                    rendered = {}
+                finally:
+                    if self._owns_session:
+                        await self.close()
+                
+                # Collect successful results
+                for diagram in pending:
+                    svg_content = rendered.get(diagram['id'], {}).get('svg')
+                    if svg_content:
+                        results[diagram['id']] = svg_content
+                        if self.cache is not None:
+                            self.cache.set(cache_keys[diagram['id']], svg_content)
+            
+            if self.cache is not None:
+                stats = self.cache.get_stats()
+                logger.info(f"SVG cache: {stats['hits']} hits, {stats['misses']} misses")
+            
+            stage.record(svg_chars=sum(len(svg) for svg in results.values()))
         
         logger.info(f"Successfully processed {len(results)}/{len(diagrams)} diagrams")
         return results
     
+    def _get_session(self) -> RenderSession:
+        """
+        Get the render session, creating a private one on first use
+        
+        Returns:
+            RenderSession used for rendering
+        """
+        if self.session is None:
+            self.session = RenderSession(max_pages=self.max_concurrency)
+            self._owns_session = True
+        return self.session
+    
+    async def close(self):
+        """
+        Close the private render session, if one was created
+        """
+        if self._owns_session and self.session is not None:
+            await self.session.close()
+            self.session = None
+            self._owns_session = False
+    
     def validate_mermaid_syntax(self, content: str) -> List[str]:
         """
         Basic validation of Mermaid syntax
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Process pool that converts Markdown sections with warm Markdown instances
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+import logging
+
+import markdown
+
+from . import highlight_cache
+from .sections import convert_section
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# Below this much pending text, pickling to workers costs more than it saves
+MIN_PARALLEL_CHARS = 64 * 1024
+
+# Chunks per worker: enough to balance uneven sections, few enough to batch IPC
+CHUNKS_PER_WORKER = 4
+
+# Markdown instance owned by each worker process
+_worker_md: Optional[markdown.Markdown] = None
+
+
+def create_markdown(extensions: List[Any], extension_configs: Dict[str, Any]) -> markdown.Markdown:
+    """
+    Create the Markdown instance used for conversion
+
+    Args:
+        extensions: Markdown extensions in load order
+        extension_configs: Configuration for each extension
+
+    Returns:
+        Configured markdown.Markdown instance
+    """
+    # Code blocks go through the shared highlighting cache
+    highlight_cache.install()
+    return markdown.Markdown(
+        extensions=extensions,
+        extension_configs=extension_configs,
+        tab_length=4,
+    )
+
+
+def _init_worker(extensions: List[Any], extension_configs: Dict[str, Any]):
+    """Build the worker's Markdown instance and warm up lexers and extensions"""
+    global _worker_md
+    _worker_md = create_markdown(extensions, extension_configs)
+    _worker_md.convert("# Warm up\n\n```python\nx = 1\n```\n\n| a |\n|---|\n| b |\n")
+    _worker_md.reset()
+
+
+def _convert_chunk(texts: List[str]) -> List[Dict]:
+    """Convert a chunk of sections in a worker process"""
+    return [convert_section(_worker_md, text) for text in texts]
+
+
+def chunk_by_size(texts: List[str], chunks: int) -> List[List[int]]:
+    """
+    Split texts into contiguous chunks of roughly equal total size
+
+    Args:
+        texts: Section sources
+        chunks: Desired number of chunks
+
+    Returns:
+        Lists of indexes into ``texts``, in order
+    """
+    total = sum(len(text) for text in texts)
+    target = max(1, total // max(1, chunks))
+    result: List[List[int]] = []
+    current: List[int] = []
+    size = 0
+    for index, text in enumerate(texts):
+        current.append(index)
+        size += len(text)
+        if size >= target:
+            result.append(current)
+            current, size = [], 0
+    if current:
+        result.append(current)
+    return result
+
+
+class SectionPool:
+    """
+    Convert sections in parallel worker processes.
+
+    Workers are started lazily, each with a pre-built ``markdown.Markdown``
+    instance, and stay alive until close() so later documents skip the
+    start-up and warm-up cost. The ``spawn`` start method is used so the pool
+    is safe to create from threaded (asyncio) processes, and one pool can be
+    shared by parsers converting on different threads.
+    """
+
+    def __init__(self, extensions: List[Any], extension_configs: Dict[str, Any],
+                 workers: Optional[int] = None):
+        """
+        Initialize section pool
+
+        Args:
+            extensions: Markdown extensions in load order
+            extension_configs: Configuration for each extension
+            workers: Number of worker processes (default: CPU count)
+        """
+        self.extensions = extensions
+        self.extension_configs = extension_configs
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                logger.info(f"Starting section pool with {self.workers} worker(s)")
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(self.extensions, self.extension_configs),
+                )
+            return self._executor
+
+    def convert(self, texts: List[str]) -> List[Dict]:
+        """
+        Convert sections, preserving their order
+
+        Args:
+            texts: Section sources with their definitions appended
+
+        Returns:
+            Results of convert_section(), one per text
+        """
+        chunks = chunk_by_size(texts, self.workers * CHUNKS_PER_WORKER)
+        executor = self._get_executor()
+        futures = [executor.submit(_convert_chunk, [texts[i] for i in chunk]) for chunk in chunks]
+
+        results: List[Optional[Dict]] = [None] * len(texts)
+        for chunk, future in zip(chunks, futures):
+            for index, result in zip(chunk, future.result()):
+                results[index] = result
+        return results
+
+    def close(self):
+        """
+        Shut down the worker processes
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
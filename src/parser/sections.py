@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""
+Split Markdown into independently convertible sections and stitch the
+converted HTML back together
+"""
+
+import re
+import html
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from markdown.extensions.toc import nest_toc_tokens, unique
+
+from .block_scanner import Fence, open_fence, closes_fence
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# ATX heading at column 0: the only place a section may start
+HEADING_PATTERN = re.compile(r'^#{1,6}(?:[ \t]|$)')
+
+# Raw HTML blocks may not be cut in half
+HTML_BLOCK_TAGS = (
+    'address|article|aside|blockquote|details|dialog|div|dl|fieldset|figure|'
+    'footer|form|header|nav|ol|p|pre|script|section|style|table|ul'
+)
+HTML_OPEN_PATTERN = re.compile(rf'<(?:{HTML_BLOCK_TAGS})(?=[\s>/])', re.IGNORECASE)
+HTML_CLOSE_PATTERN = re.compile(rf'</(?:{HTML_BLOCK_TAGS})\s*>', re.IGNORECASE)
+CODE_SPAN_PATTERN = re.compile(r'`+[^`\n]*`+')
+
+# Cross-section definitions (same shapes Python-Markdown recognises)
+REFERENCE_DEF_PATTERN = re.compile(r'^ {0,3}\[([^\[\]^][^\[\]]*)\]:[ \t]*(\S*)')
+REFERENCE_TITLE_PATTERN = re.compile(r'^[ \t]+(["\'(]).*[)"\'][ \t]*$')
+ABBR_DEF_PATTERN = re.compile(r'^\*\[([^\]]*)\][ ]?:[ \t]*(.*)$')
+FOOTNOTE_DEF_PATTERN = re.compile(r'^ {0,3}\[\^([^\]]*)\]:')
+FOOTNOTE_DEF_LINE_PATTERN = re.compile(r'^ {0,3}\[\^[^\]]*\]:', re.MULTILINE)
+FOOTNOTE_REF_PATTERN = re.compile(r'\[\^([^\]]*)\]')
+
+# Markers whose output depends on the whole document
+WHOLE_DOCUMENT_MARKERS = ('[TOC]', '///Footnotes Go Here///')
+
+FOOTNOTE_DIV = '<div class="footnote">'
+FOOTNOTE_SUP_PATTERN = re.compile(
+    r'<sup id="fnref\d*:([^"]*)"><a class="footnote-ref" href="#fn:\1">\d+</a></sup>'
+)
+
+
+@dataclass
+class Definitions:
+    """
+    Reference links, abbreviations and footnotes defined anywhere in a document
+    """
+    references: List[Tuple[str, str]] = field(default_factory=list)
+    abbreviations: List[Tuple[str, str]] = field(default_factory=list)
+    footnotes: 'OrderedDict[str, str]' = field(default_factory=OrderedDict)
+
+    def for_section(self, text: str) -> str:
+        """
+        Get the definitions a section uses, as Markdown to append to it
+
+        Args:
+            text: Section source
+
+        Returns:
+            Definition blocks (possibly empty)
+        """
+        parts = []
+
+        if self.references:
+            normalized = ' '.join(text.lower().split())
+            parts.extend(block for key, block in self.references if f'[{key}]' in normalized)
+
+        parts.extend(block for term, block in self.abbreviations if term in text)
+
+        if self.footnotes:
+            labels = set(FOOTNOTE_REF_PATTERN.findall(text))
+            parts.extend(block for label, block in self.footnotes.items() if label in labels)
+
+        return '\n\n'.join(parts)
+
+
+def _html_depth_change(line: str) -> int:
+    """Net number of raw HTML blocks opened on a line (code spans ignored)"""
+    if '<' not in line:
+        return 0
+    line = CODE_SPAN_PATTERN.sub('', line)
+    return len(HTML_OPEN_PATTERN.findall(line)) - len(HTML_CLOSE_PATTERN.findall(line))
+
+
+def _footnote_end(lines: List[str], start: int) -> int:
+    """
+    Find the end of a footnote definition the way Python-Markdown reads it:
+    the rest of its paragraph, then any following indented blocks
+
+    Args:
+        lines: Document lines (without line endings)
+        start: Index of the definition line
+
+    Returns:
+        Index one past the last line of the definition
+    """
+    total = len(lines)
+    end = start + 1
+    while end < total and lines[end].strip() and not FOOTNOTE_DEF_PATTERN.match(lines[end]):
+        end += 1
+
+    while end < total:
+        probe = end
+        while probe < total and not lines[probe].strip():
+            probe += 1
+        if probe == end or probe >= total or not lines[probe].startswith(('    ', '\t')):
+            break
+        end = probe
+        while end < total and lines[end].strip() and not FOOTNOTE_DEF_PATTERN.match(lines[end]):
+            end += 1
+    return end
+
+
+def split_sections(content: str) -> Tuple[List[str], Definitions]:
+    """
+    Split a document at ATX headings and collect cross-section definitions
+
+    A heading only starts a new section when it sits at column 0 after a
+    blank line, outside fenced code, raw HTML blocks and HTML comments.
+
+    Args:
+        content: Markdown content
+
+    Returns:
+        Tuple of (sections, definitions); joining the sections with
+        newlines gives back the original content
+    """
+    lines = content.split('\n')
+    definitions = Definitions()
+    sections: List[str] = []
+    start = 0
+    fence: Optional[Fence] = None
+    html_depth = 0
+    in_comment = False
+    previous_blank = True
+
+    i = 0
+    total = len(lines)
+    while i < total:
+        line = lines[i]
+
+        if fence is not None:
+            # Python-Markdown closes a fence only with the identical marker
+            if closes_fence(line, fence, exact=True):
+                fence = None
+            i += 1
+            previous_blank = False
+            continue
+
+        if in_comment:
+            in_comment = '-->' not in line
+            i += 1
+            previous_blank = not line.strip()
+            continue
+
+        if (previous_blank and html_depth == 0 and i > start
+                and HEADING_PATTERN.match(line)):
+            sections.append('\n'.join(lines[start:i]))
+            start = i
+
+        fence = open_fence(line, i + 1)
+        if fence is not None:
+            i += 1
+            previous_blank = False
+            continue
+
+        if '<!--' in line and '-->' not in line.split('<!--', 1)[1]:
+            in_comment = True
+        html_depth = max(0, html_depth + _html_depth_change(line))
+
+        match = FOOTNOTE_DEF_PATTERN.match(line)
+        if match:
+            end = _footnote_end(lines, i)
+            definitions.footnotes[match.group(1)] = '\n'.join(lines[i:end])
+            previous_blank = False
+            i = end
+            continue
+
+        match = REFERENCE_DEF_PATTERN.match(line)
+        if match:
+            # The URL may start on the next line, and the title after it
+            end = i + 1
+            if not match.group(2) and end < total and lines[end].strip():
+                end += 1
+            if match.group(2) or end > i + 1:
+                if end < total and REFERENCE_TITLE_PATTERN.match(lines[end]):
+                    end += 1
+                key = ' '.join(match.group(1).lower().split())
+                definitions.references.append((key, '\n'.join(lines[i:end])))
+        else:
+            match = ABBR_DEF_PATTERN.match(line)
+            if match:
+                block = line
+                if not match.group(2).strip() and i + 1 < total:
+                    block += '\n' + lines[i + 1]
+                definitions.abbreviations.append((match.group(1), block))
+
+        previous_blank = not line.strip()
+        i += 1
+
+    sections.append('\n'.join(lines[start:]))
+    return sections, definitions
+
+
+def needs_whole_document(content: str) -> bool:
+    """
+    Check for markers whose output depends on the whole document
+
+    Args:
+        content: Markdown content
+
+    Returns:
+        True if the document must be converted in one piece
+    """
+    return any(marker in content for marker in WHOLE_DOCUMENT_MARKERS)
+
+
+def _flatten_tokens(tokens: List[Dict]) -> List[Dict]:
+    """Flatten nested TOC tokens into document order, without children"""
+    flat = []
+    for token in tokens:
+        flat.append({key: value for key, value in token.items() if key != 'children'})
+        flat.extend(_flatten_tokens(token.get('children', [])))
+    return flat
+
+
+def convert_section(md, text: str) -> Dict:
+    """
+    Convert one section with a Markdown instance
+
+    Args:
+        md: markdown.Markdown instance (reset before and after use)
+        text: Section source with its definitions appended
+
+    Returns:
+        Dictionary with the section 'html' (footnote list removed), its
+        flat 'toc_tokens' and 'blank_after', set when the section ends with
+        a raw HTML block that keeps a blank line before the next block
+    """
+    md.reset()
+    section_html = md.convert(text)
+    tokens = _flatten_tokens(getattr(md, 'toc_tokens', []))
+    raw_blocks = md.htmlStash.rawHtmlBlocks
+    last_raw = str(raw_blocks[-1]) if raw_blocks else ''
+    md.reset()
+
+    # The footnote list is rebuilt once for the whole document
+    if FOOTNOTE_DEF_LINE_PATTERN.search(text):
+        marker = section_html.rfind(FOOTNOTE_DIV)
+        if marker >= 0:
+            section_html = section_html[:marker].rstrip('\n')
+
+    # md.convert() strips the newline that a trailing raw block keeps
+    blank_after = last_raw.endswith('\n') and section_html.endswith(last_raw.strip('\n'))
+    return {'html': section_html, 'toc_tokens': tokens, 'blank_after': blank_after}
+
+
+def _escape_attribute(value: str) -> str:
+    """Escape an attribute value the way Python-Markdown serializes it"""
+    return html.escape(value, quote=False).replace('"', '&quot;')
+
+
+def _rename_header(section_html: str, token: Dict, new_id: str, pos: int) -> Tuple[str, int]:
+    """
+    Give a header element a new id (and update its TOC anchor link)
+
+    Args:
+        section_html: Section HTML
+        token: TOC token of the header
+        new_id: Id that is unique in the whole document
+        pos: Offset where the search for the header starts
+
+    Returns:
+        Tuple of (updated html, offset after the header)
+    """
+    old = _escape_attribute(token['id'])
+    level = token['level']
+    match = re.compile(rf'<h{level}\b[^>]*\bid="{re.escape(old)}"').search(section_html, pos)
+    if not match:
+        return section_html, pos
+
+    end = section_html.find(f'</h{level}>', match.end())
+    end = len(section_html) if end < 0 else end
+    new = _escape_attribute(new_id)
+    header = section_html[match.start():end]
+    header = header.replace(f'id="{old}"', f'id="{new}"', 1).replace(f'href="#{old}"', f'href="#{new}"')
+    section_html = section_html[:match.start()] + header + section_html[end:]
+    return section_html, match.start() + len(header)
+
+
+def _generated_slug(token: Dict, slugify) -> Optional[str]:
+    """
+    Get the slug a header id was generated from
+
+    Returns None for explicit ids (attr_list), which the toc extension
+    never renames.
+    """
+    slug = slugify(html.unescape(token['name']))
+    if token['id'] == slug or re.fullmatch(rf'{re.escape(slug)}_\d+', token['id']):
+        return slug
+    return None
+
+
+def stitch_sections(md, converted: List[Dict], footnote_labels: List[str]) -> Tuple[str, List[Dict], Dict[str, int]]:
+    """
+    Join converted sections into one document body
+
+    Generated header ids are made unique across sections (explicit ids are
+    kept and reserved first, as the toc extension does), and footnote
+    references are renumbered in document order (``fnref``, ``fnref2``, ...)
+    with the global footnote numbers.
+
+    Args:
+        md: markdown.Markdown instance with the toc extension loaded
+        converted: Results of convert_section(), in document order
+        footnote_labels: Footnote labels in definition order
+
+    Returns:
+        Tuple of (html, flat toc tokens, footnote reference counts)
+    """
+    toc_processor = md.treeprocessors['toc']
+
+    def slugify(name: str) -> str:
+        return toc_processor.slugify(name, toc_processor.sep)
+
+    slugs = [
+        [_generated_slug(token, slugify) for token in section['toc_tokens']]
+        for section in converted
+    ]
+    used_ids = {
+        token['id']
+        for section, section_slugs in zip(converted, slugs)
+        for token, slug in zip(section['toc_tokens'], section_slugs)
+        if slug is None
+    }
+    tokens: List[Dict] = []
+    ref_counts: Dict[str, int] = {}
+    numbers = {label: index for index, label in enumerate(footnote_labels, start=1)}
+    parts = []
+    separator = '\n'
+
+    def renumber(match):
+        escaped = match.group(1)
+        label = html.unescape(escaped)
+        if label not in numbers:
+            return match.group(0)
+        count = ref_counts.get(label, 0) + 1
+        ref_counts[label] = count
+        ref_id = 'fnref' if count == 1 else f'fnref{count}'
+        return (f'<sup id="{ref_id}:{escaped}"><a class="footnote-ref" '
+                f'href="#fn:{escaped}">{numbers[label]}</a></sup>')
+
+    for section, section_slugs in zip(converted, slugs):
+        section_html = section['html']
+        pos = 0
+        for token, slug in zip(section['toc_tokens'], section_slugs):
+            token = dict(token)
+            if slug is None:
+                tokens.append(token)
+                continue
+            new_id = unique(slug, used_ids)
+            if new_id != token['id']:
+                section_html, pos = _rename_header(section_html, token, new_id, pos)
+                token['id'] = new_id
+            tokens.append(token)
+
+        if 'footnote-ref' in section_html:
+            section_html = FOOTNOTE_SUP_PATTERN.sub(renumber, section_html)
+
+        if section_html.strip():
+            if parts:
+                parts.append(separator)
+            parts.append(section_html.strip('\n'))
+            separator = '\n\n' if section.get('blank_after') else '\n'
+
+    return ''.join(parts), tokens, ref_counts
+
+
+def build_toc(md, tokens: List[Dict]) -> Tuple[str, List[Dict]]:
+    """
+    Render the TOC for flat tokens with the Markdown instance's toc extension
+
+    Args:
+        md: markdown.Markdown instance with the toc extension loaded
+        tokens: Flat TOC tokens in document order
+
+    Returns:
+        Tuple of (TOC HTML, nested tokens), as md.toc and md.toc_tokens
+        would hold them
+    """
+    toc_processor = md.treeprocessors['toc']
+    nested = nest_toc_tokens([dict(token) for token in tokens])
+    div = toc_processor.build_toc_div(nested)
+    toc = md.serializer(div)
+    for postprocessor in md.postprocessors:
+        toc = postprocessor.run(toc)
+    return toc, nested
+
+
+def build_footnotes(md, footnotes: 'OrderedDict[str, str]', ref_counts: Dict[str, int]) -> str:
+    """
+    Render the document's footnote list
+
+    A small synthetic document with one reference per occurrence and every
+    definition reproduces Python-Markdown's list, backlinks included.
+
+    Args:
+        md: markdown.Markdown instance with the footnotes extension loaded
+        footnotes: Footnote definition blocks by label, in definition order
+        ref_counts: Number of references to each label in the body
+
+    Returns:
+        Footnote list HTML (empty if there are no footnotes)
+    """
+    if not footnotes:
+        return ''
+
+    refs = ' '.join(
+        f'[^{label}]' for label in footnotes for _ in range(ref_counts.get(label, 0))
+    )
+    source = (refs or '.') + '\n\n' + '\n\n'.join(footnotes.values())
+
+    md.reset()
+    rendered = md.convert(source)
+    md.reset()
+
+    marker = rendered.rfind(FOOTNOTE_DIV)
+    return rendered[marker:] if marker >= 0 else ''
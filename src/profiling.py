@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Lightweight per-stage timing: nested spans with wall time, CPU time and sizes
+"""
+
+import contextvars
+import cProfile
+import json
+import sys
+import time
+import logging
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Span:
+    """
+    One timed stage and the stages nested inside it
+    """
+    name: str
+    wall: float = 0.0
+    cpu: float = 0.0
+    sizes: Dict[str, int] = field(default_factory=dict)
+    children: List['Span'] = field(default_factory=list)
+
+    def record(self, **sizes: int):
+        """
+        Attach byte sizes or counts to the span
+
+        Args:
+            **sizes: Values such as ``html_bytes=...``; repeated names add up
+        """
+        for name, value in sizes.items():
+            self.sizes[name] = self.sizes.get(name, 0) + int(value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the span tree to JSON-ready dictionaries"""
+        data: Dict[str, Any] = {
+            'name': self.name,
+            'wall': round(self.wall, 6),
+            'cpu': round(self.cpu, 6),
+        }
+        if self.sizes:
+            data['sizes'] = dict(self.sizes)
+        if self.children:
+            data['children'] = [child.to_dict() for child in self.children]
+        return data
+
+
+class _NullSpan:
+    """Stand-in yielded by span() when no profile is active"""
+
+    def record(self, **sizes: int):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+# Innermost open span of the current task or thread
+_current_span: 'contextvars.ContextVar[Optional[Span]]' = contextvars.ContextVar(
+    'mdpdf_current_span', default=None
+)
+_current_profile: 'contextvars.ContextVar[Optional[Profile]]' = contextvars.ContextVar(
+    'mdpdf_current_profile', default=None
+)
+
+
+class Profile:
+    """
+    Collect spans for one conversion and write them as a JSON report.
+
+    Spans are opened with span() anywhere below ``with profile.activate()``.
+    Each task or thread keeps its own current span through contextvars, so
+    concurrent conversions never mix their trees. Work handed to executor
+    threads must run through bind_context() to stay attached.
+    """
+
+    def __init__(self, name: str, cprofile_dir: Optional[Union[str, Path]] = None):
+        """
+        Initialize profile
+
+        Args:
+            name: Report name (e.g. the input file)
+            cprofile_dir: Also dump a cProfile ``.prof`` file per stage here
+        """
+        self.root = Span(name)
+        self.cprofile_dir = Path(cprofile_dir) if cprofile_dir else None
+        self.cprofile_files: List[str] = []
+
+    @contextmanager
+    def activate(self) -> Iterator[Span]:
+        """
+        Make this profile current and time the whole block as the root span
+
+        Yields:
+            Root span
+        """
+        profile_token = _current_profile.set(self)
+        span_token = _current_span.set(self.root)
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield self.root
+        finally:
+            self.root.wall += time.perf_counter() - wall
+            self.root.cpu += time.process_time() - cpu
+            _current_span.reset(span_token)
+            _current_profile.reset(profile_token)
+
+    def stages(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Aggregate spans by name
+
+        Returns:
+            Stage name mapped to total wall time, CPU time, calls and sizes
+        """
+        totals: Dict[str, Dict[str, Any]] = {}
+
+        def visit(span: Span):
+            stage = totals.setdefault(span.name, {'wall': 0.0, 'cpu': 0.0, 'calls': 0})
+            stage['wall'] += span.wall
+            stage['cpu'] += span.cpu
+            stage['calls'] += 1
+            for name, value in span.sizes.items():
+                stage[name] = stage.get(name, 0) + value
+            for child in span.children:
+                visit(child)
+
+        for child in self.root.children:
+            visit(child)
+        for stage in totals.values():
+            stage['wall'] = round(stage['wall'], 6)
+            stage['cpu'] = round(stage['cpu'], 6)
+        return totals
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Build the JSON report
+
+        CPU times are process CPU time, so stages that overlap with other
+        threads (parallel parsing, the browser driver) include their work.
+
+        Returns:
+            Dictionary with totals, per-stage aggregates and the span tree
+        """
+        report = {
+            'name': self.root.name,
+            'wall': round(self.root.wall, 6),
+            'cpu': round(self.root.cpu, 6),
+            'stages': self.stages(),
+            'spans': [child.to_dict() for child in self.root.children],
+        }
+        if self.cprofile_files:
+            report['cprofile'] = list(self.cprofile_files)
+        return report
+
+    def write(self, path: Union[str, Path]):
+        """
+        Write the JSON report
+
+        Args:
+            path: Output file
+        """
+        Path(path).write_text(json.dumps(self.report(), indent=2, ensure_ascii=False), encoding='utf-8')
+        logger.info(f"Profile written to {path}")
+
+    def _cprofile_path(self, name: str) -> Path:
+        """Pick a free ``<stage>[-N].prof`` file name"""
+        self.cprofile_dir.mkdir(parents=True, exist_ok=True)
+        path = self.cprofile_dir / f"{name}.prof"
+        index = 2
+        while str(path) in self.cprofile_files:
+            path = self.cprofile_dir / f"{name}-{index}.prof"
+            index += 1
+        self.cprofile_files.append(str(path))
+        return path
+
+
+@contextmanager
+def span(name: str, cprofile: bool = False, **sizes: int) -> Iterator[Union[Span, _NullSpan]]:
+    """
+    Time a stage of the current profile
+
+    Does nothing (beyond one contextvar lookup) when no profile is active.
+
+    Args:
+        name: Stage name, dotted for sub-stages (e.g. ``pdf.print``)
+        cprofile: Dump a cProfile file for this stage if the profile asks for
+            it and no other profiler is running in this thread
+        **sizes: Initial sizes to record
+
+    Yields:
+        The span, to record more sizes on
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield _NULL_SPAN
+        return
+
+    current = Span(name)
+    current.record(**sizes)
+    parent.children.append(current)
+    token = _current_span.set(current)
+
+    profile = _current_profile.get()
+    profiler = None
+    if cprofile and profile is not None and profile.cprofile_dir and sys.getprofile() is None:
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield current
+    finally:
+        current.wall += time.perf_counter() - wall
+        current.cpu += time.process_time() - cpu
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(str(profile._cprofile_path(name)))
+        _current_span.reset(token)
+
+
+def bind_context(func: Callable) -> Callable:
+    """
+    Bind a callable to the current context before handing it to a thread
+
+    ``loop.run_in_executor`` does not copy contextvars, so spans opened in
+    the worker would otherwise be lost.
+
+    Args:
+        func: Callable to run elsewhere
+
+    Returns:
+        Callable running ``func`` inside a copy of the current context
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.run(func, *args, **kwargs)
+
+    return run
@@ -0,0 +1,563 @@
+#!/usr/bin/env python3
+"""
+Long-running render server: Markdown in, PDF out, over HTTP or a Unix socket
+"""
+
+import asyncio
+import json
+import os
+import signal
+import time
+import logging
+from dataclasses import dataclass, fields, replace
+from http import HTTPStatus
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from parser import MarkdownParser, MermaidProcessor
+from generator import HTMLGenerator, PDFGenerator
+from config import ConfigManager
+from cache import SVGCache
+from browser import AssetBundle, RenderSession
+from profiling import bind_context
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+PAPER_FORMATS = ('A4', 'A3', 'A2', 'A1', 'A0', 'Letter', 'Legal', 'Tabloid')
+OUTPUT_TYPES = {
+    'pdf': 'application/pdf',
+    'html': 'text/html; charset=utf-8',
+}
+
+# Request limits
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 20 * 1024 * 1024
+READ_TIMEOUT = 30.0
+
+# Parsed once per warm parser at start-up so extensions and lexers are loaded
+WARM_UP_DOCUMENT = """# Warm up
+
+Text with **bold**, `code` and a table:
+
+| a | b |
+|---|---|
+| 1 | 2 |
+
+```python
+def warm_up():
+    return True
+```
+"""
+
+
+class RequestError(Exception):
+    """
+    Client error answered with an HTTP status and a JSON message
+    """
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _as_bool(value: Any) -> bool:
+    """Read a boolean from JSON or a query string value"""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.lower() in ('1', 'true', 'yes', 'on'):
+        return True
+    if isinstance(value, str) and value.lower() in ('0', 'false', 'no', 'off', ''):
+        return False
+    raise ValueError(f"not a boolean: {value!r}")
+
+
+def _as_margin(value: Any) -> Dict[str, str]:
+    """Read margins as {"top": "20mm", ...} or "top,right,bottom,left" in mm"""
+    if isinstance(value, dict):
+        return {side: str(value[side]) for side in ('top', 'right', 'bottom', 'left') if side in value}
+    parts = [part.strip() for part in str(value).split(',')]
+    if len(parts) != 4:
+        raise ValueError('expected "top,right,bottom,left"')
+    return {side: f"{float(part):g}mm" for side, part in zip(('top', 'right', 'bottom', 'left'), parts)}
+
+
+@dataclass(frozen=True)
+class RenderOptions:
+    """
+    Per-request conversion options (server defaults come from the CLI)
+
+    Page options left as None fall back to the document front matter and
+    config.yaml.
+    """
+    format: Optional[str] = None
+    landscape: Optional[bool] = None
+    scale: Optional[float] = None
+    margin: Optional[Dict[str, str]] = None
+    mermaid: bool = True
+    css: Optional[str] = None
+    output: str = 'pdf'
+
+    def merged(self, options: Mapping[str, Any]) -> 'RenderOptions':
+        """
+        Apply request options on top of these defaults
+
+        Args:
+            options: Options from the JSON body or the query string
+
+        Returns:
+            New RenderOptions
+
+        Raises:
+            RequestError: If an option is unknown or invalid
+        """
+        known = {f.name for f in fields(self)}
+        unknown = sorted(set(options) - known)
+        if unknown:
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"unknown option(s): {', '.join(unknown)}")
+
+        changes: Dict[str, Any] = {}
+        try:
+            for name, value in options.items():
+                if name in ('landscape', 'mermaid'):
+                    changes[name] = _as_bool(value)
+                elif name == 'scale':
+                    changes[name] = float(value)
+                    if not 0.1 <= changes[name] <= 2.0:
+                        raise ValueError('must be between 0.1 and 2')
+                elif name == 'margin':
+                    changes[name] = _as_margin(value)
+                elif name == 'format':
+                    if value not in PAPER_FORMATS:
+                        raise ValueError(f"expected one of {', '.join(PAPER_FORMATS)}")
+                    changes[name] = value
+                elif name == 'output':
+                    if value not in OUTPUT_TYPES:
+                        raise ValueError(f"expected one of {', '.join(OUTPUT_TYPES)}")
+                    changes[name] = value
+                else:
+                    changes[name] = None if value is None else str(value)
+        except (TypeError, ValueError) as e:
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"invalid option {name!r}: {e}")
+        return replace(self, **changes)
+
+
+class RenderServer:
+    """
+    Convert Markdown documents for many clients with warm state.
+
+    Keeps one MarkdownParser per render slot, a shared RenderSession
+    (Chromium pool), a loaded ConfigManager and the Mermaid SVG cache in
+    memory. At most ``concurrency`` documents are converted at once; up to
+    ``queue_limit`` more wait for a slot and further requests are turned
+    away with 503 instead of piling up.
+    """
+
+    def __init__(self,
+                 make_parser: Callable[[], MarkdownParser] = MarkdownParser,
+                 defaults: Optional[RenderOptions] = None,
+                 concurrency: int = 4,
+                 queue_limit: int = 16,
+                 svg_cache: Optional[SVGCache] = None,
+                 allow_network: bool = False,
+                 base_dir: Optional[str] = None,
+                 config_path: Optional[str] = None):
+        """
+        Initialize render server
+
+        Args:
+            make_parser: Factory for the warm Markdown parsers
+            defaults: Options used when a request does not set them
+            concurrency: Documents converted at the same time
+            queue_limit: Requests allowed to wait for a free slot
+            svg_cache: Cache for rendered Mermaid diagrams
+            allow_network: Allow external requests while rendering
+            base_dir: Directory documents may load local images and CSS from;
+                without it no local file is served, since request bodies are
+                untrusted
+            config_path: Path to config.yaml (default: project config)
+        """
+        self.make_parser = make_parser
+        self.defaults = defaults or RenderOptions()
+        self.concurrency = max(1, concurrency)
+        self.queue_limit = max(0, queue_limit)
+        self.svg_cache = svg_cache
+        self.base_dir = base_dir
+        self.file_access = 'base_dir' if base_dir else 'none'
+        self.config_manager = ConfigManager(config_path)
+        self.session = RenderSession(
+            assets=AssetBundle(offline=not allow_network),
+            max_pages=self.concurrency,
+            browsers=max(1, self.concurrency // 4),
+        )
+
+        # Created in start(), on the serving event loop
+        self._parsers: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.active = 0
+        self.queued = 0
+        self.counters = {'rendered': 0, 'failed': 0, 'rejected': 0}
+        self.started_at = time.monotonic()
+
+    async def start(self, warm_browser: bool = True):
+        """
+        Create and warm the parsers, and launch Chromium
+
+        Args:
+            warm_browser: Launch the browser now instead of on the first PDF
+        """
+        loop = asyncio.get_running_loop()
+        self._parsers = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.concurrency)
+        for _ in range(self.concurrency):
+            parser = self.make_parser()
+            await loop.run_in_executor(None, parser.parse, WARM_UP_DOCUMENT)
+            self._parsers.put_nowait(parser)
+
+        if warm_browser:
+            try:
+                async with self.session.page():
+                    pass
+            except Exception as e:
+                logger.warning(f"Browser could not be started, PDF requests will fail: {e}")
+
+        self.started_at = time.monotonic()
+        logger.info(f"Render server ready: {self.concurrency} slot(s), queue limit {self.queue_limit}")
+
+    async def close(self):
+        """
+        Close the parsers and the browser
+        """
+        while self._parsers is not None and not self._parsers.empty():
+            self._parsers.get_nowait().close()
+        await self.session.close()
+
+    def health(self) -> Dict[str, Any]:
+        """
+        Get the server state for the health endpoint
+
+        Returns:
+            Dictionary with load, limits and counters
+        """
+        return {
+            'status': 'ok',
+            'uptime': round(time.monotonic() - self.started_at, 1),
+            'active': self.active,
+            'queued': self.queued,
+            'concurrency': self.concurrency,
+            'queue_limit': self.queue_limit,
+            'browser_started': self.session.started,
+            **self.counters,
+        }
+
+    async def render(self, markdown_content: str, options: RenderOptions) -> bytes:
+        """
+        Convert one document, waiting for a free slot
+
+        Args:
+            markdown_content: Markdown source (front matter allowed)
+            options: Conversion options
+
+        Returns:
+            PDF bytes, or the HTML document when options.output is 'html'
+
+        Raises:
+            RequestError: 503 if the queue is full
+        """
+        if self._slots.locked() and self.queued >= self.queue_limit:
+            self.counters['rejected'] += 1
+            raise RequestError(HTTPStatus.SERVICE_UNAVAILABLE, 'render queue is full')
+
+        self.queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+
+        self.active += 1
+        try:
+            result = await self._convert(markdown_content, options)
+            self.counters['rendered'] += 1
+            return result
+        except Exception:
+            self.counters['failed'] += 1
+            raise
+        finally:
+            self.active -= 1
+            self._slots.release()
+
+    async def _convert(self, markdown_content: str, options: RenderOptions) -> bytes:
+        """Run the conversion pipeline with a borrowed warm parser"""
+        loop = asyncio.get_running_loop()
+        parser = await self._parsers.get()
+        try:
+            parsed_data = await loop.run_in_executor(None, bind_context(parser.parse), markdown_content)
+        finally:
+            self._parsers.put_nowait(parser)
+
+        mermaid_svgs = {}
+        if options.mermaid and parsed_data['mermaid_diagrams']:
+            mermaid_processor = MermaidProcessor(cache=self.svg_cache, session=self.session)
+            mermaid_svgs = await mermaid_processor.process_diagrams(parsed_data['mermaid_diagrams'])
+
+        highlight_style = parser.highlight_style if parser.highlight_classes else None
+        html_generator = HTMLGenerator(custom_css=options.css, highlight_style=highlight_style)
+        html_content = html_generator.generate_html(parsed_data, mermaid_svgs)
+        if options.output == 'html':
+            return html_content.encode('utf-8')
+
+        pdf_generator = PDFGenerator(
+            format=options.format,
+            margin=options.margin,
+            landscape=options.landscape,
+            scale=options.scale,
+            session=self.session,
+            config_manager=self.config_manager,
+        )
+        return await pdf_generator.render_pdf_bytes(
+            html_content,
+            parsed_data['metadata'],
+            stats=parsed_data['stats'],
+            base_dir=self.base_dir,
+            wait_for_diagrams=html_generator.mermaid_runtime,
+            file_access=self.file_access,
+        )
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Serve one HTTP/1.1 request and close the connection
+
+        Args:
+            reader: Connection input stream
+            writer: Connection output stream
+        """
+        try:
+            try:
+                method, target, headers, body = await asyncio.wait_for(
+                    read_request(reader), READ_TIMEOUT
+                )
+                status, response_headers, payload = await self.dispatch(method, target, headers, body)
+            except RequestError as e:
+                status, response_headers, payload = json_response(e.status, {'error': e.message})
+            except asyncio.TimeoutError:
+                status, response_headers, payload = json_response(
+                    HTTPStatus.REQUEST_TIMEOUT, {'error': 'request not received in time'}
+                )
+            except (ConnectionError, asyncio.IncompleteReadError):
+                return
+            except Exception as e:
+                logger.error(f"Render request failed: {e}")
+                status, response_headers, payload = json_response(
+                    HTTPStatus.INTERNAL_SERVER_ERROR, {'error': str(e)}
+                )
+
+            writer.write(format_response(status, response_headers, payload))
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def dispatch(self, method: str, target: str, headers: Dict[str, str],
+                       body: bytes) -> Tuple[int, Dict[str, str], bytes]:
+        """
+        Route a request to the health or render endpoint
+
+        Args:
+            method: HTTP method
+            target: Request target (path and query string)
+            headers: Request headers with lowercase names
+            body: Request body
+
+        Returns:
+            Tuple of (status, headers, body)
+        """
+        url = urlsplit(target)
+        routes = {'/health': 'GET', '/render': 'POST'}
+        allowed = routes.get(url.path)
+        if allowed is None:
+            raise RequestError(HTTPStatus.NOT_FOUND, f"no such endpoint: {url.path}")
+        if method != allowed:
+            status, response_headers, payload = json_response(
+                HTTPStatus.METHOD_NOT_ALLOWED, {'error': f"use {allowed}"}
+            )
+            response_headers['Allow'] = allowed
+            return status, response_headers, payload
+
+        if url.path == '/health':
+            return json_response(HTTPStatus.OK, self.health())
+
+        markdown_content, options = parse_render_request(headers, body, url.query)
+        options = self.defaults.merged(options)
+
+        started = time.perf_counter()
+        payload = await self.render(markdown_content, options)
+        elapsed = time.perf_counter() - started
+        logger.info(f"Rendered {options.output.upper()} ({len(payload):,} bytes) in {elapsed:.2f}s")
+        return HTTPStatus.OK, {
+            'Content-Type': OUTPUT_TYPES[options.output],
+            'X-Render-Time': f"{elapsed:.3f}",
+        }, payload
+
+
+async def read_request(reader: asyncio.StreamReader) -> Tuple[str, str, Dict[str, str], bytes]:
+    """
+    Read an HTTP/1.1 request with a Content-Length body
+
+    Args:
+        reader: Connection input stream
+
+    Returns:
+        Tuple of (method, target, headers, body)
+
+    Raises:
+        RequestError: On malformed or oversized requests
+    """
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.LimitOverrunError:
+        raise RequestError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, 'request headers too large')
+
+    lines = head.decode('latin-1').split('\r\n')
+    try:
+        method, target, _version = lines[0].split(' ')
+    except ValueError:
+        raise RequestError(HTTPStatus.BAD_REQUEST, 'malformed request line')
+
+    headers: Dict[str, str] = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+
+    if 'transfer-encoding' in headers:
+        raise RequestError(HTTPStatus.LENGTH_REQUIRED, 'send the body with a Content-Length')
+    try:
+        length = int(headers.get('content-length', '0'))
+    except ValueError:
+        raise RequestError(HTTPStatus.BAD_REQUEST, 'invalid Content-Length')
+    if length < 0:
+        raise RequestError(HTTPStatus.BAD_REQUEST, 'invalid Content-Length')
+    if length > MAX_BODY_BYTES:
+        raise RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                           f"body larger than {MAX_BODY_BYTES // (1024 * 1024)} MiB")
+
+    body = await reader.readexactly(length) if length else b''
+    return method, target, headers, body
+
+
+def parse_render_request(headers: Dict[str, str], body: bytes,
+                         query: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    Extract the Markdown source and options of a render request
+
+    JSON bodies look like ``{"markdown": "...", "options": {...}}``; any
+    other body is the Markdown itself, with options in the query string.
+
+    Args:
+        headers: Request headers with lowercase names
+        body: Request body
+        query: Query string
+
+    Returns:
+        Tuple of (markdown, options)
+    """
+    options: Dict[str, Any] = dict(parse_qsl(query, keep_blank_values=True))
+    try:
+        text = body.decode('utf-8')
+    except UnicodeDecodeError:
+        raise RequestError(HTTPStatus.BAD_REQUEST, 'body is not valid UTF-8')
+
+    if headers.get('content-type', '').split(';')[0].strip() == 'application/json':
+        try:
+            payload = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"invalid JSON: {e}")
+        if not isinstance(payload, dict) or not isinstance(payload.get('markdown'), str):
+            raise RequestError(HTTPStatus.BAD_REQUEST, 'expected {"markdown": "...", "options": {...}}')
+        if not isinstance(payload.get('options', {}), dict):
+            raise RequestError(HTTPStatus.BAD_REQUEST, '"options" must be an object')
+        options.update(payload.get('options', {}))
+        text = payload['markdown']
+
+    if not text.strip():
+        raise RequestError(HTTPStatus.BAD_REQUEST, 'empty document')
+    return text, options
+
+
+def json_response(status: int, data: Dict[str, Any]) -> Tuple[int, Dict[str, str], bytes]:
+    """Build a JSON response tuple"""
+    return status, {'Content-Type': 'application/json'}, json.dumps(data).encode('utf-8')
+
+
+def format_response(status: int, headers: Dict[str, str], body: bytes) -> bytes:
+    """
+    Serialize an HTTP/1.1 response
+
+    Args:
+        status: HTTP status code
+        headers: Response headers
+        body: Response body
+
+    Returns:
+        Bytes to write to the connection
+    """
+    lines = [f"HTTP/1.1 {int(status)} {HTTPStatus(status).phrase}"]
+    headers = {**headers, 'Content-Length': str(len(body)), 'Connection': 'close'}
+    if status == HTTPStatus.SERVICE_UNAVAILABLE:
+        headers.setdefault('Retry-After', '1')
+    lines.extend(f"{name}: {value}" for name, value in headers.items())
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body
+
+
+async def serve(server: RenderServer, host: str = '127.0.0.1', port: int = 8765,
+                socket_path: Optional[str] = None, warm_browser: bool = True):
+    """
+    Run the render server until SIGINT or SIGTERM
+
+    Args:
+        server: Render server
+        host: Interface for HTTP (ignored with socket_path)
+        port: TCP port for HTTP (ignored with socket_path)
+        socket_path: Listen on this Unix socket instead of TCP
+        warm_browser: Launch Chromium before accepting requests
+    """
+    await server.start(warm_browser=warm_browser)
+
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        listener = await asyncio.start_unix_server(
+            server.handle_connection, path=socket_path, limit=MAX_HEADER_BYTES
+        )
+        address = f"unix:{socket_path}"
+    else:
+        listener = await asyncio.start_server(
+            server.handle_connection, host, port, limit=MAX_HEADER_BYTES
+        )
+        address = f"http://{host}:{port}"
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+
+    logger.info(f"Listening on {address}")
+    try:
+        async with listener:
+            await stop.wait()
+    finally:
+        await server.close()
+        if socket_path and os.path.exists(socket_path):
+            os.unlink(socket_path)
+        logger.info("Render server stopped")
@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""
+Shared pytest setup: modules are imported from src/, as the CLI does
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC_DIR = Path(__file__).parent.parent / "src"
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+
+@pytest.fixture
+def sample_markdown() -> str:
+    """Content of tests/fixtures/sample.md"""
+    return (FIXTURES_DIR / "sample.md").read_text(encoding='utf-8')
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Batch input collection and output planning (batch.collect_inputs, plan_outputs)
+"""
+
+from pathlib import Path
+
+import pytest
+
+from batch import collect_inputs, plan_outputs
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """docs/ with nested markdown files and a few non-markdown files"""
+    for name in ('docs/a.md', 'docs/b.md', 'docs/guide/c.md', 'docs/guide/deep/d.md',
+                 'docs/notes.txt', 'docs/guide/image.png'):
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"# {path.stem}\n", encoding='utf-8')
+    return tmp_path
+
+
+def names(paths, root):
+    return [Path(path).resolve().relative_to(root.resolve()).as_posix() for path in paths]
+
+
+def test_directory_is_searched_recursively(tree):
+    assert names(collect_inputs([str(tree / 'docs')]), tree) == [
+        'docs/a.md', 'docs/b.md', 'docs/guide/c.md', 'docs/guide/deep/d.md',
+    ]
+
+
+def test_glob_patterns(tree):
+    assert names(collect_inputs([str(tree / 'docs' / '*.md')]), tree) == ['docs/a.md', 'docs/b.md']
+    assert names(collect_inputs([str(tree / 'docs' / '**' / '*.md')]), tree) == [
+        'docs/a.md', 'docs/b.md', 'docs/guide/c.md', 'docs/guide/deep/d.md',
+    ]
+    assert names(collect_inputs([str(tree / 'docs' / '?.md')]), tree) == ['docs/a.md', 'docs/b.md']
+    assert collect_inputs([str(tree / 'docs' / '*.png')]) == []
+
+
+def test_manifest_entries_resolve_against_the_manifest(tree):
+    manifest = tree / 'docs' / 'list.txt'
+    manifest.write_text(
+        "# Chapters\n"
+        "\n"
+        "guide/c.md\n"
+        "  b.md  \n"
+        "guide/deep/*.md\n",
+        encoding='utf-8',
+    )
+    assert names(collect_inputs([str(manifest)]), tree) == [
+        'docs/guide/c.md', 'docs/b.md', 'docs/guide/deep/d.md',
+    ]
+
+
+def test_nested_manifest(tree):
+    (tree / 'docs' / 'guide' / 'inner.lst').write_text("c.md\n", encoding='utf-8')
+    manifest = tree / 'docs' / 'outer.list'
+    manifest.write_text("guide/inner.lst\na.md\n", encoding='utf-8')
+    assert names(collect_inputs([str(manifest)]), tree) == ['docs/guide/c.md', 'docs/a.md']
+
+
+def test_duplicates_keep_first_occurrence(tree, monkeypatch):
+    monkeypatch.chdir(tree)
+    manifest = tree / 'docs' / 'list.txt'
+    manifest.write_text("b.md\na.md\n", encoding='utf-8')
+    inputs = collect_inputs(['docs/a.md', str(manifest), 'docs', str(tree / 'docs' / 'a.md')])
+    assert names(inputs, tree) == ['docs/a.md', 'docs/b.md', 'docs/guide/c.md', 'docs/guide/deep/d.md']
+    assert inputs[0] == Path('docs/a.md')
+
+
+def test_unmatched_source_is_skipped_with_warning(tree, caplog):
+    inputs = collect_inputs([str(tree / 'missing' / '*.md'), str(tree / 'docs' / 'a.md')])
+    assert names(inputs, tree) == ['docs/a.md']
+    assert "No markdown files matched" in caplog.text
+
+
+def test_outputs_next_to_inputs(tree):
+    inputs = [tree / 'docs' / 'a.md', tree / 'docs' / 'guide' / 'c.md']
+    assert plan_outputs(inputs) == [
+        str(tree / 'docs' / 'a.pdf'), str(tree / 'docs' / 'guide' / 'c.pdf'),
+    ]
+    assert plan_outputs(inputs, suffix='.html')[1] == str(tree / 'docs' / 'guide' / 'c.html')
+
+
+def test_output_dir_mirrors_the_input_tree(tree):
+    inputs = collect_inputs([str(tree / 'docs')])
+    out = tree / 'out'
+    assert plan_outputs(inputs, str(out)) == [
+        str(out / 'a.pdf'), str(out / 'b.pdf'),
+        str(out / 'guide' / 'c.pdf'), str(out / 'guide' / 'deep' / 'd.pdf'),
+    ]
+
+
+def test_output_dir_below_common_parent(tree, monkeypatch):
+    monkeypatch.chdir(tree / 'docs')
+    inputs = [Path('guide/deep/d.md'), Path('guide/c.md')]
+    assert plan_outputs(inputs, 'out', '.html') == [
+        str(Path('out') / 'deep' / 'd.html'), str(Path('out') / 'c.html'),
+    ]
+
+
+def test_output_dir_single_file(tree):
+    assert plan_outputs([tree / 'docs' / 'guide' / 'c.md'], str(tree / 'out')) == [str(tree / 'out' / 'c.pdf')]
+    assert plan_outputs([], str(tree / 'out')) == []
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Mermaid extraction (parser.block_scanner.MermaidScanner)
+"""
+
+import re
+
+from parser import MarkdownParser
+from parser.block_scanner import MermaidScanner
+
+# Patterns of the regex extraction that MermaidScanner replaced
+LEGACY_PATTERNS = [
+    r'```mermaid\s*\n(.*?)\n```',
+    r'```\s*mermaid\s*\n(.*?)\n```',
+    r'<div class="mermaid">(.*?)</div>',
+]
+
+DOCUMENT = (
+    "# Diagrams\n"
+    "\n"
+    "```mermaid\n"
+    "flowchart TD\n"
+    "    A --> B\n"
+    "```\n"
+    "\n"
+    "Some text.\n"
+    "\n"
+    "```python\n"
+    "print('not a diagram')\n"
+    "```\n"
+    "\n"
+    "```mermaid\n"
+    "sequenceDiagram\n"
+    "    A->>B: hello\n"
+    "```\n"
+    "\n"
+    '<div class="mermaid">\n'
+    "pie title Pets\n"
+    '    "Dogs" : 3\n'
+    "</div>\n"
+)
+
+PLACEHOLDER_ID = re.compile(r'id="mermaid-[^"]+"')
+
+
+def legacy_extract(content):
+    """The old regex extraction: fenced blocks first, then divs"""
+    diagrams = []
+    for pattern in LEGACY_PATTERNS:
+        for match in re.finditer(pattern, content, re.DOTALL | re.MULTILINE):
+            diagram_id = f"mermaid-{len(diagrams)}"
+            diagrams.append({'id': diagram_id, 'content': match.group(1).strip()})
+            content = content.replace(
+                match.group(0), f'<div id="{diagram_id}" class="mermaid-placeholder"></div>')
+    return content, diagrams
+
+
+def line_of(content, text):
+    """1-based line on which ``text`` first appears"""
+    return content[:content.index(text)].count('\n') + 1
+
+
+def test_matches_legacy_extraction():
+    output, diagrams = MermaidScanner().scan(DOCUMENT)
+    legacy_output, legacy_diagrams = legacy_extract(DOCUMENT)
+
+    assert [d['content'] for d in diagrams] == [d['content'] for d in legacy_diagrams]
+    assert PLACEHOLDER_ID.sub('id=""', output) == PLACEHOLDER_ID.sub('id=""', legacy_output)
+    assert all(d['placeholder'] in output for d in diagrams)
+
+
+def test_line_numbers_point_at_block_start():
+    _, diagrams = MermaidScanner().scan(DOCUMENT)
+    assert [d['line'] for d in diagrams] == [
+        line_of(DOCUMENT, "```mermaid\nflowchart"),
+        line_of(DOCUMENT, "```mermaid\nsequenceDiagram"),
+        line_of(DOCUMENT, '<div class="mermaid">'),
+    ]
+
+    _, shifted = MermaidScanner(line_offset=4).scan(DOCUMENT)
+    assert [d['line'] for d in shifted] == [d['line'] + 4 for d in diagrams]
+
+
+def test_line_numbers_include_front_matter():
+    front_matter = "---\ntitle: Test\nauthor: Someone\n---\n"
+    parser = MarkdownParser()
+    try:
+        diagrams = parser.parse(front_matter + DOCUMENT)['mermaid_diagrams']
+    finally:
+        parser.close()
+    assert [d['line'] for d in diagrams] == [
+        line_of(front_matter + DOCUMENT, "```mermaid\nflowchart"),
+        line_of(front_matter + DOCUMENT, "```mermaid\nsequenceDiagram"),
+        line_of(front_matter + DOCUMENT, '<div class="mermaid">'),
+    ]
+
+
+def test_ignores_mermaid_inside_other_fences():
+    content = "````markdown\n```mermaid\ngraph TD\n    A --> B\n```\n````\n"
+    output, diagrams = MermaidScanner().scan(content)
+    assert diagrams == []
+    assert output == content
+
+
+def test_tilde_and_indented_fences():
+    content = "~~~mermaid\ngraph TD\n~~~\n\n  ```mermaid\n  graph LR\n    A --> B\n  ```\n"
+    output, diagrams = MermaidScanner().scan(content)
+    assert [d['content'] for d in diagrams] == ["graph TD", "graph LR\n  A --> B"]
+    assert [d['line'] for d in diagrams] == [1, 5]
+    assert output.count('mermaid-placeholder') == 2
+
+
+def test_divs_on_one_line():
+    content = 'Before <div class="mermaid">graph TD</div> and <div class="mermaid">graph LR</div> after\n'
+    output, diagrams = MermaidScanner().scan(content)
+    assert [d['content'] for d in diagrams] == ["graph TD", "graph LR"]
+    assert [d['line'] for d in diagrams] == [1, 1]
+    assert output.startswith("Before <div id=") and output.endswith(" after\n")
+
+
+def test_unclosed_blocks_pass_through():
+    for content in ("```mermaid\ngraph TD\n", '<div class="mermaid">\ngraph TD\n'):
+        output, diagrams = MermaidScanner().scan(content)
+        assert diagrams == []
+        assert output == content
+
+
+def test_ids_are_stable_and_unique():
+    first = "```mermaid\ngraph TD\n```\n"
+    second = "```mermaid\ngraph LR\n```\n"
+    _, diagrams = MermaidScanner().scan(first + "\n" + second + "\n" + first)
+    _, edited = MermaidScanner().scan("# Intro\n\n" + first + "\n" + second.replace("LR", "RL"))
+
+    ids = [d['id'] for d in diagrams]
+    assert ids[2] == ids[0] + "-2"
+    assert len(set(ids)) == 3
+    assert edited[0]['id'] == ids[0]
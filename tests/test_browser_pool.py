@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Browser pool start-up and shutdown (browser.BrowserPool), with a stubbed Playwright
+"""
+
+import asyncio
+import sys
+import types
+
+import pytest
+
+from browser import BrowserPool
+
+
+class FakeBrowser:
+    def __init__(self, driver):
+        self.driver = driver
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+        self.driver.browsers.remove(self)
+
+    def is_connected(self):
+        return not self.closed
+
+
+class FakeChromium:
+    def __init__(self, driver):
+        self.driver = driver
+
+    async def launch(self, headless=True, args=None):
+        if len(self.driver.browsers) >= self.driver.launchable:
+            raise RuntimeError("Executable doesn't exist")
+        browser = FakeBrowser(self.driver)
+        self.driver.browsers.append(browser)
+        return browser
+
+
+class FakeDriver:
+    """Counts running Playwright drivers and the browsers each one launched"""
+    running = 0
+
+    def __init__(self, launchable):
+        self.launchable = launchable
+        self.browsers = []
+        self.chromium = FakeChromium(self)
+
+
+class FakeManager:
+    def __init__(self, launchable):
+        self.launchable = launchable
+
+    async def start(self):
+        FakeDriver.running += 1
+        return FakeDriver(self.launchable)
+
+    async def __aexit__(self, exc_type, exc, tb):
+        FakeDriver.running -= 1
+
+
+@pytest.fixture
+def launcher(monkeypatch):
+    """Replace playwright.async_api with a stub; returns a setter for launchable browsers"""
+    settings = {'launchable': 0}
+    module = types.ModuleType('playwright.async_api')
+    module.async_playwright = lambda: FakeManager(settings['launchable'])
+    monkeypatch.setitem(sys.modules, 'playwright.async_api', module)
+    FakeDriver.running = 0
+    return settings
+
+
+def test_failed_launch_stops_the_driver(launcher):
+    async def scenario():
+        pool = BrowserPool(browsers=2)
+        for _ in range(3):
+            with pytest.raises(RuntimeError):
+                async with pool.page():
+                    pass
+            assert FakeDriver.running == 0
+            assert not pool.started
+        await pool.close()
+
+    asyncio.run(scenario())
+    assert FakeDriver.running == 0
+
+
+def test_partial_launch_closes_started_browsers(launcher):
+    launcher['launchable'] = 1
+
+    async def scenario():
+        pool = BrowserPool(browsers=2)
+        with pytest.raises(RuntimeError):
+            await pool.start()
+        assert pool._browsers == []
+        assert pool._playwright is None
+
+    asyncio.run(scenario())
+    assert FakeDriver.running == 0
+
+
+def test_start_after_failure_then_close(launcher):
+    async def scenario():
+        pool = BrowserPool(browsers=2)
+        with pytest.raises(RuntimeError):
+            await pool.start()
+
+        launcher['launchable'] = 2
+        await pool.start()
+        assert pool.started
+        assert FakeDriver.running == 1
+
+        await pool.close()
+        assert FakeDriver.running == 0
+
+    asyncio.run(scenario())
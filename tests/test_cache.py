@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+On-disk caches (cache.DiskCache, ParseCache, SVGCache)
+"""
+
+import os
+
+import pytest
+
+from cache import DiskCache, ParseCache, SVGCache
+from cache import parse_cache
+from parser import MarkdownParser
+
+EXTENSIONS = ['markdown.extensions.toc', 'markdown.extensions.footnotes']
+CONFIGS = {'markdown.extensions.toc': {'permalink': False}}
+
+
+@pytest.fixture
+def versions(monkeypatch):
+    """Replace library_versions() with fixed, adjustable versions"""
+    current = {'value': ('3.0', '2.0', '1.0')}
+    monkeypatch.setattr(parse_cache, 'library_versions', lambda: current['value'])
+    return current
+
+
+def entry_path(cache: DiskCache, key: str):
+    return cache.cache_dir / key[:2] / f"{key}{cache.suffix}"
+
+
+def test_make_key_separates_parts():
+    assert DiskCache.make_key('ab', 'c') != DiskCache.make_key('a', 'bc')
+    assert DiskCache.make_key('a', b'b') == DiskCache.make_key('a', 'b')
+
+
+def test_parse_key_changes_with_extensions_and_configs(tmp_path, versions):
+    cache = ParseCache(tmp_path)
+    key = cache.document_key("# Title\n", EXTENSIONS, CONFIGS)
+
+    assert cache.document_key("# Title\n", EXTENSIONS, CONFIGS) == key
+    assert cache.document_key("# Title\n", EXTENSIONS[::-1], CONFIGS) != key
+    assert cache.document_key("# Title\n", EXTENSIONS + ['markdown.extensions.abbr'], CONFIGS) != key
+    assert cache.document_key("# Title\n", EXTENSIONS, {'markdown.extensions.toc': {'permalink': True}}) != key
+    assert cache.section_key("# Title\n", EXTENSIONS, CONFIGS) != key
+
+
+def test_parse_key_changes_with_conversion_mode(tmp_path, versions):
+    cache = ParseCache(tmp_path)
+    key = cache.document_key("# Title\n", EXTENSIONS, CONFIGS)
+
+    assert cache.document_key("# Title\n", EXTENSIONS, CONFIGS, incremental=False) == key
+    incremental_key = cache.document_key("# Title\n", EXTENSIONS, CONFIGS, incremental=True)
+    assert incremental_key != key
+    assert incremental_key != cache.section_key("# Title\n", EXTENSIONS, CONFIGS)
+
+
+def test_whole_and_incremental_runs_do_not_share_entries(tmp_path):
+    cache = ParseCache(tmp_path)
+    content = "# Title\n\nText.\n\n# Next\n\nMore.\n"
+    whole = MarkdownParser(cache=cache)
+    incremental = MarkdownParser(cache=cache, incremental=True)
+    try:
+        key = cache.document_key(content, whole.extensions, whole.extension_configs)
+        cache.set(key, {'html': 'whole-document result', 'stats': {}})
+        assert whole.parse(content)['html'] == 'whole-document result'
+        assert incremental.parse(content)['html'] != 'whole-document result'
+    finally:
+        whole.close()
+        incremental.close()
+
+
+def test_parse_key_changes_with_library_versions(tmp_path, versions):
+    cache = ParseCache(tmp_path)
+    key = cache.document_key("# Title\n", EXTENSIONS, CONFIGS)
+    cache.set(key, {'html': '<h1>Title</h1>'})
+
+    versions['value'] = ('3.1', '2.0', '1.0')
+    new_key = cache.document_key("# Title\n", EXTENSIONS, CONFIGS)
+    assert new_key != key
+    assert cache.get(new_key) is None
+
+    versions['value'] = ('3.0', '2.0', '1.1')
+    assert cache.document_key("# Title\n", EXTENSIONS, CONFIGS) not in (key, new_key)
+
+
+def test_parse_key_changes_with_format_version(tmp_path, versions, monkeypatch):
+    cache = ParseCache(tmp_path)
+    key = cache.document_key("# Title\n", EXTENSIONS, CONFIGS)
+    monkeypatch.setattr(parse_cache, 'PARSE_FORMAT_VERSION', 'test')
+    assert cache.document_key("# Title\n", EXTENSIONS, CONFIGS) != key
+
+
+def test_svg_key_changes_with_version_config_and_viewport(tmp_path):
+    cache = SVGCache(tmp_path)
+    viewport = {'width': 1200, 'height': 800}
+    key = cache.diagram_key("graph TD", "10.6.1", {'theme': 'default'}, viewport)
+
+    assert cache.diagram_key("graph TD", "10.6.1", {'theme': 'default'}, dict(viewport)) == key
+    assert cache.diagram_key("graph TD", "11.0.0", {'theme': 'default'}, viewport) != key
+    assert cache.diagram_key("graph TD", "10.6.1", {'theme': 'dark'}, viewport) != key
+    assert cache.diagram_key("graph TD", "10.6.1", {'theme': 'default'}, {'width': 800, 'height': 800}) != key
+
+
+def test_parse_cache_recovers_from_corrupt_entry(tmp_path, versions):
+    cache = ParseCache(tmp_path)
+    key = cache.document_key("# Title\n", EXTENSIONS, CONFIGS)
+    cache.set(key, {'html': '<h1>Title</h1>'})
+    entry_path(cache, key).write_bytes(b'not a pickle')
+
+    assert cache.get(key) is None
+    assert cache.get_stats()['misses'] == 1
+
+    cache.set(key, {'html': '<h1>Title</h1>'})
+    assert cache.get(key) == {'html': '<h1>Title</h1>'}
+
+
+def test_parser_reconverts_corrupt_entry(tmp_path):
+    cache = ParseCache(tmp_path)
+    parser = MarkdownParser(cache=cache)
+    try:
+        expected = parser.parse("# Title\n\nText.\n")
+        for path in tmp_path.glob('*/*.pkl'):
+            path.write_bytes(path.read_bytes()[:10])
+        assert parser.parse("# Title\n\nText.\n")['html'] == expected['html']
+    finally:
+        parser.close()
+
+
+def test_svg_cache_recovers_from_corrupt_entry(tmp_path):
+    cache = SVGCache(tmp_path)
+    key = cache.diagram_key("graph TD", "10.6.1", {}, {})
+    cache.set(key, '<svg></svg>')
+    entry_path(cache, key).write_bytes(b'\xff\xfe<svg')
+
+    assert cache.get(key) is None
+
+    cache.set(key, '<svg></svg>')
+    assert cache.get(key) == '<svg></svg>'
+
+
+def test_eviction_removes_least_recently_used(tmp_path):
+    cache = DiskCache(tmp_path, max_bytes=250)
+    keys = [DiskCache.make_key(name) for name in ('a', 'b', 'c')]
+
+    cache.set_bytes(keys[0], b'a' * 100)
+    os.utime(entry_path(cache, keys[0]), (1, 1))
+    cache.set_bytes(keys[1], b'b' * 100)
+    os.utime(entry_path(cache, keys[1]), (2, 2))
+
+    # Reading refreshes the entry, so the unread one is evicted first
+    assert cache.get_bytes(keys[0]) == b'a' * 100
+    cache.set_bytes(keys[2], b'c' * 100)
+
+    assert cache.get_bytes(keys[1]) is None
+    assert cache.get_bytes(keys[0]) == b'a' * 100
+    assert cache.get_bytes(keys[2]) == b'c' * 100
+    assert cache.get_stats()['evictions'] == 1
+
+
+def test_eviction_keeps_total_under_budget(tmp_path):
+    cache = DiskCache(tmp_path, max_bytes=1000)
+    for i in range(30):
+        cache.set_bytes(DiskCache.make_key(str(i)), bytes(100))
+
+    total = sum(path.stat().st_size for path in tmp_path.glob('*/*.bin'))
+    assert total <= 1000
+    assert cache.get_stats()['evictions'] == 20
+
+
+def test_overwrite_does_not_count_twice(tmp_path):
+    cache = DiskCache(tmp_path, max_bytes=250)
+    key = DiskCache.make_key('same')
+    for _ in range(5):
+        cache.set_bytes(key, bytes(100))
+    assert cache.get_stats()['evictions'] == 0
+    assert cache.get_bytes(key) == bytes(100)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Emoji shortcode replacement (parser.emoji_shortcodes)
+"""
+
+import emoji
+import pytest
+
+from parser import emoji_shortcodes
+from parser.emoji_shortcodes import emojize_markdown
+
+
+def test_matches_emoji_library_outside_code():
+    text = "Launch :rocket: with :white_check_mark:, :thumbsup: and :not_an_emoji: at 10:30\n"
+    assert emojize_markdown(text) == emoji.emojize(text, language='alias')
+
+
+def test_colon_of_unknown_name_opens_next_shortcode():
+    assert emojize_markdown("at 10:30:smile: and :x:fire:\n") == "at 10:30😄 and ❌fire:\n"
+
+
+@pytest.mark.parametrize('block', [
+    "```\n:rocket:\n```",
+    "```python\nx = ':rocket:'\n```",
+    "~~~\n:rocket:\n~~~",
+    "````\n```\n:rocket:\n```\n````",
+    "```\n:rocket:\n`````",
+    "  ```\n:rocket:\n   ```",
+    "```\n:rocket:\n\t```\r",
+])
+def test_skips_fenced_blocks(block):
+    content = f":fire: before\n\n{block}\n\n:fire: after\n"
+    assert emojize_markdown(content) == f"🔥 before\n\n{block}\n\n🔥 after\n"
+
+
+def test_unclosed_fence_runs_to_the_end():
+    content = ":fire:\n\n```\n:rocket:\n~~~\n:rocket:\n"
+    assert emojize_markdown(content) == "🔥\n\n```\n:rocket:\n~~~\n:rocket:\n"
+
+
+def test_fence_needs_a_line_of_its_own():
+    content = "Text ``` :rocket: ```\n    ```\n:fire:\n"
+    assert emojize_markdown(content) == "Text ``` :rocket: ```\n    ```\n🔥\n"
+
+
+def test_skips_inline_code():
+    content = "Use `:rocket:` or ``a ` :rocket:`` but :rocket: here, and `:fire:\n"
+    assert emojize_markdown(content) == "Use `:rocket:` or ``a ` :rocket:`` but 🚀 here, and `🔥\n"
+
+
+def test_inline_code_does_not_span_lines():
+    content = "`open :rocket:\nclose` :fire:\n"
+    assert emojize_markdown(content) == "`open 🚀\nclose` 🔥\n"
+
+
+@pytest.mark.parametrize('content', [
+    "No colons at all\n",
+    "Time 10:30, ratio 1:2 and a::b\n",
+    "Unknown :not_an_emoji: and :also_unknown:\n```\ncode\n```\n",
+])
+def test_returns_content_unchanged_without_known_shortcode(content, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("content should not be scanned for code")
+
+    monkeypatch.setattr(emoji_shortcodes, '_fenced_blocks', fail)
+    monkeypatch.setattr(emoji_shortcodes, '_emojize_text', fail)
+    assert emojize_markdown(content) is content
+
+
+def test_returns_same_object_when_only_code_has_shortcodes():
+    content = "```\n:rocket:\n```\n\nUse `:fire:`\n"
+    assert emojize_markdown(content) is content
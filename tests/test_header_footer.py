@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Header/footer rendering with page numbers filled by Chromium (ConfigManager)
+"""
+
+import logging
+
+import pytest
+
+from config import ConfigManager, TemplateVariables
+from config import config_manager
+
+CURRENT = '<span class="pageNumber"></span>'
+TOTAL = '<span class="totalPages"></span>'
+
+
+@pytest.fixture
+def manager():
+    manager = ConfigManager()
+    manager.config['page_numbers'] = {'native': True}
+    return manager
+
+
+def variables(title='Report'):
+    return TemplateVariables({'title': title}, {})
+
+
+@pytest.mark.parametrize('template, expected', [
+    ("{{page.current}} / {{page.total}}", f"{CURRENT} / {TOTAL}"),
+    ("{{ page.current }} de {{  page.total  }}", f"{CURRENT} de {TOTAL}"),
+    ("{{ page['current'] }}/{{ page[\"total\"] }}", f"{CURRENT}/{TOTAL}"),
+    ("{{ page.current|string }} of {{ page.total | e }}", f"{CURRENT} of {TOTAL}"),
+    ("{{ page . current | string | trim }}", CURRENT),
+])
+def test_supported_forms_become_print_classes(manager, template, expected):
+    assert manager.to_native_page_numbers(template) == expected
+
+
+def test_other_variables_are_untouched(manager):
+    template = "<span>{{ document.title }}</span> {{ page.current }}"
+    assert manager.to_native_page_numbers(template) == f"<span>{{{{ document.title }}}}</span> {CURRENT}"
+
+
+@pytest.mark.parametrize('template', [
+    "{% if page.total > 1 %}{{ page.current }}{% endif %}",
+    "{{ page.roman }}",
+    "{{ page.current + 1 }}",
+    "{{ page.current|default(1) }}",
+])
+def test_unsupported_forms_log_a_warning(manager, template, caplog):
+    with caplog.at_level(logging.WARNING, logger=config_manager.logger.name):
+        manager.to_native_page_numbers(template)
+    assert "cannot be filled per page" in caplog.text
+
+
+def test_supported_forms_do_not_warn(manager, caplog):
+    with caplog.at_level(logging.WARNING, logger=config_manager.logger.name):
+        manager.to_native_page_numbers("Página {{ page.current }} de {{ page.total }} — {{ document.title }}")
+    assert caplog.text == ""
+
+
+def test_render_header_footer_output(manager):
+    template = '<div>{{ document.title }} · Página {{page.current}} de {{page.total}}</div>'
+    assert manager.render_header_footer(template, variables()) == f'<div>Report · Página {CURRENT} de {TOTAL}</div>'
+
+
+def test_legacy_mode_renders_values(manager):
+    manager.config['page_numbers'] = {'native': False}
+    template_vars = variables()
+    template_vars.set_page_info(2, 5)
+    assert manager.render_header_footer("{{page.current}}/{{page.total}}", template_vars) == "2/5"
+
+
+def test_render_cache_reuses_and_stays_bounded(manager, monkeypatch):
+    monkeypatch.setattr(config_manager, 'MAX_RENDERED_TEMPLATES', 4)
+    calls = []
+    original = manager.render_template
+
+    def counting(template, template_vars):
+        calls.append(template)
+        return original(template, template_vars)
+
+    monkeypatch.setattr(manager, 'render_template', counting)
+    template = "{{ document.title }} {{ page.current }}"
+    shared = variables()
+
+    first = manager.render_header_footer(template, shared)
+    assert manager.render_header_footer(template, shared) == first
+    assert len(calls) == 1
+
+    for i in range(10):
+        assert manager.render_header_footer(template, variables(f"Doc {i}")) == f"Doc {i} {CURRENT}"
+    assert len(manager._render_cache) == 4
+    assert len(calls) == 11
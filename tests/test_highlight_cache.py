@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Cached code highlighting (parser.highlight_cache)
+"""
+
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from markdown.extensions.codehilite import CodeHilite
+from pygments import highlight
+from pygments.formatters import HtmlFormatter
+from pygments.lexers import get_lexer_by_name
+
+from generator.html_generator import pygments_stylesheet
+from parser import MarkdownParser, highlight_cache, markdown_parser
+from parser.highlight_cache import CachedCodeHilite, CompactHtmlFormatter
+
+OPTIONS = {'noclasses': True, 'style': 'default', 'cssclass': 'highlight'}
+
+
+def test_cached_output_matches_codehilite():
+    highlight_cache.clear()
+    source = "def f(x):\n    return x * 2\n"
+    expected = CodeHilite(source, lang='python', **OPTIONS).hilite()
+    before = highlight_cache.get_stats()
+
+    assert CachedCodeHilite(source, lang='python', **OPTIONS).hilite() == expected
+    assert CachedCodeHilite(source, lang='python', **OPTIONS).hilite() == expected
+
+    delta = highlight_cache.stats_since(before)
+    assert (delta['misses'], delta['hits']) == (1, 1)
+
+
+def test_concurrent_highlighting_keeps_cache_consistent(monkeypatch):
+    highlight_cache.clear()
+    monkeypatch.setattr(highlight_cache, 'MAX_CACHED_BLOCKS', 16)
+    before = highlight_cache.get_stats()
+    sources = [f"value_{i} = {i} + {i % 7}\n" for i in range(64)]
+
+    def work(worker: int):
+        for i in range(400):
+            source = sources[(i * 7 + worker) % len(sources)]
+            assert f"value_{sources.index(source)}" in CachedCodeHilite(source, lang='python', **OPTIONS).hilite()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(work, range(8)))
+
+    delta = highlight_cache.stats_since(before)
+    assert delta['hits'] + delta['misses'] == 8 * 400
+    assert highlight_cache.get_stats()['cached_blocks'] <= 16
+
+
+SAMPLES = {
+    'python': "@cache\ndef f(x: int = 0) -> str:\n    \"\"\"Doc\"\"\"\n    return f'{x!r}' + r'\\d' # note\n",
+    'javascript': "const re = /a+b/g;\nclass A extends B { async m() { return `t${1}`; } }\n",
+    'bash': "for f in *.md; do echo \"$f\" > /dev/null 2>&1; done\n",
+    'html': "<!DOCTYPE html>\n<a href=\"#x\" data-n=1>&amp; text</a><!-- c -->\n",
+    'yaml': "key: [1, 'two', true]\n# comment\nanchor: &a {x: null}\n",
+}
+TOKEN_PATTERN = re.compile(r'<span(?: (?:style|class)="([^"]*)")?>([^<]*)</span>|([^<]+)')
+
+
+def code_of(html):
+    """Markup inside the <pre> of a highlighted block"""
+    return re.search(r'<pre[^>]*>(.*)</pre>', html, re.DOTALL).group(1)
+
+
+def styled_runs(html, resolve=lambda value: value):
+    """
+    Split highlighted code into (declarations, text) runs, merging neighbours
+    that end up with the same declarations
+    """
+    runs = []
+    for match in TOKEN_PATTERN.finditer(code_of(html)):
+        if match.group(3) is not None:
+            style, text = '', match.group(3)
+        else:
+            style, text = resolve(match.group(1)) if match.group(1) else '', match.group(2)
+        if not text:
+            continue
+        if runs and runs[-1][0] == style:
+            runs[-1] = (style, runs[-1][1] + text)
+        else:
+            runs.append((style, text))
+    return runs
+
+
+def emitted_classes(html):
+    return set(re.findall(r'<span class="([^"]*)">', code_of(html)))
+
+
+def css_rules(stylesheet, css_class='highlight'):
+    """Declarations of each single-class token rule, keyed by class"""
+    rules = re.finditer(r'^\.%s \.([\w-]+) \{ ([^}]*?) \}' % css_class, stylesheet, re.MULTILINE)
+    return {match.group(1): match.group(2) for match in rules}
+
+
+@pytest.mark.parametrize('style', ['default', 'monokai', 'friendly', 'bw'])
+@pytest.mark.parametrize('lang', sorted(SAMPLES))
+def test_compact_classes_sit_where_inline_styles_do(lang, style):
+    lexer = get_lexer_by_name(lang)
+    inline = highlight(SAMPLES[lang], lexer, HtmlFormatter(style=style, noclasses=True))
+    compact = highlight(SAMPLES[lang], lexer, CompactHtmlFormatter(style=style))
+    rules = css_rules(pygments_stylesheet(style))
+
+    assert styled_runs(compact, rules.__getitem__) == styled_runs(inline)
+    assert '<span class=""' not in compact
+    assert len(TOKEN_PATTERN.findall(code_of(compact))) <= len(
+        TOKEN_PATTERN.findall(code_of(highlight(SAMPLES[lang], lexer, HtmlFormatter(style=style)))))
+
+
+@pytest.mark.parametrize('style', ['default', 'monokai'])
+def test_stylesheet_covers_every_emitted_class(style):
+    rules = css_rules(pygments_stylesheet(style))
+    emitted = set()
+    for lang, source in SAMPLES.items():
+        html = highlight(source, get_lexer_by_name(lang), CompactHtmlFormatter(style=style))
+        emitted.update(emitted_classes(html))
+    assert emitted
+    assert emitted <= set(rules)
+
+
+def test_class_mode_uses_compact_formatter():
+    parser = MarkdownParser(highlight_classes=True)
+    options = parser.extension_configs['markdown.extensions.codehilite']
+    assert highlight_cache.COMPACT_FORMATTER_SUPPORTED
+    assert options['pygments_formatter'] is CompactHtmlFormatter
+
+
+def test_class_mode_falls_back_without_formatter_internals(monkeypatch, caplog):
+    monkeypatch.setattr(markdown_parser, 'COMPACT_FORMATTER_SUPPORTED', False)
+    parser = MarkdownParser(highlight_classes=True)
+    options = parser.extension_configs['markdown.extensions.codehilite']
+    assert 'pygments_formatter' not in options
+    assert "stock class-based formatter" in caplog.text
+
+    html = parser.parse("```python\ndef f(): pass\n```\n")['html']
+    assert '<span class="k">def</span>' in html
+    assert 'style="' not in html
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Section-by-section conversion (MarkdownParser(incremental=True)) must
+produce the same HTML and TOC as converting the whole document
+"""
+
+import pytest
+
+from parser import MarkdownParser
+from parser.sections import needs_whole_document, split_sections
+
+DOCUMENTS = {
+    'footnotes': (
+        "# Intro\n\nFirst note[^a] and a second[^b].\n\n"
+        "# Details\n\nReused note[^a] and a named one[^long-name].\n\n"
+        "[^a]: Note A.\n"
+        "[^b]: Note B\n    with a continuation paragraph.\n\n"
+        "    Indented second paragraph of B.\n\n"
+        "[^long-name]: Defined in another section.\n"
+    ),
+    'duplicate_headings': (
+        "# Setup\n\n## Usage\n\nText.\n\n"
+        "# Setup\n\n## Usage\n\nMore text.\n\n"
+        "# Usage\n\n## Setup\n\nEnd.\n"
+    ),
+    'reference_links': (
+        "# One\n\nSee [the guide][guide] and [Example].\n\n"
+        "# Two\n\nAgain [the guide][GUIDE], plus [docs].\n\n"
+        "[guide]: https://example.com/guide \"Guide\"\n"
+        "[example]: https://example.com\n"
+        "[docs]:\n    https://example.com/docs\n"
+    ),
+    'abbreviations': (
+        "# HTML\n\nThe HTML spec and the W3C.\n\n"
+        "# Tools\n\nNo abbreviations here, only CSS.\n\n"
+        "*[HTML]: Hyper Text Markup Language\n"
+        "*[W3C]: World Wide Web Consortium\n"
+    ),
+    'setext_headings': (
+        "# Start\n\nTitle\n=====\n\nSubtitle\n--------\n\nText.\n\n"
+        "# Next\n\nTitle\n=====\n\nSubtitle\n--------\n"
+    ),
+    'code_and_html_blocks': (
+        "# Code\n\n```python\n# not a heading\nprint(1)\n```\n\n"
+        "<div>\n\n# still inside the div\n\n</div>\n\n"
+        "# After\n\nDone.\n"
+    ),
+}
+
+WHOLE_DOCUMENT = {
+    'toc_marker': "[TOC]\n\n# One\n\nText.\n\n# Two\n\nText.\n",
+    'footnote_placeholder': "# One\n\nNote[^a].\n\n///Footnotes Go Here///\n\n# Two\n\n[^a]: A.\n",
+    'single_section': "Intro without any heading.\n\nMore text.\n",
+}
+
+
+@pytest.fixture(scope='module')
+def parsers():
+    whole = MarkdownParser()
+    incremental = MarkdownParser(incremental=True)
+    yield whole, incremental
+    whole.close()
+    incremental.close()
+
+
+def assert_same_output(parsers, document):
+    whole, incremental = parsers
+    expected = whole.parse(document)
+    actual = incremental.parse(document)
+    assert actual['html'] == expected['html']
+    assert actual['toc'] == expected['toc']
+    assert actual['toc_tokens'] == expected['toc_tokens']
+
+
+@pytest.mark.parametrize('name', sorted(DOCUMENTS))
+def test_incremental_matches_whole_document(parsers, name):
+    document = DOCUMENTS[name]
+    assert not needs_whole_document(document)
+    assert_same_output(parsers, document)
+    # The comparison above really went through the section path
+    assert parsers[1].section_stats['sections'] >= 2
+
+
+@pytest.mark.parametrize('name', sorted(WHOLE_DOCUMENT))
+def test_whole_document_fallback(parsers, name):
+    document = WHOLE_DOCUMENT[name]
+    assert parsers[1].convert_incremental(document) is None
+    assert_same_output(parsers, document)
+
+
+def test_unchanged_sections_are_reused(parsers):
+    _, incremental = parsers
+    document = DOCUMENTS['duplicate_headings']
+    incremental.parse(document)
+    incremental.parse(document.replace("More text.", "Changed text."))
+    assert incremental.section_stats == {'sections': 6, 'converted': 1}
+
+
+def test_split_collects_definitions():
+    sections, definitions = split_sections(DOCUMENTS['footnotes'])
+    assert len(sections) == 2
+    assert list(definitions.footnotes) == ['a', 'b', 'long-name']
+
+
+def test_split_keeps_reference_url_on_next_line():
+    _, definitions = split_sections(DOCUMENTS['reference_links'])
+    assert ('docs', '[docs]:\n    https://example.com/docs') in definitions.references
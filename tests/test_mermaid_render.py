@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Mermaid batch rendering in pooled pages (MermaidProcessor.render_diagrams),
+with a stubbed browser
+"""
+
+import asyncio
+
+from browser import BrowserPool
+from parser import MermaidProcessor
+
+
+class FakePage:
+    """Render page whose renderMermaidDiagrams() outcome is set per test"""
+
+    def __init__(self, render):
+        self.render = render
+        self.closed = False
+        self.renders = 0
+
+    async def evaluate(self, expression, arg=None):
+        if 'renderMermaidDiagrams' in expression:
+            self.renders += 1
+            return await self.render(*arg)
+        return True
+
+    async def close(self):
+        self.closed = True
+
+    def is_closed(self):
+        return self.closed
+
+
+class FakeContext:
+    def __init__(self, render, pages):
+        self.render = render
+        self.pages = pages
+
+    async def new_page(self):
+        page = FakePage(self.render)
+        self.pages.append(page)
+        return page
+
+    async def close(self):
+        pass
+
+
+class FakeBrowser:
+    def __init__(self, render, pages):
+        self.render = render
+        self.pages = pages
+
+    async def new_context(self):
+        return FakeContext(self.render, self.pages)
+
+    def is_connected(self):
+        return True
+
+
+class FakeSession:
+    """Real BrowserPool handing out FakePages; records every page created"""
+
+    def __init__(self, render):
+        self.pages = []
+        self.pool = BrowserPool(assets=None)
+        self.pool._browsers = [FakeBrowser(render, self.pages)]
+
+    def page(self):
+        return self.pool.page()
+
+
+DIAGRAMS = [
+    {'id': 'mermaid-0', 'content': 'graph TD\n  A --> B'},
+    {'id': 'mermaid-1', 'content': 'graph TD\n  C --> D'},
+]
+
+
+def render_twice(render, timeout=60000):
+    """Render DIAGRAMS twice in one session; returns both results and the pages"""
+    async def scenario():
+        session = FakeSession(render)
+        processor = MermaidProcessor(timeout=timeout, session=session)
+        first = await processor.render_diagrams(DIAGRAMS)
+        second = await processor.render_diagrams(DIAGRAMS)
+        return first, second, session.pages
+
+    return asyncio.run(scenario())
+
+
+def test_page_is_reused_after_clean_render():
+    async def render(diagrams, timeout_ms):
+        return {'results': [{'id': d['id'], 'svg': '<svg/>'} for d in diagrams], 'timedOut': False}
+
+    first, second, pages = render_twice(render)
+    assert first == second == {'mermaid-0': {'svg': '<svg/>'}, 'mermaid-1': {'svg': '<svg/>'}}
+    assert len(pages) == 1 and pages[0].renders == 2
+    assert not pages[0].closed
+
+
+def test_page_is_reused_after_syntax_error():
+    async def render(diagrams, timeout_ms):
+        return {'results': [{'id': d['id'], 'error': 'Parse error'} for d in diagrams], 'timedOut': False}
+
+    first, _, pages = render_twice(render)
+    assert first['mermaid-0'] == {'error': 'Parse error'}
+    assert len(pages) == 1
+
+
+def test_page_is_discarded_after_diagram_timeout():
+    async def render(diagrams, timeout_ms):
+        return {
+            'results': [
+                {'id': diagrams[0]['id'], 'error': f'Timed out after {timeout_ms} ms'},
+                {'id': diagrams[1]['id'], 'svg': '<svg/>'},
+            ],
+            'timedOut': True,
+        }
+
+    first, _, pages = render_twice(render)
+    assert first == {'mermaid-0': {'error': 'Timed out after 60000 ms'}, 'mermaid-1': {'svg': '<svg/>'}}
+    assert len(pages) == 2
+    assert pages[0].closed and pages[0].renders == 1
+
+
+def test_page_is_discarded_after_batch_timeout():
+    async def render(diagrams, timeout_ms):
+        await asyncio.sleep(60)
+
+    first, second, pages = render_twice(render, timeout=20)
+    assert set(first) == {'mermaid-0', 'mermaid-1'}
+    assert all('Timed out' in result['error'] for result in first.values())
+    assert second == first
+    assert len(pages) == 2
+    assert all(page.closed for page in pages)
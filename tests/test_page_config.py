@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Page configuration precedence: config.yaml < front matter < CLI flags given
+"""
+
+from config import ConfigManager
+from generator import PDFGenerator
+from main import setup_argument_parser
+
+
+def page_config(cli_args, metadata):
+    """Resolve the page config the way PDFGenerator does for a CLI run"""
+    args = setup_argument_parser().parse_args(['documento.md', *cli_args])
+    generator = PDFGenerator(format=args.format, landscape=args.landscape, scale=args.scale)
+    combined = dict(metadata)
+    combined.update(generator.overrides)
+    return generator.config_manager.get_page_config(combined)
+
+
+def test_flags_not_given_are_not_overrides():
+    args = setup_argument_parser().parse_args(['documento.md'])
+    assert (args.format, args.landscape, args.scale) == (None, None, None)
+    assert PDFGenerator(format=args.format, landscape=args.landscape, scale=args.scale).overrides == {}
+
+
+def test_front_matter_orientation_survives_default_cli():
+    assert page_config([], {'orientation': 'landscape'})['orientation'] == 'landscape'
+
+
+def test_config_defaults_apply_without_flags():
+    defaults = ConfigManager().config['page']
+    config = page_config([], {})
+    assert config['format'] == defaults['format']
+    assert config['scale'] == defaults['scale']
+
+
+def test_cli_flags_override_front_matter():
+    config = page_config(['--format', 'A3', '--scale', '0.8'], {'format': 'Letter'})
+    assert config['format'] == 'A3'
+    assert config['scale'] == 0.8
+    assert page_config(['--landscape'], {})['orientation'] == 'landscape'
+    assert page_config(['--portrait'], {'orientation': 'landscape'})['orientation'] == 'portrait'
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Local file access of documents served from memory (browser.page_loader)
+"""
+
+import asyncio
+import logging
+from pathlib import Path
+from urllib.parse import quote
+
+import pytest
+
+from browser.page_loader import LOCAL_ORIGIN, serve_html
+
+
+class FakeRequest:
+    def __init__(self, url):
+        self.url = url
+
+
+class FakeRoute:
+    """Records how a request was answered"""
+
+    def __init__(self, url):
+        self.request = FakeRequest(url)
+        self.status = None
+        self.path = None
+
+    async def fulfill(self, status=200, body=None, headers=None, path=None):
+        self.status = status
+        self.path = path
+
+
+class FakePage:
+    """Keeps the handler registered by serve_html()"""
+
+    def __init__(self):
+        self.handler = None
+
+    async def route(self, pattern, handler):
+        self.handler = handler
+
+    async def unroute(self, pattern, handler):
+        self.handler = None
+
+
+def local_url(path: Path) -> str:
+    return LOCAL_ORIGIN + quote(path.resolve().as_posix())
+
+
+def request(tmp_path: Path, target: Path, file_access: str) -> FakeRoute:
+    """Serve a document from tmp_path/doc and request ``target`` from it"""
+    async def run():
+        page = FakePage()
+        async with serve_html(page, "<p>doc</p>", tmp_path / "doc", file_access) as url:
+            document = FakeRoute(url)
+            await page.handler(document)
+            assert document.status == 200
+            route = FakeRoute(local_url(target))
+            await page.handler(route)
+            return route
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def files(tmp_path):
+    (tmp_path / "doc").mkdir()
+    inside = tmp_path / "doc" / "logo.png"
+    outside = tmp_path / "shared.png"
+    inside.write_bytes(b"png")
+    outside.write_bytes(b"png")
+    return inside, outside
+
+
+def test_any_serves_parent_and_absolute_paths(tmp_path, files):
+    inside, outside = files
+    assert request(tmp_path, inside, 'any').path == str(inside.resolve())
+    assert request(tmp_path, outside, 'any').path == str(outside.resolve())
+
+
+def test_base_dir_refuses_files_outside_with_warning(tmp_path, files, caplog):
+    inside, outside = files
+    assert request(tmp_path, inside, 'base_dir').path == str(inside.resolve())
+    with caplog.at_level(logging.WARNING, logger='browser.page_loader'):
+        route = request(tmp_path, outside, 'base_dir')
+    assert route.status == 404
+    assert "Refused local resource outside" in caplog.text
+
+
+def test_none_refuses_every_local_file(tmp_path, files, caplog):
+    inside, _ = files
+    with caplog.at_level(logging.WARNING, logger='browser.page_loader'):
+        route = request(tmp_path, inside, 'none')
+    assert route.status == 404
+    assert "local files disabled" in caplog.text
+
+
+def test_missing_file_is_logged(tmp_path, files, caplog):
+    with caplog.at_level(logging.WARNING, logger='browser.page_loader'):
+        route = request(tmp_path, tmp_path / "missing.png", 'any')
+    assert route.status == 404
+    assert "Local resource not found" in caplog.text
+
+
+def test_invalid_mode_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        request(tmp_path, tmp_path, 'everything')
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Parallel section conversion (parser.parallel.SectionPool)
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from parser import MarkdownParser
+from parser import markdown_parser
+from parser.parallel import MIN_PARALLEL_CHARS, chunk_by_size
+
+
+def build_document(sample: str, copies: int) -> str:
+    """Repeat the sample body with shared headings, footnotes and references"""
+    _, body = sample.split('\n---\n', 1)
+    parts = []
+    for i in range(copies):
+        parts.append(f"# Part {i}\n\nSee the [guide] and note[^n{i}].\n\n{body}")
+    parts.append("[guide]: https://example.com/guide \"Guide\"\n")
+    parts.extend(f"[^n{i}]: Footnote {i}.\n" for i in range(copies))
+    return '\n'.join(parts)
+
+
+def parse_all(document: str, **options):
+    """Parse with a fresh parser; also report whether the pool was started"""
+    parser = MarkdownParser(**options)
+    try:
+        result = parser.parse(document)
+        return result, parser._pool is not None
+    finally:
+        parser.close()
+
+
+def assert_same_result(parallel, serial):
+    assert parallel['html'] == serial['html']
+    assert parallel['toc'] == serial['toc']
+    assert parallel['toc_tokens'] == serial['toc_tokens']
+    assert parallel['mermaid_diagrams'] == serial['mermaid_diagrams']
+
+
+@pytest.fixture
+def large_document(sample_markdown):
+    document = build_document(sample_markdown, 24)
+    assert len(document) >= MIN_PARALLEL_CHARS
+    return document
+
+
+def test_parallel_output_equals_serial(large_document):
+    serial, _ = parse_all(large_document, incremental=True)
+    whole, _ = parse_all(large_document)
+    parallel, pooled = parse_all(large_document, workers=2)
+
+    assert pooled
+    assert_same_result(parallel, serial)
+    assert_same_result(parallel, whole)
+
+
+def test_parallel_output_equals_serial_for_small_sections(sample_markdown, monkeypatch):
+    monkeypatch.setattr(markdown_parser, 'MIN_PARALLEL_CHARS', 0)
+    document = build_document(sample_markdown, 3)
+    serial, _ = parse_all(document, incremental=True)
+    parallel, pooled = parse_all(document, workers=3)
+
+    assert pooled
+    assert_same_result(parallel, serial)
+
+
+def test_chunks_keep_order_and_cover_every_section():
+    texts = ["x" * size for size in (10, 500, 20, 20, 300, 5, 5, 5, 200)]
+    chunks = chunk_by_size(texts, 4)
+    assert [index for chunk in chunks for index in chunk] == list(range(len(texts)))
+    assert all(chunks)
+
+
+def test_parsers_share_one_section_pool(large_document):
+    serial, _ = parse_all(large_document, incremental=True)
+    owner = MarkdownParser(workers=2)
+    pool = owner.create_section_pool()
+    parsers = [MarkdownParser(workers=2, section_pool=pool) for _ in range(3)]
+    try:
+        with ThreadPoolExecutor(max_workers=len(parsers)) as threads:
+            results = list(threads.map(lambda parser: parser.parse(large_document), parsers))
+        for result in results:
+            assert_same_result(result, serial)
+
+        executor = pool._executor
+        assert executor is not None and len(executor._processes) <= pool.workers
+
+        for parser in parsers:
+            parser.close()
+        assert pool._executor is executor
+    finally:
+        pool.close()
+        owner.close()
+    assert pool._executor is None
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Render server over a Unix socket, without Chromium (HTML output only)
+"""
+
+import asyncio
+import json
+import socket
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from server import MAX_BODY_BYTES, RenderServer
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason="needs Unix sockets")
+
+
+async def http(socket_path: str, request: bytes):
+    """Send a raw request and return (status, headers, body)"""
+    reader, writer = await asyncio.open_unix_connection(socket_path)
+    writer.write(request)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    headers = dict(line.split(': ', 1) for line in lines[1:])
+    return int(lines[0].split(' ')[1]), headers, body
+
+
+def post(path: str, body: bytes, content_type: str = 'text/markdown') -> bytes:
+    return (f"POST {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n").encode('latin-1') + body
+
+
+def run_with_server(scenario, **server_options):
+    """Start a RenderServer on a temporary Unix socket and run ``scenario(server, path)``"""
+    async def run():
+        server = RenderServer(concurrency=1, **server_options)
+        await server.start(warm_browser=False)
+        with tempfile.TemporaryDirectory() as directory:
+            socket_path = str(Path(directory) / "mdpdf.sock")
+            listener = await asyncio.start_unix_server(server.handle_connection, path=socket_path)
+            try:
+                async with listener:
+                    return await scenario(server, socket_path)
+            finally:
+                await server.close()
+    return asyncio.run(run())
+
+
+def test_health():
+    async def scenario(server, path):
+        return await http(path, b"GET /health HTTP/1.1\r\nHost: localhost\r\n\r\n")
+
+    status, headers, body = run_with_server(scenario, queue_limit=3)
+    data = json.loads(body)
+    assert status == 200
+    assert headers['Content-Type'] == 'application/json'
+    assert data['status'] == 'ok'
+    assert (data['concurrency'], data['queue_limit'], data['active']) == (1, 3, 0)
+
+
+def test_invalid_json_is_400():
+    async def scenario(server, path):
+        return await http(path, post('/render', b'{"markdown": ', 'application/json'))
+
+    status, _, body = run_with_server(scenario)
+    assert status == 400
+    assert 'invalid JSON' in json.loads(body)['error']
+
+
+def test_oversized_body_is_413():
+    async def scenario(server, path):
+        head = (f"POST /render HTTP/1.1\r\nHost: localhost\r\n"
+                f"Content-Length: {MAX_BODY_BYTES + 1}\r\n\r\n").encode('latin-1')
+        return await http(path, head)
+
+    status, _, _ = run_with_server(scenario)
+    assert status == 413
+
+
+def test_full_queue_is_503():
+    async def scenario(server, path):
+        # Occupy the only render slot, with no room to wait in the queue
+        await server._slots.acquire()
+        try:
+            return await http(path, post('/render?output=html', b'# Busy\n')), server.counters
+        finally:
+            server._slots.release()
+
+    (status, headers, _), counters = run_with_server(scenario, queue_limit=0)
+    assert status == 503
+    assert headers['Retry-After'] == '1'
+    assert counters['rejected'] == 1
+
+
+def test_html_render():
+    document = b"# Title\n\nSome **bold** text.\n\n```python\nprint('hi')\n```\n"
+
+    async def scenario(server, path):
+        return await http(path, post('/render?output=html&mermaid=false', document))
+
+    status, headers, body = run_with_server(scenario)
+    html = body.decode('utf-8')
+    assert status == 200
+    assert headers['Content-Type'].startswith('text/html')
+    assert 'X-Render-Time' in headers
+    assert '<strong>bold</strong>' in html
+    assert 'id="title"' in html
+
+
+def test_local_files_are_off_without_base_dir(tmp_path):
+    assert RenderServer(concurrency=1).file_access == 'none'
+    assert RenderServer(concurrency=1, base_dir=str(tmp_path)).file_access == 'base_dir'
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Shared Jinja environment (config.template_env)
+"""
+
+import pytest
+
+from config import compile_template, configure_bytecode_cache, get_environment, get_template
+
+
+@pytest.fixture(autouse=True)
+def default_settings(tmp_path, monkeypatch):
+    """Keep the default bytecode directory inside the test and reset afterwards"""
+    monkeypatch.setenv('MDPDF_CACHE_DIR', str(tmp_path / 'default'))
+    configure_bytecode_cache()
+    yield
+    configure_bytecode_cache()
+
+
+def test_bytecode_cache_uses_configured_dir(tmp_path):
+    configure_bytecode_cache(tmp_path / 'jinja')
+    get_template('document.html')
+
+    assert list((tmp_path / 'jinja').iterdir())
+    assert not (tmp_path / 'default').exists()
+
+
+def test_bytecode_cache_defaults_to_cache_dir(tmp_path):
+    get_template('document.html')
+    assert list((tmp_path / 'default' / 'jinja').iterdir())
+
+
+def test_bytecode_cache_disabled(tmp_path):
+    configure_bytecode_cache(tmp_path / 'jinja', enabled=False)
+    get_template('document.html')
+
+    assert get_environment().bytecode_cache is None
+    assert not (tmp_path / 'jinja').exists()
+    assert not (tmp_path / 'default').exists()
+
+
+def test_configure_discards_compiled_sources(tmp_path):
+    template = compile_template("{{ page }}")
+    assert compile_template("{{ page }}") is template
+
+    configure_bytecode_cache(tmp_path / 'jinja')
+    assert compile_template("{{ page }}") is not template
+    assert compile_template("{{ page }}").render(page=3) == "3"
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Formatted table of contents (HTMLGenerator.format_toc_with_page_numbers)
+"""
+
+import pytest
+
+from generator import HTMLGenerator
+from parser import MarkdownParser
+
+DOCUMENT = (
+    "[TOC]\n\n"
+    "# Overview\n\n"
+    "## Intro {#custom-id}\n\n"
+    "### Deep *detail*\n\n"
+    "#### Deeper\n\n"
+    "## Use `<tag>` & \"quotes\"\n\n"
+    "# Overview\n"
+)
+
+
+@pytest.fixture(scope='module')
+def parsed():
+    parser = MarkdownParser()
+    try:
+        return parser.parse(DOCUMENT)
+    finally:
+        parser.close()
+
+
+def format_toc(parsed):
+    return HTMLGenerator().format_toc_with_page_numbers(parsed['toc'], parsed['toc_tokens'])
+
+
+def legacy_format_toc(toc_html):
+    """The BeautifulSoup implementation the token-based builder replaced"""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(toc_html, 'html.parser')
+    for li in soup.find_all('li'):
+        link = li.find('a')
+        if link and link.get('href'):
+            li['class'] = li.get('class', []) + [f"toc-h{len(li.find_parents('ul')) + 1}"]
+            page_span = soup.new_tag('span', **{'class': 'toc-page-number'})
+            page_span.string = '•'
+            li.append(page_span)
+    return str(soup)
+
+
+def entries(toc_html):
+    """(class, href, text, page number) of every list item, in document order"""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(toc_html, 'html.parser')
+    return [
+        (li.get('class'), li.a['href'], li.a.get_text(),
+         li.find('span', class_='toc-page-number', recursive=False).get_text())
+        for li in soup.find_all('li')
+    ]
+
+
+def test_nested_levels(parsed):
+    formatted = format_toc(parsed)
+    classes = [part.split('"', 1)[0] for part in formatted.split('<li class="')[1:]]
+    assert classes == ['toc-h2', 'toc-h3', 'toc-h4', 'toc-h5', 'toc-h3', 'toc-h2']
+    assert formatted.count('<ul>') == formatted.count('</ul>') == 4
+    assert formatted.count('<span class="toc-page-number">•</span></li>') == 6
+    assert formatted.startswith(parsed['toc'][:parsed['toc'].find('<ul>')])
+
+
+def test_matches_legacy_formatting(parsed):
+    pytest.importorskip('bs4')
+    assert entries(format_toc(parsed)) == entries(legacy_format_toc(parsed['toc']))
+
+
+def test_titles_stay_escaped(parsed):
+    formatted = format_toc(parsed)
+    assert '<tag>' not in formatted
+    assert 'Use &lt;tag&gt; &amp; &ldquo;quotes&rdquo;' in formatted
+    assert '<em>' not in formatted and 'Deep detail' in formatted
+
+
+def test_custom_and_duplicate_ids(parsed):
+    formatted = format_toc(parsed)
+    assert '<a href="#custom-id">Intro</a>' in formatted
+    assert '<a href="#overview">' in formatted and '<a href="#overview_1">' in formatted
+
+
+def test_ids_are_escaped_in_links():
+    toc_html = '<div class="toc"><ul>\n<li><a href="#x">x</a></li>\n</ul>\n</div>\n'
+    tokens = [{'level': 1, 'id': 'a"b&c', 'name': 'Title', 'children': []}]
+    formatted = HTMLGenerator().format_toc_with_page_numbers(toc_html, tokens)
+    assert '<a href="#a&quot;b&amp;c">Title</a>' in formatted
+
+
+def test_without_tokens_or_toc():
+    generator = HTMLGenerator()
+    assert generator.format_toc_with_page_numbers('') == ''
+    toc_html = '<div class="toc"><ul>\n<li><a href="#x">x</a></li>\n</ul>\n</div>\n'
+    assert generator.format_toc_with_page_numbers(toc_html) == toc_html